@@ -0,0 +1,102 @@
+"""
+Benchmark da extração de ZIP: serial (sob demanda) x paralela (pool de processos).
+
+Gera um ZIP sintético com 500 membros DXF/PDF (e um ZIP aninhado) e mede o tempo
+para descompactar todos os membros em cada modo.
+
+Uso:
+    python -m benchmarks.bench_archive_extraction [--membros 500] [--workers 4]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import zipfile
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+from django.core.files.uploadedfile import TemporaryUploadedFile  # noqa: E402
+
+from uploadapi.archive_processor import ArchiveProcessor  # noqa: E402
+
+
+def gerar_conteudo_dxf(rng: random.Random, linhas: int) -> bytes:
+    """Gera um DXF ASCII simples com `linhas` entidades LINE."""
+    partes = ["0\nSECTION\n2\nENTITIES\n"]
+    for _ in range(linhas):
+        x1, y1, x2, y2 = (rng.uniform(0, 1000) for _ in range(4))
+        partes.append(f"0\nLINE\n8\nCorte\n10\n{x1:.4f}\n20\n{y1:.4f}\n11\n{x2:.4f}\n21\n{y2:.4f}\n")
+    partes.append("0\nENDSEC\n0\nEOF\n")
+    return ''.join(partes).encode('ascii')
+
+
+def gerar_zip_sintetico(destino: str, membros: int) -> None:
+    rng = random.Random(42)
+    aninhados = max(1, membros // 10)
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i in range(membros - aninhados):
+            extensao = 'dxf' if i % 2 else 'pdf'
+            zf.writestr(f"grupo_{i % 25}/peca_{i}.{extensao}", gerar_conteudo_dxf(rng, 2000))
+        with zipfile.ZipFile(destino + '.aninhado', 'w', zipfile.ZIP_DEFLATED) as interno:
+            for i in range(aninhados):
+                interno.writestr(f"peca_aninhada_{i}.dxf", gerar_conteudo_dxf(rng, 2000))
+        zf.write(destino + '.aninhado', 'grupo_aninhado/aninhado.zip')
+    os.unlink(destino + '.aninhado')
+
+
+def abrir_upload(caminho: str) -> TemporaryUploadedFile:
+    tamanho = os.path.getsize(caminho)
+    upload = TemporaryUploadedFile('sintetico.zip', 'application/zip', tamanho, None)
+    with open(caminho, 'rb') as origem:
+        upload.write(origem.read())
+    upload.seek(0)
+    return upload
+
+
+def medir(processor: ArchiveProcessor, upload) -> tuple:
+    inicio = time.perf_counter()
+    total_bytes = 0
+    with processor.open_archive(upload) as membros:
+        for membro in membros.values():
+            total_bytes += len(membro.read())
+    return time.perf_counter() - inicio, len(membros), total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--membros', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    caminho = os.path.join(tempfile.gettempdir(), 'bench_extracao.zip')
+    gerar_zip_sintetico(caminho, args.membros)
+    upload = abrir_upload(caminho)
+    print(f"ZIP sintético: {args.membros} membros, {os.path.getsize(caminho) / 1e6:.1f} MB compactado")
+
+    modos = [
+        ('serial', ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS)),
+        (f'paralelo ({args.workers} processos)', ArchiveProcessor(
+            allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS, parallel_workers=args.workers)),
+    ]
+    tempos = {}
+    for nome, processor in modos:
+        melhores = []
+        for _ in range(args.repeticoes):
+            tempo, quantidade, total_bytes = medir(processor, upload)
+            melhores.append(tempo)
+        tempos[nome] = min(melhores)
+        print(f"{nome:<28} {tempos[nome] * 1000:9.1f} ms  {quantidade} membros  {total_bytes / 1e6:.1f} MB")
+
+    serial, paralelo = tempos.values()
+    print(f"speedup: {serial / paralelo:.2f}x")
+    upload.close()
+    os.unlink(caminho)
+
+
+if __name__ == '__main__':
+    main()
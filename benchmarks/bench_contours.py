@@ -0,0 +1,87 @@
+"""
+Benchmark da reconstrução de contornos (uploadapi.contours.build_contours).
+
+Gera anéis poligonais de LINEs com ruído nas extremidades, segmentos
+embaralhados e com sentido trocado, e mede o tempo da montagem por hash
+espacial para quantidades crescentes de segmentos, mostrando o crescimento
+linear. Para referência, mede também a busca por pares O(n²) (cada extremidade
+contra todas as outras) em um lote pequeno.
+
+Uso:
+    python -m benchmarks.bench_contours [--segmentos 10000 100000 200000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from uploadapi.contours import build_contours
+
+SEGMENTOS_POR_ANEL = 20
+TOLERANCIA = 0.01
+
+
+def gerar_aneis(segmentos: int, seed: int = 42) -> np.ndarray:
+    """Gera segmentos / SEGMENTOS_POR_ANEL anéis fechados como array (n, 4)."""
+    rng = np.random.default_rng(seed)
+    aneis = segmentos // SEGMENTOS_POR_ANEL
+    angulos = np.linspace(0, 2 * np.pi, SEGMENTOS_POR_ANEL + 1)
+    cx = np.repeat((np.arange(aneis) % 100) * 30.0, SEGMENTOS_POR_ANEL)
+    cy = np.repeat((np.arange(aneis) // 100) * 30.0, SEGMENTOS_POR_ANEL)
+    inicio, fim = np.tile(angulos[:-1], aneis), np.tile(angulos[1:], aneis)
+    extremos = np.column_stack([cx + 10 * np.cos(inicio), cy + 10 * np.sin(inicio),
+                                cx + 10 * np.cos(fim), cy + 10 * np.sin(fim)])
+    extremos += rng.normal(0, 1e-4, extremos.shape)
+    invertidos = rng.random(len(extremos)) < 0.5
+    extremos[invertidos] = extremos[invertidos][:, [2, 3, 0, 1]]
+    return extremos[rng.permutation(len(extremos))]
+
+
+def contornos_por_pares(extremos: np.ndarray, tolerancia: float) -> int:
+    """Referência O(n²): une cada extremidade às extremidades próximas e conta componentes."""
+    n = len(extremos)
+    pontos = np.concatenate([extremos[:, :2], extremos[:, 2:]])
+    pai = list(range(n))
+
+    def raiz(i):
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
+
+    for i, ponto in enumerate(pontos):
+        proximos = np.flatnonzero(np.abs(pontos - ponto).max(axis=1) < tolerancia)
+        for j in proximos:
+            a, b = raiz(i % n), raiz(int(j) % n)
+            if a != b:
+                pai[a] = b
+    return len({raiz(i) for i in range(n)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segmentos', type=int, nargs='+', default=[10000, 100000, 200000])
+    parser.add_argument('--pares', type=int, default=2000, help='segmentos da referência O(n²)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    for segmentos in args.segmentos:
+        extremos = gerar_aneis(segmentos)
+        melhor = float('inf')
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            estatisticas, _ = build_contours(extremos, TOLERANCIA)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        print(f"hash espacial  {len(extremos):>8} segmentos  {melhor * 1000:8.1f} ms  "
+              f"{melhor / len(extremos) * 1e6:6.2f} µs/segmento  {estatisticas}")
+
+    extremos = gerar_aneis(args.pares)
+    inicio = time.perf_counter()
+    componentes = contornos_por_pares(extremos, TOLERANCIA)
+    tempo = time.perf_counter() - inicio
+    print(f"pares O(n²)    {len(extremos):>8} segmentos  {tempo * 1000:8.1f} ms  "
+          f"{tempo / len(extremos) * 1e6:6.2f} µs/segmento  {componentes} contornos")
+
+
+if __name__ == '__main__':
+    main()
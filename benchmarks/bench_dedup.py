@@ -0,0 +1,115 @@
+"""
+Benchmark da remoção de geometria repetida ou sobreposta
+(uploadapi.dedup.merge_segments e merge_arcs).
+
+Gera um nest sintético em que parte das LINEs e dos arcos foi exportada duas
+vezes (repetida, invertida ou sobreposta pela metade) e mede a união por grade
+quantizada para quantidades crescentes de entidades, mostrando o crescimento
+~linear. Para referência, mede a comparação O(n²) de cada segmento contra
+todos os outros em um lote pequeno e confere que as duas removem o mesmo
+comprimento.
+
+Uso:
+    python -m benchmarks.bench_dedup [--entidades 10000 100000 400000]
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from uploadapi.dedup import merge_arcs, merge_segments
+
+TOLERANCIA = 0.01
+FRACAO_REPETIDA = 0.3
+
+
+def gerar_segmentos(quantidade: int, seed: int = 42) -> np.ndarray:
+    """Segmentos aleatórios em que FRACAO_REPETIDA foi repetida, invertida ou sobreposta."""
+    rng = np.random.default_rng(seed)
+    originais = quantidade - int(quantidade * FRACAO_REPETIDA)
+    inicio = rng.random((originais, 2)) * 2000
+    segmentos = np.column_stack([inicio, inicio + rng.normal(0, 20, (originais, 2))])
+    copias = segmentos[rng.integers(0, originais, quantidade - originais)]
+    tipo = rng.integers(0, 3, len(copias))
+    copias[tipo == 1] = copias[tipo == 1][:, [2, 3, 0, 1]]
+    meio = (copias[:, :2] + copias[:, 2:]) / 2
+    copias[tipo == 2, :2] = meio[tipo == 2]
+    return np.concatenate([segmentos, copias])[rng.permutation(quantidade)]
+
+
+def gerar_arcos(quantidade: int, seed: int = 42) -> np.ndarray:
+    """Arcos e círculos aleatórios em que FRACAO_REPETIDA foi repetida com outro ângulo inicial."""
+    rng = np.random.default_rng(seed)
+    originais = quantidade - int(quantidade * FRACAO_REPETIDA)
+    arcos = np.column_stack([rng.random((originais, 2)) * 2000, rng.random(originais) * 10 + 1,
+                             rng.random(originais) * math.tau, rng.random(originais) * math.tau])
+    copias = arcos[rng.integers(0, originais, quantidade - originais)].copy()
+    copias[:, 3] += rng.random(len(copias))
+    return np.concatenate([arcos, copias])[rng.permutation(quantidade)]
+
+
+def removido_por_pares(segmentos: np.ndarray, tolerancia: float) -> float:
+    """Referência O(n²): para cada segmento, a parte já coberta pelos segmentos anteriores da mesma reta."""
+    x1, y1, x2, y2 = segmentos.T
+    comprimento = np.hypot(x2 - x1, y2 - y1)
+    ux, uy = (x2 - x1) / comprimento, (y2 - y1) / comprimento
+    removido = 0.0
+    for i in range(len(segmentos)):
+        # Segmentos anteriores sobre a mesma reta (extremidades a menos da tolerância da reta de i)
+        d1 = np.abs((x1[:i] - x1[i]) * uy[i] - (y1[:i] - y1[i]) * ux[i])
+        d2 = np.abs((x2[:i] - x1[i]) * uy[i] - (y2[:i] - y1[i]) * ux[i])
+        mesmos = np.flatnonzero((d1 < tolerancia) & (d2 < tolerancia))
+        a = ux[i] * x1[i] + uy[i] * y1[i]
+        b = ux[i] * x2[i] + uy[i] * y2[i]
+        inicio, fim = min(a, b), max(a, b)
+        cobertos = []
+        for j in mesmos:
+            c = ux[i] * x1[j] + uy[i] * y1[j]
+            d = ux[i] * x2[j] + uy[i] * y2[j]
+            cobertos.append((max(min(c, d), inicio), min(max(c, d), fim)))
+        # Comprimento da união dos trechos cobertos dentro de [inicio, fim]
+        ultimo = inicio
+        for c, d in sorted(cobertos):
+            if d > ultimo:
+                removido += d - max(c, ultimo)
+                ultimo = d
+    return removido
+
+
+def medir(funcao, repeticoes: int) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entidades', type=int, nargs='+', default=[10000, 100000, 400000])
+    parser.add_argument('--pares', type=int, default=3000, help='segmentos da referência O(n²)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    for quantidade in args.entidades:
+        segmentos, arcos = gerar_segmentos(quantidade), gerar_arcos(quantidade)
+        tempo_seg, (unidos, removido_seg) = medir(lambda: merge_segments(segmentos, TOLERANCIA), args.repeticoes)
+        tempo_arc, (_, removido_arc) = medir(lambda: merge_arcs(arcos, TOLERANCIA), args.repeticoes)
+        print(f"LINEs  {quantidade:>8}  {tempo_seg * 1000:8.1f} ms  {tempo_seg / quantidade * 1e6:5.2f} µs/entidade  "
+              f"{quantidade - len(unidos):>7} unidas  {removido_seg:12.1f} mm removidos")
+        print(f"arcos  {quantidade:>8}  {tempo_arc * 1000:8.1f} ms  {tempo_arc / quantidade * 1e6:5.2f} µs/entidade  "
+              f"{'':>7}         {removido_arc:12.1f} mm removidos")
+
+    segmentos = gerar_segmentos(args.pares)
+    tempo_grade, (_, removido_grade) = medir(lambda: merge_segments(segmentos, TOLERANCIA), args.repeticoes)
+    inicio = time.perf_counter()
+    removido_ref = removido_por_pares(segmentos, TOLERANCIA)
+    tempo_ref = time.perf_counter() - inicio
+    print(f"pares O(n²) {args.pares:>6}  {tempo_ref * 1000:8.1f} ms  {removido_ref:12.1f} mm removidos")
+    print(f"speedup: {tempo_ref / tempo_grade:.0f}x  diferença: {abs(removido_ref - removido_grade):.2e} mm")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark do perímetro de DXFs montados por blocos repetidos: expansão de cada
+INSERT em entidades virtuais x comprimento do bloco memorizado por documento
+(DXFProcessor._measure_insert).
+
+Gera um DXF (R2018) com um bloco de padrão de furação inserido N vezes com
+rotações variadas, confere que os dois caminhos produzem o mesmo perímetro e
+mede o tempo de cada um (documento já carregado e pelo scanner).
+
+Uso:
+    python -m benchmarks.bench_dxf_blocks [--insercoes 2000] [--furos 24]
+"""
+import argparse
+import io
+import math
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+import ezdxf  # noqa: E402
+
+from uploadapi.dxf_processor import DXFProcessor  # noqa: E402
+
+
+def gerar_documento(insercoes: int, furos: int) -> bytes:
+    """Gera um DXF com um bloco de `furos` círculos e um contorno, inserido `insercoes` vezes."""
+    doc = ezdxf.new('R2018')
+    bloco = doc.blocks.new('FURACAO')
+    for k in range(furos):
+        angulo = 2 * math.pi * k / furos
+        bloco.add_circle((40 * math.cos(angulo), 40 * math.sin(angulo)), 3)
+    bloco.add_lwpolyline([(-50, -50, 0, 0, 0.2), (50, -50), (50, 50), (-50, 50)], format='xyseb', close=True)
+    msp = doc.modelspace()
+    for i in range(insercoes):
+        msp.add_blockref('FURACAO', ((i % 50) * 120, (i // 50) * 120), dxfattribs={'rotation': i % 360})
+    stream = io.StringIO()
+    doc.write(stream)
+    return stream.getvalue().encode('utf-8')
+
+
+def perimetro_expandido(processor: DXFProcessor, msp) -> float:
+    """Caminho sem memorização: cada INSERT é expandido e suas entidades medidas."""
+    total = 0.0
+    for entity in msp:
+        entidades = entity.virtual_entities() if entity.dxftype() == 'INSERT' else [entity]
+        total += processor._calculate_perimeter(entidades)
+    return total
+
+
+def melhor_tempo(funcao, repeticoes: int) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--insercoes', type=int, default=2000)
+    parser.add_argument('--furos', type=int, default=24)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    conteudo = gerar_documento(args.insercoes, args.furos)
+    print(f"DXF sintético: {args.insercoes} inserções de um bloco com {args.furos + 1} entidades, "
+          f"{len(conteudo) / 1e6:.1f} MB")
+
+    processor = DXFProcessor()
+    msp = processor._load_document(conteudo).modelspace()
+    tempo_expandido, perimetro_exp = melhor_tempo(lambda: perimetro_expandido(processor, msp), args.repeticoes)
+    tempo_bloco, perimetro_bloco = melhor_tempo(lambda: processor._calculate_perimeter(msp), args.repeticoes)
+    tempo_scanner, perimetro_scanner = melhor_tempo(
+        lambda: DXFProcessor(fast_scan=True)._perimeter_from_bytes(conteudo), args.repeticoes)
+
+    print(f"{'expansão por INSERT':<26} {tempo_expandido * 1000:9.1f} ms  "
+          f"{tempo_expandido / args.insercoes * 1e6:8.1f} µs/inserção  perímetro {perimetro_exp:.3f}")
+    print(f"{'bloco memorizado':<26} {tempo_bloco * 1000:9.1f} ms  "
+          f"{tempo_bloco / args.insercoes * 1e6:8.1f} µs/inserção  perímetro {perimetro_bloco:.3f}")
+    print(f"{'scanner (inclui leitura)':<26} {tempo_scanner * 1000:9.1f} ms  "
+          f"{tempo_scanner / args.insercoes * 1e6:8.1f} µs/inserção  perímetro {perimetro_scanner:.3f}")
+    print(f"speedup: {tempo_expandido / tempo_bloco:.1f}x  "
+          f"diferença de perímetro: {abs(perimetro_exp - perimetro_bloco):.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark da leitura de DXF: arquivo temporário (mktemp + ezdxf.readfile) x
+leitura direta dos bytes em memória (DXFProcessor._load_document).
+
+Gera um lote de DXFs pequenos (R2018, algumas dezenas de entidades cada) e mede
+o tempo por arquivo de cada caminho, incluindo o cálculo do perímetro. Como o
+parse do ezdxf domina o tempo total, também mede isoladamente a etapa eliminada:
+a ida e volta pelo disco (gravar, detectar formato/codificação, ler e remover)
+contra a detecção e decodificação em memória.
+
+Uso:
+    python -m benchmarks.bench_dxf_parse [--arquivos 1000] [--entidades 40]
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+import ezdxf  # noqa: E402
+
+from ezdxf.filemanagement import dxf_file_info  # noqa: E402
+from ezdxf.lldxf.validator import is_binary_dxf_file, is_dxf_file  # noqa: E402
+
+from uploadapi.dxf_processor import DXFProcessor  # noqa: E402
+
+
+def gerar_lote(quantidade: int, entidades: int) -> list:
+    """Gera `quantidade` DXFs ASCII com linhas, arcos e círculos aleatórios."""
+    rng = random.Random(42)
+    lote = []
+    for _ in range(quantidade):
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        for i in range(entidades):
+            x, y = rng.uniform(0, 500), rng.uniform(0, 500)
+            if i % 3 == 0:
+                msp.add_line((x, y), (x + rng.uniform(1, 50), y + rng.uniform(1, 50)))
+            elif i % 3 == 1:
+                msp.add_arc((x, y), rng.uniform(1, 20), rng.uniform(0, 180), rng.uniform(180, 360))
+            else:
+                msp.add_circle((x, y), rng.uniform(1, 20))
+        stream = io.StringIO()
+        doc.write(stream)
+        lote.append(stream.getvalue().encode('utf-8'))
+    return lote
+
+
+def ler_via_arquivo_temporario(processor: DXFProcessor, conteudo: bytes) -> float:
+    """Caminho anterior: grava o DXF em disco e lê com ezdxf.readfile."""
+    temp_file_path = tempfile.mktemp(suffix='.dxf')
+    try:
+        with open(temp_file_path, 'wb') as temp_file:
+            temp_file.write(conteudo)
+        doc = ezdxf.readfile(temp_file_path)
+        return processor._calculate_perimeter(doc.modelspace())
+    finally:
+        os.unlink(temp_file_path)
+
+
+def ler_em_memoria(processor: DXFProcessor, conteudo: bytes) -> float:
+    doc = processor._load_document(conteudo)
+    return processor._calculate_perimeter(doc.modelspace())
+
+
+def carregar_via_arquivo_temporario(processor: DXFProcessor, conteudo: bytes) -> float:
+    """Apenas a E/S do caminho anterior, sem o parse: as mesmas leituras do ezdxf.readfile."""
+    temp_file_path = tempfile.mktemp(suffix='.dxf')
+    try:
+        with open(temp_file_path, 'wb') as temp_file:
+            temp_file.write(conteudo)
+        is_binary_dxf_file(temp_file_path)
+        is_dxf_file(temp_file_path)
+        info = dxf_file_info(temp_file_path)
+        with open(temp_file_path, mode='rt', encoding=info.encoding, errors='surrogateescape') as fp:
+            return len(fp.read())
+    finally:
+        os.unlink(temp_file_path)
+
+
+def carregar_em_memoria(processor: DXFProcessor, conteudo: bytes) -> float:
+    """Apenas a detecção e a decodificação feitas por _load_document, sem o parse."""
+    conteudo.startswith(DXFProcessor.BINARY_DXF_SENTINEL)
+    encoding = processor._detect_encoding(conteudo)
+    return len(io.TextIOWrapper(io.BytesIO(conteudo), encoding=encoding, errors='surrogateescape').read())
+
+
+def medir(funcao, processor: DXFProcessor, lote: list) -> tuple:
+    inicio = time.perf_counter()
+    total = sum(funcao(processor, conteudo) for conteudo in lote)
+    return time.perf_counter() - inicio, total
+
+
+def comparar(titulo: str, modos: list, processor: DXFProcessor, lote: list, repeticoes: int) -> None:
+    """Executa os modos alternadamente e reporta o melhor tempo de cada um."""
+    print(titulo)
+    melhores = {nome: float('inf') for nome, _ in modos}
+    for _ in range(repeticoes):
+        for nome, funcao in modos:
+            tempo, _ = medir(funcao, processor, lote)
+            melhores[nome] = min(melhores[nome], tempo)
+    for nome, tempo in melhores.items():
+        print(f"  {nome:<20} {tempo * 1000:9.1f} ms  {tempo / len(lote) * 1e6:8.1f} µs/arquivo")
+    anterior, novo = melhores.values()
+    print(f"  economia por arquivo: {(anterior - novo) / len(lote) * 1e6:.1f} µs ({anterior / novo:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arquivos', type=int, default=1000)
+    parser.add_argument('--entidades', type=int, default=40)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    lote = gerar_lote(args.arquivos, args.entidades)
+    print(f"Lote sintético: {len(lote)} DXFs, {sum(map(len, lote)) / len(lote) / 1e3:.1f} KB em média")
+
+    processor = DXFProcessor()
+    comparar('Carregamento sem parse (E/S + detecção de codificação):', [
+        ('arquivo temporário', carregar_via_arquivo_temporario),
+        ('em memória', carregar_em_memoria),
+    ], processor, lote, args.repeticoes)
+    comparar('Parse completo + perímetro:', [
+        ('arquivo temporário', ler_via_arquivo_temporario),
+        ('em memória', ler_em_memoria),
+    ], processor, lote, args.repeticoes)
+
+
+if __name__ == '__main__':
+    main()
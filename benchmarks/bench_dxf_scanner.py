@@ -0,0 +1,86 @@
+"""
+Benchmark do cálculo de perímetro: documento completo do ezdxf x scanner leve
+de códigos de grupo (uploadapi.dxf_scanner).
+
+Gera um nest sintético (R2018) com linhas, arcos, círculos e LWPOLYLINEs,
+confere que os dois caminhos produzem o mesmo perímetro e mede o tempo e o
+pico de memória alocada de cada um.
+
+Uso:
+    python -m benchmarks.bench_dxf_scanner [--pecas 5000] [--vertices 60]
+"""
+import argparse
+import io
+import math
+import os
+import random
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+import ezdxf  # noqa: E402
+
+from uploadapi.dxf_processor import DXFProcessor  # noqa: E402
+
+
+def gerar_nest(pecas: int, vertices: int) -> bytes:
+    """Gera um DXF com `pecas` contornos poligonais, cada um com furos e arcos."""
+    rng = random.Random(42)
+    doc = ezdxf.new('R2018')
+    msp = doc.modelspace()
+    for i in range(pecas):
+        cx, cy = (i % 100) * 120.0, (i // 100) * 120.0
+        raio = rng.uniform(20, 50)
+        contorno = [
+            (cx + raio * math.cos(2 * math.pi * k / vertices), cy + raio * math.sin(2 * math.pi * k / vertices))
+            for k in range(vertices)
+        ]
+        msp.add_lwpolyline(contorno, close=True, dxfattribs={'layer': 'Corte'})
+        msp.add_circle((cx, cy), rng.uniform(2, 8), dxfattribs={'layer': 'Corte'})
+        msp.add_arc((cx, cy), raio + 5, rng.uniform(0, 90), rng.uniform(180, 270), dxfattribs={'layer': 'Corte'})
+        msp.add_line((cx - raio, cy), (cx + raio, cy), dxfattribs={'layer': 'Gravacao'})
+    stream = io.StringIO()
+    doc.write(stream)
+    return stream.getvalue().encode('utf-8')
+
+
+def medir(processor: DXFProcessor, conteudo: bytes, repeticoes: int) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        perimetro = processor._perimeter_from_bytes(conteudo)
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    processor._perimeter_from_bytes(conteudo)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return melhor, pico, perimetro
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pecas', type=int, default=5000)
+    parser.add_argument('--vertices', type=int, default=60)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    conteudo = gerar_nest(args.pecas, args.vertices)
+    print(f"Nest sintético: {args.pecas} peças, {len(conteudo) / 1e6:.1f} MB")
+
+    resultados = {}
+    for nome, processor in (('ezdxf (documento)', DXFProcessor()), ('scanner', DXFProcessor(fast_scan=True))):
+        tempo, pico, perimetro = medir(processor, conteudo, args.repeticoes)
+        resultados[nome] = (tempo, perimetro)
+        print(f"{nome:<20} {tempo * 1000:9.1f} ms  pico {pico / 1e6:7.2f} MB  perímetro {perimetro:.3f}")
+
+    (tempo_ezdxf, perimetro_ezdxf), (tempo_scanner, perimetro_scanner) = resultados.values()
+    print(f"speedup: {tempo_ezdxf / tempo_scanner:.2f}x  diferença de perímetro: {abs(perimetro_ezdxf - perimetro_scanner):.2e}")
+
+
+if __name__ == '__main__':
+    main()
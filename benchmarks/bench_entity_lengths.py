@@ -0,0 +1,115 @@
+"""
+Benchmark do custo de medição por tipo de entidade (uploadapi.geometry_kernel).
+
+Para cada tipo de entidade de corte gera um lote de entidades aleatórias e mede
+o tempo por entidade do caminho vetorizado (GeometryBatch, usado por
+_calculate_perimeter) e do cálculo por entidade (_get_entity_length). SPLINEs
+são medidos em várias tolerâncias de achatamento, com o erro relativo em
+relação a um achatamento de referência (1e-6 mm).
+
+Uso:
+    python -m benchmarks.bench_entity_lengths [--entidades 500]
+"""
+import argparse
+import math
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+import ezdxf  # noqa: E402
+
+from uploadapi.dxf_processor import DXFProcessor  # noqa: E402
+from uploadapi.geometry_kernel import GeometryBatch  # noqa: E402
+
+# Método do GeometryBatch usado por tipo de entidade
+_ACUMULAR = {
+    'LINE': 'add_line',
+    'ARC': 'add_arc',
+    'CIRCLE': 'add_circle',
+    'LWPOLYLINE': 'add_polyline',
+    'ELLIPSE': 'add_ellipse',
+    'SPLINE': 'add_spline',
+}
+
+
+def gerar_entidades(quantidade: int) -> dict:
+    """Gera `quantidade` entidades aleatórias de cada tipo."""
+    rng = random.Random(42)
+    msp = ezdxf.new('R2018').modelspace()
+    entidades = {tipo: [] for tipo in ('LINE', 'ARC', 'CIRCLE', 'LWPOLYLINE (bulge)', 'ELLIPSE', 'SPLINE')}
+    for _ in range(quantidade):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        entidades['LINE'].append(msp.add_line((x, y), (x + rng.uniform(1, 50), y + rng.uniform(1, 50))))
+        entidades['ARC'].append(msp.add_arc((x, y), rng.uniform(1, 50), rng.uniform(0, 360), rng.uniform(0, 360)))
+        entidades['CIRCLE'].append(msp.add_circle((x, y), rng.uniform(1, 50)))
+        entidades['LWPOLYLINE (bulge)'].append(msp.add_lwpolyline(
+            [(x + 10 * k, y + rng.uniform(-5, 5), 0, 0, rng.uniform(-1, 1)) for k in range(12)],
+            format='xyseb', close=True,
+        ))
+        angulo = rng.uniform(0, math.tau)
+        eixo = rng.uniform(5, 50)
+        entidades['ELLIPSE'].append(msp.add_ellipse(
+            (x, y), (eixo * math.cos(angulo), eixo * math.sin(angulo), 0), rng.uniform(0.05, 1.0),
+            rng.uniform(0, math.tau), rng.uniform(0, math.tau),
+        ))
+        entidades['SPLINE'].append(msp.add_spline(
+            [(x + 20 * k, y + rng.uniform(-30, 30)) for k in range(8)],
+        ))
+    return entidades
+
+
+def tempo_lote(entidades: list, tolerancia: float, repeticoes: int) -> tuple:
+    """Melhor tempo de acumular e somar as entidades em um GeometryBatch."""
+    metodo = _ACUMULAR[entidades[0].dxftype()]
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        lote = GeometryBatch(spline_tolerance=tolerancia)
+        adicionar = getattr(lote, metodo)
+        for entity in entidades:
+            adicionar(entity)
+        total = lote.total_length()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, total
+
+
+def tempo_por_entidade(entidades: list, tolerancia: float, repeticoes: int) -> float:
+    """Melhor tempo de _get_entity_length entidade a entidade."""
+    processor = DXFProcessor(spline_tolerance=tolerancia)
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for entity in entidades:
+            processor._get_entity_length(entity)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entidades', type=int, default=500)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    entidades = gerar_entidades(args.entidades)
+    print(f"{args.entidades} entidades por tipo (µs/entidade)")
+    print(f"{'tipo':<28} {'lote':>9} {'individual':>11}  erro relativo")
+
+    casos = [(tipo, lista, 0.01) for tipo, lista in entidades.items() if tipo != 'SPLINE']
+    casos += [(f'SPLINE (tol {tolerancia:g} mm)', entidades['SPLINE'], tolerancia) for tolerancia in (1.0, 0.1, 0.01, 0.001)]
+    _, referencia = tempo_lote(entidades['SPLINE'], 1e-6, 1)
+
+    for nome, lista, tolerancia in casos:
+        tempo, total = tempo_lote(lista, tolerancia, args.repeticoes)
+        individual = tempo_por_entidade(lista, tolerancia, args.repeticoes)
+        erro = f"{(referencia - total) / referencia:.1e}" if nome.startswith('SPLINE') else ''
+        print(f"{nome:<28} {tempo / len(lista) * 1e6:9.2f} {individual / len(lista) * 1e6:11.2f}  {erro}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark do cálculo de perímetro: laço Python por entidade e por
+segmento (implementação anterior) x kernel vetorizado (GeometryBatch).
+
+Gera um model space com LWPOLYLINEs de muitos vértices (como peças aninhadas
+exportadas), além de linhas, arcos e círculos, e mede os dois cálculos sobre
+as mesmas entidades. As polilinhas são abertas e sem bulge para que os dois
+caminhos calculem exatamente a mesma geometria.
+
+Uso:
+    python -m benchmarks.bench_geometry_kernel [--polilinhas 20] [--vertices 20000]
+"""
+import argparse
+import math
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+import ezdxf  # noqa: E402
+
+from uploadapi.dxf_processor import DXFProcessor  # noqa: E402
+
+
+def gerar_modelspace(polilinhas: int, vertices: int, entidades: int):
+    rng = random.Random(42)
+    doc = ezdxf.new('R2018')
+    msp = doc.modelspace()
+    for _ in range(polilinhas):
+        x, y = 0.0, 0.0
+        pontos = []
+        for _ in range(vertices):
+            x += rng.uniform(-1, 1)
+            y += rng.uniform(-1, 1)
+            pontos.append((x, y))
+        msp.add_lwpolyline(pontos)
+    for _ in range(entidades):
+        cx, cy = rng.uniform(0, 500), rng.uniform(0, 500)
+        msp.add_line((cx, cy), (cx + rng.uniform(1, 50), cy + rng.uniform(1, 50)))
+        msp.add_arc((cx, cy), rng.uniform(1, 20), rng.uniform(0, 360), rng.uniform(0, 360))
+        msp.add_circle((cx, cy), rng.uniform(1, 20))
+    return msp
+
+
+def perimetro_laco_python(processor: DXFProcessor, modelspace) -> float:
+    """Implementação anterior: despacho por entidade e math.sqrt por segmento."""
+    total = 0.0
+    for entity in modelspace:
+        tipo = entity.dxftype()
+        if tipo == 'LWPOLYLINE':
+            pontos = list(entity.get_points())
+            for i in range(len(pontos) - 1):
+                x1, y1 = pontos[i][0], pontos[i][1]
+                x2, y2 = pontos[i + 1][0], pontos[i + 1][1]
+                total += math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+        else:
+            total += processor._get_entity_length(entity)
+    return total
+
+
+def medir(funcao, repeticoes: int) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--polilinhas', type=int, default=20)
+    parser.add_argument('--vertices', type=int, default=20000)
+    parser.add_argument('--entidades', type=int, default=5000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    msp = gerar_modelspace(args.polilinhas, args.vertices, args.entidades)
+    print(f"Model space: {args.polilinhas} LWPOLYLINEs x {args.vertices} vértices + {3 * args.entidades} LINE/ARC/CIRCLE")
+
+    # Sem remoção de duplicados, para somar exatamente as mesmas entidades que o laço
+    processor = DXFProcessor(dedup_tolerance=None)
+    tempo_laco, perimetro_laco = medir(lambda: perimetro_laco_python(processor, msp), args.repeticoes)
+    tempo_kernel, perimetro_kernel = medir(lambda: processor._calculate_perimeter(msp), args.repeticoes)
+    print(f"{'laço Python':<20} {tempo_laco * 1000:9.1f} ms  perímetro {perimetro_laco:.3f}")
+    print(f"{'kernel vetorizado':<20} {tempo_kernel * 1000:9.1f} ms  perímetro {perimetro_kernel:.3f}")
+    print(f"speedup: {tempo_laco / tempo_kernel:.2f}x  diferença relativa: {abs(perimetro_laco - perimetro_kernel) / perimetro_laco:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark do pareamento PDF/DXF por nome (uploadapi.name_index.NameMatcher).
+
+Gera um grupo com milhares de peças, em que parte dos códigos é prefixo de
+outros ("1234" e "12345") e cada PDF tem algumas variantes de DXF
+("12345_a.dxf", "12345-corte.dxf"), e compara:
+
+- varredura: para cada DXF, o primeiro nome base de PDF contido no nome do
+  DXF (O(D×P) buscas de substring), como o pareamento fazia;
+- índice: autômato de Aho-Corasick sobre os nomes base, com o nome mais longo
+  encontrado em uma passada pelo nome do DXF.
+
+Mostra quantos DXFs a varredura associa a um PDF diferente (o de nome mais
+curto, conforme a ordem dos arquivos).
+
+Uso:
+    python -m benchmarks.bench_name_matching [--pecas 1000 5000]
+"""
+import argparse
+import random
+import time
+
+from uploadapi.name_index import NameMatcher
+
+SUFIXOS = ('_a', '_b', '-corte', ' rev2')
+
+
+def gerar_nomes(pecas: int, seed: int = 42) -> tuple:
+    """Nomes base dos PDFs (em ordem aleatória) e nomes dos DXFs do grupo."""
+    rng = random.Random(seed)
+    codigos = set()
+    while len(codigos) < pecas:
+        codigo = f"33.03.{rng.randint(10000, 99999)}"
+        codigos.add(codigo)
+        # Parte dos códigos ganha uma variante mais longa com o mesmo prefixo
+        if rng.random() < 0.3 and len(codigos) < pecas:
+            codigos.add(codigo + str(rng.randint(0, 9)))
+    pdfs = sorted(codigos)
+    rng.shuffle(pdfs)
+    dxfs = [codigo + sufixo for codigo in pdfs for sufixo in rng.sample(SUFIXOS, rng.randint(1, 3))]
+    return pdfs, dxfs
+
+
+def parear_por_varredura(pdfs: list, dxfs: list) -> list:
+    return [next((nome for nome in pdfs if nome in dxf), None) for dxf in dxfs]
+
+
+def parear_por_indice(pdfs: list, dxfs: list) -> list:
+    indice = NameMatcher(pdfs)
+    return [indice.longest_match(dxf) for dxf in dxfs]
+
+
+def medir(funcao, *args) -> tuple:
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pecas', type=int, nargs='+', default=[1000, 5000])
+    args = parser.parse_args()
+
+    for pecas in args.pecas:
+        pdfs, dxfs = gerar_nomes(pecas)
+        tempo_varredura, por_varredura = medir(parear_por_varredura, pdfs, dxfs)
+        tempo_indice, por_indice = medir(parear_por_indice, pdfs, dxfs)
+        divergentes = sum(1 for a, b in zip(por_varredura, por_indice) if a != b)
+        assert all(dxf.startswith(nome) for dxf, nome in zip(dxfs, por_indice))
+        print(f"{len(pdfs):>6} PDFs {len(dxfs):>6} DXFs  varredura {tempo_varredura * 1000:9.1f} ms  "
+              f"índice {tempo_indice * 1000:7.1f} ms  ({tempo_varredura / tempo_indice:.0f}x)  "
+              f"{divergentes} DXFs pareados com um nome base mais curto pela varredura")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark da abertura de PDFs: arquivo temporário x direto da memória
+(uploadapi.pdf_processor.PDFProcessor).
+
+Gera um lote de desenhos A1 (layout A1_SECURITY) com dezenas de MB de
+geometria vetorial cada e mede, para cada modo:
+
+- abertura: gravar o NamedTemporaryFile, abrir com fitz.open(caminho) e
+  carregar a página, x fitz.open(stream=...) sobre os bytes;
+- process(): o PDFProcessor completo (abertura + extração dos campos).
+
+Uso:
+    python -m benchmarks.bench_pdf_open [--pdfs 5] [--mb 25]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import fitz
+
+from uploadapi.pdf_processor import PDFProcessor
+
+# Folha A1 em pontos (paisagem)
+A1_LARGURA, A1_ALTURA = 2384.0, 1684.0
+
+# Posição (linha de base) de cada campo, dentro dos retângulos do layout A1_SECURITY (layouts.json)
+CAMPOS_A1 = {
+    'nome': (2030, 1536, 'SUPORTE DO MOTOR'),
+    'codigo': (2195, 1618, 'SP01'),
+    'material': (2030, 1649, 'Aço'),
+    'espessura': (2200, 1650, '2'),
+}
+
+
+def gerar_desenho_a1(megabytes: float, seed: int = 42, rotulos: int = 0) -> bytes:
+    """
+    Desenho A1 com o carimbo A1_SECURITY, ~`megabytes` MB de segmentos (stream
+    sem compressão) e `rotulos` cotas de texto espalhadas pela folha.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    pagina = doc.new_page(width=A1_LARGURA, height=A1_ALTURA)
+    # Dentro da regiao_chave do A1_SECURITY
+    pagina.insert_text((2035, 1618), 'S   E   C   U   R   I   T   Y', fontsize=10)
+    for x, y, texto in CAMPOS_A1.values():
+        pagina.insert_text((x, y), texto, fontsize=8)
+    # Cotas escritas direto no stream, com a fonte que o insert_text registrou na página
+    fonte = pagina.get_fonts()[0][4]
+    segmentos = [f"BT /{fonte} 6 Tf 1 0 0 1 {rng.uniform(20, 1900):.2f} {rng.uniform(240, 1660):.2f} Tm "
+                 f"(R{rng.uniform(1, 500):.1f} +0.1) Tj ET\n" for _ in range(rotulos)]
+    tamanho = sum(map(len, segmentos))
+    while tamanho < megabytes * 1024 * 1024:
+        x, y = rng.uniform(20, 1950), rng.uniform(20, 1450)
+        op = f"{x:.2f} {y:.2f} m {x + rng.uniform(-40, 40):.2f} {y + rng.uniform(-40, 40):.2f} l S\n"
+        segmentos.append(op)
+        tamanho += len(op)
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, ("0.2 w\n" + ''.join(segmentos)).encode('ascii'), compress=False)
+    conteudos = [xref] + pagina.get_contents()
+    doc.xref_set_key(pagina.xref, "Contents", "[" + " ".join(f"{x} 0 R" for x in conteudos) + "]")
+    return doc.tobytes()
+
+
+def abrir_via_arquivo_temporario(conteudo: bytes) -> None:
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
+        temp_pdf.write(conteudo)
+        caminho = temp_pdf.name
+    try:
+        with fitz.open(caminho) as doc:
+            doc.load_page(0)
+    finally:
+        os.unlink(caminho)
+
+
+def abrir_em_memoria(conteudo: bytes) -> None:
+    with fitz.open(stream=conteudo, filetype='pdf') as doc:
+        doc.load_page(0)
+
+
+def processar_via_arquivo_temporario(conteudo: bytes) -> dict:
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
+        temp_pdf.write(conteudo)
+        caminho = temp_pdf.name
+    try:
+        return PDFProcessor(caminho, 'SP01.pdf').process()
+    finally:
+        os.unlink(caminho)
+
+
+def processar_em_memoria(conteudo: bytes) -> dict:
+    return PDFProcessor(conteudo, 'SP01.pdf').process()
+
+
+def medir(funcao, lote: list, repeticoes: int) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultados = [funcao(conteudo) for conteudo in lote]
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdfs', type=int, default=5)
+    parser.add_argument('--mb', type=float, default=25, help='tamanho aproximado de cada PDF')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    lote = [gerar_desenho_a1(args.mb, seed=i) for i in range(args.pdfs)]
+    total_mb = sum(len(conteudo) for conteudo in lote) / 1024 / 1024
+    print(f"lote: {args.pdfs} PDFs A1, {total_mb:.0f} MB")
+
+    for titulo, temporario, memoria in (('abertura', abrir_via_arquivo_temporario, abrir_em_memoria),
+                                        ('process()', processar_via_arquivo_temporario, processar_em_memoria)):
+        tempo_temp, via_arquivo = medir(temporario, lote, args.repeticoes)
+        tempo_mem, em_memoria = medir(memoria, lote, args.repeticoes)
+        assert via_arquivo == em_memoria
+        print(f"{titulo:<10} arquivo temporário {tempo_temp * 1000:9.1f} ms  memória {tempo_mem * 1000:9.1f} ms  "
+              f"({tempo_temp / args.pdfs * 1000:.1f} x {tempo_mem / args.pdfs * 1000:.1f} ms/PDF, "
+              f"{tempo_temp / tempo_mem:.1f}x)")
+    print(f"campos: {em_memoria[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark da extração dos campos do carimbo: cinco passadas de texto x uma
+extração de palavras por página (uploadapi.pdf_processor.PDFProcessor).
+
+Gera desenhos A1 densos (geometria vetorial e cotas de texto) e compara:
+
+- cinco passadas: get_text("text") da página inteira para detectar o layout
+  e um get_text("text", clip=...) por campo, como o PDFProcessor fazia;
+- palavras: um get_text("words") por página, guardado no processador, com
+  layout e campos respondidos por interseção de retângulos.
+
+Mostra o tempo de cada etapa (PDFProcessor.tempos) e confere que os campos
+extraídos são os mesmos.
+
+Uso:
+    python -m benchmarks.bench_pdf_text [--pdfs 3] [--mb 10] [--rotulos 3000]
+"""
+import argparse
+import time
+
+import fitz
+
+from benchmarks.bench_pdf_open import gerar_desenho_a1
+from uploadapi.layout_registry import get_registry
+from uploadapi.pdf_processor import PDFProcessor
+
+CAMPOS = ("codigo", "nome", "material", "espessura")
+
+
+def campos_cinco_passadas(conteudo: bytes, margem: float = 5.0) -> dict:
+    """Referência: texto da página inteira para o layout e uma passada com clip por campo."""
+    with fitz.open(stream=conteudo, filetype='pdf') as doc:
+        pagina = doc.load_page(0)
+        if 'S   E   C   U   R   I   T   Y' not in pagina.get_text('text') or pagina.rect.width <= 2000:
+            return {"erro": "Layout não reconhecido"}
+        resultado = {}
+        for campo in CAMPOS:
+            rect = get_registry().current().get('A1_SECURITY').campos[campo]
+            clip = fitz.Rect(rect.x0 - margem, rect.y0 - margem, rect.x1 + margem, rect.y1 + margem)
+            resultado[campo] = pagina.get_text("text", clip=clip).replace('\n', ' ').strip()
+        return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdfs', type=int, default=3)
+    parser.add_argument('--mb', type=float, default=10, help='geometria de cada PDF, em MB')
+    parser.add_argument('--rotulos', type=int, default=3000, help='cotas de texto de cada PDF')
+    args = parser.parse_args()
+
+    lote = [gerar_desenho_a1(args.mb, seed=i, rotulos=args.rotulos) for i in range(args.pdfs)]
+    print(f"lote: {args.pdfs} PDFs A1, {sum(map(len, lote)) / 1024 / 1024:.0f} MB, {args.rotulos} cotas cada")
+
+    inicio = time.perf_counter()
+    referencia = [campos_cinco_passadas(conteudo) for conteudo in lote]
+    tempo_cinco = time.perf_counter() - inicio
+
+    etapas = {}
+    inicio = time.perf_counter()
+    resultados = []
+    for conteudo in lote:
+        processor = PDFProcessor(conteudo, 'SP01.pdf', title_block_only=False)
+        resultados.append(processor.process())
+        for etapa, segundos in processor.tempos.items():
+            etapas[etapa] = etapas.get(etapa, 0.0) + segundos
+    tempo_palavras = time.perf_counter() - inicio
+
+    assert resultados == referencia, (resultados, referencia)
+    print(f"cinco passadas  {tempo_cinco / args.pdfs * 1000:9.1f} ms/PDF")
+    print(f"palavras        {tempo_palavras / args.pdfs * 1000:9.1f} ms/PDF  "
+          + "  ".join(f"{etapa} {segundos / args.pdfs * 1000:.1f}" for etapa, segundos in etapas.items()))
+    print(f"speedup: {tempo_cinco / tempo_palavras:.1f}x  campos: {resultados[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark da leitura só do carimbo (uploadapi.pdf_processor.PDFProcessor,
+title_block_only).
+
+Gera um lote de desenhos A1 (layout A1_SECURITY) com geometria vetorial e
+milhares de cotas de texto espalhadas pela folha e mede process() em dois
+modos:
+
+- página inteira: extração das palavras de toda a folha, detecção do layout
+  pelo texto SECURITY e leitura dos campos;
+- carimbo: layout pelo tamanho da página e extração só do texto que cruza a
+  união dos retângulos dos campos e da região da chave, onde SECURITY é
+  conferido.
+
+Os dois modos usam os layouts padrão; gerar_desenho_a1 escreve SECURITY
+dentro da regiao_chave do A1_SECURITY.
+
+Confere que os dois modos dão os mesmos campos e mostra o tempo por etapa.
+
+Uso:
+    python -m benchmarks.bench_pdf_title_block [--pdfs 5] [--mb 5] [--rotulos 50000]
+"""
+import argparse
+import time
+
+from benchmarks.bench_pdf_open import gerar_desenho_a1
+from uploadapi.pdf_processor import PDFProcessor
+
+
+def medir(lote: list, title_block_only: bool, repeticoes: int) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        etapas = {}
+        resultados = []
+        inicio = time.perf_counter()
+        for conteudo in lote:
+            processor = PDFProcessor(conteudo, 'SP01.pdf', title_block_only=title_block_only)
+            resultados.append(processor.process())
+            for etapa, segundos in processor.tempos.items():
+                etapas[etapa] = etapas.get(etapa, 0.0) + segundos
+        decorrido = time.perf_counter() - inicio
+        if decorrido < melhor:
+            melhor, melhores_etapas = decorrido, etapas
+    return melhor, melhores_etapas, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdfs', type=int, default=5)
+    parser.add_argument('--mb', type=float, default=5, help='tamanho aproximado do stream de cada PDF')
+    parser.add_argument('--rotulos', type=int, default=50000, help='cotas de texto por desenho')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    lote = [gerar_desenho_a1(args.mb, seed=i, rotulos=args.rotulos) for i in range(args.pdfs)]
+    total_mb = sum(len(conteudo) for conteudo in lote) / 1024 / 1024
+    print(f"lote: {args.pdfs} PDFs A1, {total_mb:.0f} MB, {args.rotulos} cotas cada")
+
+    medidas = {}
+    for titulo, title_block_only in (('página inteira', False), ('carimbo', True)):
+        tempo, etapas, resultados = medir(lote, title_block_only, args.repeticoes)
+        medidas[titulo] = (tempo, resultados)
+        detalhe = '  '.join(f"{etapa} {segundos / args.pdfs * 1000:.1f}" for etapa, segundos in etapas.items())
+        print(f"{titulo:<15} {tempo / args.pdfs * 1000:8.1f} ms/PDF  ({detalhe} ms)")
+
+    (tempo_pagina, por_pagina), (tempo_carimbo, por_carimbo) = medidas.values()
+    assert por_pagina == por_carimbo
+    print(f"speedup: {tempo_pagina / tempo_carimbo:.1f}x  campos: {por_carimbo[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark da extração de RAR: um unrar por membro (rarfile.open) x extração em
+lote (uma única execução do unrar para um diretório temporário).
+
+Usa o RAR informado em --arquivo ou, se o executável `rar` estiver instalado,
+gera um RAR sintético com --membros desenhos DXF.
+
+Uso:
+    python -m benchmarks.bench_rar_extraction --arquivo desenhos.rar
+    python -m benchmarks.bench_rar_extraction --membros 300
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+from django.core.files.uploadedfile import TemporaryUploadedFile  # noqa: E402
+
+from uploadapi.archive_processor import ArchiveProcessor  # noqa: E402
+from benchmarks.bench_archive_extraction import gerar_conteudo_dxf  # noqa: E402
+
+
+def gerar_rar_sintetico(diretorio: str, membros: int) -> str:
+    rng = random.Random(42)
+    origem = os.path.join(diretorio, 'origem')
+    os.makedirs(os.path.join(origem, 'grupo'))
+    for i in range(membros):
+        with open(os.path.join(origem, 'grupo', f'peca_{i}.dxf'), 'wb') as arquivo:
+            arquivo.write(gerar_conteudo_dxf(rng, 500))
+    destino = os.path.join(diretorio, 'sintetico.rar')
+    subprocess.run(['rar', 'a', '-idq', '-r', destino, 'grupo'], cwd=origem, check=True)
+    return destino
+
+
+def abrir_upload(caminho: str) -> TemporaryUploadedFile:
+    upload = TemporaryUploadedFile('desenhos.rar', 'application/x-rar', os.path.getsize(caminho), None)
+    with open(caminho, 'rb') as origem:
+        shutil.copyfileobj(origem, upload)
+    upload.seek(0)
+    return upload
+
+
+def medir(processor: ArchiveProcessor, upload) -> tuple:
+    inicio = time.perf_counter()
+    total_bytes = 0
+    with processor.open_archive(upload) as membros:
+        for membro in membros.values():
+            total_bytes += len(membro.read())
+    return time.perf_counter() - inicio, len(membros), total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arquivo', help='RAR existente a ser medido')
+    parser.add_argument('--membros', type=int, default=300)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    if not shutil.which('unrar'):
+        sys.exit('unrar não encontrado no PATH; o benchmark precisa do unrar para ambos os modos.')
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        if args.arquivo:
+            caminho = args.arquivo
+        elif shutil.which('rar'):
+            caminho = gerar_rar_sintetico(diretorio, args.membros)
+        else:
+            sys.exit('Informe --arquivo ou instale o executável rar para gerar um RAR sintético.')
+
+        upload = abrir_upload(caminho)
+        modos = [
+            ('por membro', ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS)),
+            ('em lote', ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS, rar_bulk_extraction=True)),
+        ]
+        tempos = {}
+        for nome, processor in modos:
+            medicoes = [medir(processor, upload) for _ in range(args.repeticoes)]
+            tempos[nome], quantidade, total_bytes = min(medicoes)
+            print(f"{nome:<12} {tempos[nome] * 1000:9.1f} ms  {quantidade} membros  {total_bytes / 1e6:.1f} MB")
+
+        print(f"speedup: {tempos['por membro'] / tempos['em lote']:.2f}x")
+        upload.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark da ordenação dos contornos para o deslocamento rápido
+(uploadapi.travel.estimate_rapid).
+
+Gera pontos de perfuração de um nest sintético (peças em grade, cada uma com
+furos ao redor) e mede o percurso do vizinho mais próximo pela KD-tree para
+quantidades crescentes de contornos, mostrando o crescimento ~n log n, e a
+ordem da curva de Hilbert usada acima de MAX_GREEDY_POINTS (tempo e quanto o
+deslocamento fica acima do vizinho mais próximo). Para referência, mede o
+percurso guloso com a busca O(n²) (cada passo contra todos os pontos
+restantes) e o ganho do 2-opt para alguns orçamentos de tempo.
+
+Uso:
+    python -m benchmarks.bench_travel [--contornos 1000 5000 20000 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from uploadapi.travel import estimate_rapid
+
+FUROS_POR_PECA = 12
+
+
+def gerar_perfuracoes(contornos: int, seed: int = 42) -> np.ndarray:
+    """Gera `contornos` pontos de perfuração (contorno externo + furos de cada peça), embaralhados."""
+    rng = np.random.default_rng(seed)
+    pecas = -(-contornos // (FUROS_POR_PECA + 1))
+    colunas = int(np.ceil(np.sqrt(pecas)))
+    centros = np.column_stack([(np.arange(pecas) % colunas) * 150.0, (np.arange(pecas) // colunas) * 150.0])
+    angulos = 2 * np.pi * np.arange(FUROS_POR_PECA) / FUROS_POR_PECA
+    furos = np.column_stack([40 * np.cos(angulos), 40 * np.sin(angulos)])
+    externo = np.array([[60.0, 0.0]])
+    pontos = (centros[:, None, :] + np.concatenate([externo, furos])[None, :, :]).reshape(-1, 2)[:contornos]
+    pontos += rng.normal(0, 5, pontos.shape)
+    return pontos[rng.permutation(len(pontos))]
+
+
+def percurso_forca_bruta(pontos: np.ndarray) -> float:
+    """Referência O(n²): a cada passo calcula a distância a todos os pontos restantes."""
+    atual = pontos.min(axis=0)
+    restantes = np.ones(len(pontos), dtype=bool)
+    total = 0.0
+    for _ in range(len(pontos)):
+        distancias = np.where(restantes, np.hypot(*(pontos - atual).T), np.inf)
+        proximo = int(np.argmin(distancias))
+        total += distancias[proximo]
+        restantes[proximo] = False
+        atual = pontos[proximo]
+    return total
+
+
+def medir(funcao) -> tuple:
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contornos', type=int, nargs='+', default=[1000, 5000, 20000, 100000])
+    parser.add_argument('--forca-bruta', type=int, default=5000, help='contornos da referência O(n²)')
+    parser.add_argument('--orcamentos', type=float, nargs='+', default=[0.05, 0.5])
+    args = parser.parse_args()
+
+    for contornos in args.contornos:
+        pontos = gerar_perfuracoes(contornos)
+        tempo, (rapid_mm, _) = medir(lambda: estimate_rapid(pontos, max_pontos_guloso=None))
+        print(f"KD-tree        {contornos:>7} contornos  {tempo * 1000:8.1f} ms  "
+              f"{tempo / contornos * 1e6:6.1f} µs/contorno  rapid {rapid_mm:12.1f} mm")
+        tempo, (hilbert_mm, _) = medir(lambda: estimate_rapid(pontos, max_pontos_guloso=0))
+        print(f"  Hilbert                       {tempo * 1000:8.1f} ms  "
+              f"{tempo / contornos * 1e6:6.1f} µs/contorno  rapid {hilbert_mm:12.1f} mm  "
+              f"({(hilbert_mm / rapid_mm - 1) * 100:+4.1f}%)")
+        for orcamento in args.orcamentos:
+            tempo, (otimizado, _) = medir(lambda: estimate_rapid(pontos, orcamento_2opt_s=orcamento,
+                                                                 max_pontos_guloso=None))
+            print(f"  + 2-opt {orcamento:5.2f} s            {tempo * 1000:8.1f} ms  "
+                  f"                   rapid {otimizado:12.1f} mm  ({(1 - otimizado / rapid_mm) * 100:4.1f}% menor)")
+
+    pontos = gerar_perfuracoes(args.forca_bruta)
+    tempo_kd, (rapid_kd, _) = medir(lambda: estimate_rapid(pontos, max_pontos_guloso=None))
+    tempo_fb, rapid_fb = medir(lambda: percurso_forca_bruta(pontos))
+    print(f"força bruta    {args.forca_bruta:>7} contornos  {tempo_fb * 1000:8.1f} ms  "
+          f"{tempo_fb / args.forca_bruta * 1e6:6.1f} µs/contorno  rapid {rapid_fb:12.1f} mm")
+    print(f"speedup KD-tree: {tempo_fb / tempo_kd:.1f}x  diferença de rapid: {abs(rapid_fb - rapid_kd):.2e} mm")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark da latência da primeira requisição: processo frio x pool de workers
+aquecidos (uploadapi.worker_pool).
+
+Processa o mesmo par PDF/DXF sintético repetidas vezes em dois cenários:
+
+- frio: um processo recém-criado importa o integrated_processor (ezdxf, fitz,
+  NumPy) e processa os pares na ordem, como o servidor logo após um deploy;
+- pool: um WorkerPool é iniciado (aquecimento fora da medição) e os mesmos
+  pares são enviados a ele.
+
+Para cada cenário mostra o tempo da primeira requisição e a mediana das
+seguintes (regime).
+
+Uso:
+    python -m benchmarks.bench_worker_pool [--pecas 300] [--repeticoes 20]
+"""
+import argparse
+import io
+import math
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docmanager.settings')
+django.setup()
+
+from uploadapi.worker_pool import WorkerPool  # noqa: E402
+
+
+def gerar_par(pecas: int) -> tuple:
+    """Gera um PDF de uma página e um DXF com `pecas` contornos com furos."""
+    import ezdxf
+    import fitz
+
+    doc = ezdxf.new('R2018')
+    msp = doc.modelspace()
+    for i in range(pecas):
+        cx, cy = (i % 20) * 120.0, (i // 20) * 120.0
+        msp.add_lwpolyline([(cx, cy, 0, 0, 0.3), (cx + 100, cy), (cx + 100, cy + 100), (cx, cy + 100)],
+                           format='xyseb', close=True, dxfattribs={'layer': 'Corte'})
+        msp.add_circle((cx + 50, cy + 50), 10, dxfattribs={'layer': 'Corte'})
+        msp.add_arc((cx + 50, cy + 50), 30, 0, 180, dxfattribs={'layer': 'Corte'})
+    stream = io.StringIO()
+    doc.write(stream)
+
+    pdf = fitz.open()
+    pagina = pdf.new_page()
+    pagina.insert_text((72, 72), 'SP01 - Material: Aço - Espessura: 2 mm')
+    return pdf.tobytes(), stream.getvalue().encode('utf-8')
+
+
+def processar_frio(pdf_bytes: bytes, dxf_bytes: bytes, repeticoes: int) -> list:
+    """Executado num processo novo: importa o processamento e mede cada par (o primeiro inclui os imports)."""
+    inicio = time.perf_counter()
+    from uploadapi.dxf_processor import DXFProcessor
+    from uploadapi.integrated_processor import processar_par
+
+    processor = DXFProcessor()
+    tempos = []
+    for _ in range(repeticoes):
+        processar_par('SP01.pdf', pdf_bytes, 'SP01', dxf_bytes, 5.0, processor)
+        tempos.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+    return tempos
+
+
+def processar_no_pool(pool: WorkerPool, pdf_bytes: bytes, dxf_bytes: bytes, repeticoes: int) -> list:
+    from uploadapi.integrated_processor import _processar_par_no_worker
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        pool.submit(_processar_par_no_worker, 'SP01.pdf', pdf_bytes, 'SP01', dxf_bytes, 5.0).result()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def resumo(titulo: str, tempos: list) -> None:
+    print(f"{titulo:<28} primeira {tempos[0] * 1000:8.1f} ms  regime (mediana) {statistics.median(tempos[1:]) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pecas', type=int, default=300)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    pdf_bytes, dxf_bytes = gerar_par(args.pecas)
+    print(f"par: PDF {len(pdf_bytes) / 1024:.0f} KiB, DXF {len(dxf_bytes) / 1024:.0f} KiB ({args.pecas} peças)")
+
+    # O processo do executor já está iniciado (sem imports do processamento) quando a medição começa
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        executor.submit(math.sqrt, 1.0).result()
+        tempos_frio = executor.submit(processar_frio, pdf_bytes, dxf_bytes, args.repeticoes).result()
+    resumo('processo frio', tempos_frio)
+
+    pool = WorkerPool(1).start()
+    print(f"aquecimento do pool: {pool.health()['aquecimento_segundos']:.2f} s (na subida da aplicação)")
+    try:
+        tempos_pool = processar_no_pool(pool, pdf_bytes, dxf_bytes, args.repeticoes)
+    finally:
+        pool.shutdown()
+    resumo('pool aquecido', tempos_pool)
+    print(f"primeira requisição: {tempos_frio[0] / tempos_pool[0]:.1f}x mais rápida com o pool; "
+          f"primeira/regime no pool: {tempos_pool[0] / statistics.median(tempos_pool[1:]):.2f}")
+
+
+if __name__ == '__main__':
+    main()
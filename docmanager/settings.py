@@ -128,6 +128,90 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# File uploads
+# https://docs.djangoproject.com/en/5.2/topics/http/file-uploads/
+
+# Uploads are streamed to a temporary file in chunks instead of being kept in
+# memory; ArchiveProcessor then reads the archive straight from disk (mmap).
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Directory for the spooled uploads (None uses the system default temp dir)
+FILE_UPLOAD_TEMP_DIR = None
+
+# Number of worker processes used to inflate ZIP members in parallel
+# (0 or 1 keeps the serial, on-demand extraction)
+ARCHIVE_EXTRACTION_WORKERS = 0
+
+# Extract each RAR with a single unrar run into a private temp dir instead of
+# one unrar process per member (opt-in; see benchmarks/bench_rar_extraction.py)
+ARCHIVE_RAR_BULK_EXTRACTION = False
+
+# Resource limits for each uploaded archive (see uploadapi.archive_processor.ExtractionBudget)
+ARCHIVE_EXTRACTION_BUDGET = {
+    'max_depth': 5,
+    'max_total_bytes': 2 * 1024 * 1024 * 1024,  # 2GB inflated
+    'max_members': 10000,
+    'max_compression_ratio': 200,
+}
+
+# Compute DXF perimeters with the streaming group-code scanner
+# (uploadapi.dxf_scanner) instead of loading the full ezdxf document
+DXF_FAST_SCAN = False
+
+# Maximum chord deviation (mm) when flattening SPLINE entities for perimeter
+# calculation; smaller values are more precise and slower
+DXF_SPLINE_TOLERANCE = 0.01
+
+# Layer(s) measured as the cut path: a name, a glob ("Corte*") or a list of
+# names/globs. When no layer of a DXF matches, all layers are summed.
+DXF_TARGET_LAYER = 'Corte'
+
+# Distance (mm) under which entity endpoints are joined when rebuilding cut
+# contours; each closed contour or open chain counts as one pierce
+DXF_CONTOUR_TOLERANCE = 0.01
+
+# Distance (mm) under which repeated or overlapping LINE/ARC/CIRCLE entities on
+# the same layer are counted once; None sums every entity
+DXF_DEDUP_TOLERANCE = 0.01
+
+# Time budget (s) for improving the nearest-neighbour contour order with 2-opt
+# when estimating rapid travel between pierces; 0 disables it. Opt-in: the
+# budget is spent on every DXF of a batch, so it makes results depend on timing
+DXF_TRAVEL_2OPT_SECONDS = 0
+
+# Pierce count above which the contour order comes from a Hilbert curve
+# (vectorized, a few percent longer) instead of the nearest-neighbour walk,
+# which runs one point at a time; None always uses nearest neighbour
+DXF_TRAVEL_MAX_GREEDY_POINTS = 10000
+
+# JSON file with the PDF title-block layouts (page size, keyword and field
+# rectangles; see uploadapi.layout_registry). It is re-read when it changes,
+# without restarting the server; None uses uploadapi/layouts.json
+PDF_LAYOUTS_FILE = None
+
+# Persistent pool of warmed worker processes for PDF/DXF pairs (see
+# uploadapi.worker_pool). Opt-in: with enabled=True each server process starts
+# its own pool on the first request that needs it (never at import time, so
+# management commands, tests and Celery never start one, and gunicorn
+# --preload children do not share the parent's). Disabled, or with workers=0,
+# pairs are processed in the request thread; each worker is replaced after
+# max_tasks_per_child pairs to cap memory growth. wait_warmup makes that first
+# request wait until every worker has imported ezdxf/fitz and run a warm-up
+# pair. A pair running longer than deadline_seconds (None: no limit; counted
+# from when a worker starts the pair, not while it is queued), or
+# crashing its worker, is reported with an error status and the pool is
+# restarted; pairs processed in the request thread have no deadline or
+# isolation.
+PROCESSING_POOL = {
+    'enabled': False,
+    'workers': 2,
+    'max_tasks_per_child': 200,
+    'wait_warmup': True,
+    'deadline_seconds': 60,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -100,7 +100,7 @@ const FileUpload = ({ onFilesSelected, acceptedTypes = "*", maxFiles = 10 }) =>
               ou <span className="text-accent-600 font-medium">clique para selecionar</span>
             </p>
             <p className="text-sm text-primary-500">
-              Suporta arquivos ZIP e RAR até 200MB
+              Suporta arquivos ZIP, RAR e TAR até 200MB
             </p>
           </div>
         </div>
@@ -1,21 +1,319 @@
 import zipfile
 import rarfile
 import io
-from typing import Dict, List
+import mmap
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class ArchiveMember:
+    """
+    Referência preguiçosa para um arquivo contido em um arquivo compactado.
+    O conteúdo só é descompactado quando open() ou read() é chamado, e não
+    fica retido na instância.
+    """
+    
+    def __init__(self, path: str, size: int, crc: int, opener: Callable[[], BinaryIO], compressed_size: int = 0):
+        self.path = path
+        self.size = size
+        self.crc = crc
+        self.compressed_size = compressed_size
+        self._opener = opener
+    
+    def open(self) -> BinaryIO:
+        """Abre o conteúdo do arquivo como stream binário."""
+        return self._opener()
+    
+    def read(self) -> bytes:
+        """Descompacta e retorna o conteúdo completo do arquivo."""
+        with self.open() as file:
+            return file.read()
+    
+    def __repr__(self) -> str:
+        return f"ArchiveMember({self.path!r}, size={self.size})"
+
+
+class ExtractionBudgetExceeded(Exception):
+    """
+    Erro estruturado lançado quando a extração ultrapassa um limite do
+    ExtractionBudget. Interrompe a extração imediatamente.
+    """
+    
+    def __init__(self, limite: str, valor, maximo, caminho: str = ''):
+        self.limite = limite
+        self.valor = valor
+        self.maximo = maximo
+        self.caminho = caminho
+        mensagem = f"Limite de extração excedido ({limite}): {valor} > {maximo}"
+        if caminho:
+            mensagem += f" em {caminho}"
+        super().__init__(mensagem)
+    
+    def to_dict(self) -> Dict:
+        """Retorna os dados do limite excedido para a resposta da API."""
+        return {
+            'limite': self.limite,
+            'valor': self.valor,
+            'maximo': self.maximo,
+            'caminho': self.caminho,
+        }
+
+
+class ExtractionBudget:
+    """
+    Limites de recursos para a extração recursiva de um upload: profundidade de
+    aninhamento, total de bytes descompactados, quantidade de membros e taxa de
+    compressão por membro.
+    
+    Os tamanhos declarados no índice (diretório central) são verificados antes
+    de descompactar cada membro e os bytes efetivamente lidos são contabilizados
+    durante o streaming. O consumo é acumulado por upload; use reset() entre
+    uploads.
+    """
+    
+    def __init__(self, max_depth: int = 5, max_total_bytes: int = 2 * 1024 * 1024 * 1024,
+                 max_members: int = 10000, max_compression_ratio: float = 200.0,
+                 ratio_min_size: int = 1024 * 1024):
+        """
+        Args:
+            max_depth: Máximo de níveis de compactados aninhados
+            max_total_bytes: Máximo de bytes descompactados no upload
+            max_members: Máximo de arquivos (exceto diretórios) no upload
+            max_compression_ratio: Máxima razão tamanho/tamanho_compactado de um membro
+            ratio_min_size: Membros menores que isso não têm a taxa de compressão verificada
+        """
+        self.max_depth = max_depth
+        self.max_total_bytes = max_total_bytes
+        self.max_members = max_members
+        self.max_compression_ratio = max_compression_ratio
+        self.ratio_min_size = ratio_min_size
+        self.reset()
+    
+    def reset(self):
+        """Zera o consumo acumulado."""
+        self.membros = 0
+        self.bytes_declarados = 0
+        self.bytes_lidos = 0
+    
+    def check_depth(self, profundidade: int, caminho: str = ''):
+        """Verifica a profundidade de aninhamento de um compactado."""
+        if profundidade > self.max_depth:
+            raise ExtractionBudgetExceeded('max_depth', profundidade, self.max_depth, caminho)
+    
+    def check_member(self, caminho: str):
+        """Contabiliza um membro do índice."""
+        self.membros += 1
+        if self.membros > self.max_members:
+            raise ExtractionBudgetExceeded('max_members', self.membros, self.max_members, caminho)
+    
+    def check_declared(self, caminho: str, size: int, compressed_size: int):
+        """Verifica os tamanhos declarados de um membro antes de descompactá-lo."""
+        if size >= self.ratio_min_size:
+            ratio = size / max(compressed_size, 1)
+            if ratio > self.max_compression_ratio:
+                raise ExtractionBudgetExceeded('max_compression_ratio', round(ratio, 1), self.max_compression_ratio, caminho)
+        
+        self.bytes_declarados += size
+        if self.bytes_declarados > self.max_total_bytes:
+            raise ExtractionBudgetExceeded('max_total_bytes', self.bytes_declarados, self.max_total_bytes, caminho)
+    
+    def consume(self, quantidade: int, caminho: str = ''):
+        """Contabiliza bytes efetivamente descompactados durante o streaming."""
+        self.bytes_lidos += quantidade
+        if self.bytes_lidos > self.max_total_bytes:
+            raise ExtractionBudgetExceeded('max_total_bytes', self.bytes_lidos, self.max_total_bytes, caminho)
+
+
+class _BudgetedReader(io.RawIOBase):
+    """
+    Stream que contabiliza no ExtractionBudget os bytes descompactados e
+    interrompe a leitura se o membro ultrapassar o tamanho declarado.
+    """
+    
+    CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(self, stream: BinaryIO, budget: ExtractionBudget, caminho: str, declared_size: int):
+        self._stream = stream
+        self._budget = budget
+        self._caminho = caminho
+        self._declared_size = declared_size
+        self._lidos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is not None and size >= 0:
+            return self._account(self._stream.read(size))
+        
+        # Leitura completa em blocos, para abortar antes de materializar o membro inteiro
+        partes = []
+        while True:
+            parte = self._account(self._stream.read(self.CHUNK_SIZE))
+            if not parte:
+                return b''.join(partes)
+            partes.append(parte)
+    
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+    
+    def close(self):
+        self._stream.close()
+        super().close()
+    
+    def _account(self, data: bytes) -> bytes:
+        self._lidos += len(data)
+        if self._lidos > self._declared_size:
+            raise ExtractionBudgetExceeded('tamanho_declarado', self._lidos, self._declared_size, self._caminho)
+        self._budget.consume(len(data), self._caminho)
+        return data
+
+
+def _inflate_zip_members(zip_path: str, indices: Sequence[int], dest_dir: str, prefixo: str) -> List[Tuple[str, int, int, int, str]]:
+    """
+    Descompacta um subconjunto dos membros de um ZIP para arquivos em dest_dir.
+    
+    Executada nos processos do pool de extração paralela: cada processo abre o
+    ZIP pelo caminho e trabalha sobre índices disjuntos do diretório central.
+    Os arquivos de destino recebem nomes sequenciais, nunca o nome do membro.
+    
+    Returns:
+        Lista de tuplas (nome, tamanho, crc, tamanho_compactado, caminho_em_disco)
+    """
+    resultados = []
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = zf.infolist()
+        for indice in indices:
+            info = infos[indice]
+            destino = os.path.join(dest_dir, f"{prefixo}_{indice}")
+            with zf.open(info) as origem, open(destino, 'wb') as saida:
+                shutil.copyfileobj(origem, saida)
+            resultados.append((info.filename, info.file_size, info.CRC, info.compress_size, destino))
+    return resultados
+
+
+class _MappedFile(io.RawIOBase):
+    """Adapta um mmap somente leitura à interface de arquivo usada pelo zipfile."""
+    
+    def __init__(self, mapped: mmap.mmap):
+        self._mapped = mapped
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def read(self, size: int = -1) -> bytes:
+        return self._mapped.read(size if size is not None and size >= 0 else None)
+    
+    def readinto(self, buffer) -> int:
+        data = self._mapped.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+    
+    def tell(self) -> int:
+        return self._mapped.tell()
+
+
+class _SpoolView(io.RawIOBase):
+    """
+    Leitura independente de um buffer temporário compartilhado. Fechar a view
+    não fecha o buffer, que pertence à pilha do arquivo compactado.
+    """
+    
+    def __init__(self, spool: BinaryIO):
+        self._spool = spool
+        self._posicao = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def read(self, size: int = -1) -> bytes:
+        self._spool.seek(self._posicao)
+        data = self._spool.read(size if size is not None and size >= 0 else -1)
+        self._posicao += len(data)
+        return data
+    
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
 
 class ArchiveProcessor:
     """
-    Processador unificado para arquivos ZIP e RAR.
-    Suporta descompactação recursiva de ambos os formatos.
+    Processador unificado para arquivos ZIP, RAR e TAR (.tar, .tar.gz, .tar.bz2,
+    .tar.xz e .tar.zst). Suporta descompactação recursiva de todos os formatos,
+    inclusive aninhados entre si.
     """
     
-    def __init__(self):
+    # Compactados aninhados acima deste tamanho são mantidos em disco
+    NESTED_SPOOL_MAX_MEMORY = 8 * 1024 * 1024  # 8MB
+    
+    # Variações de TAR aceitas; .tar.zst depende do pacote opcional zstandard
+    TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.tar.zst', '.tzst')
+    # Compressão detectada pelo tarfile -> rótulo do formato
+    TAR_FORMATS = {'tar': 'TAR', 'gz': 'TAR.GZ', 'bz2': 'TAR.BZ2', 'xz': 'TAR.XZ', 'zst': 'TAR.ZST'}
+    ZSTD_EXTENSIONS = ('.tar.zst', '.tzst')
+    ARCHIVE_EXTENSIONS = ('.zip', '.rar') + TAR_EXTENSIONS
+    
+    # Extensões consumidas pelo processamento integrado PDF + DXF
+    PIPELINE_EXTENSIONS = ('.pdf', '.dxf')
+    
+    # Caracteres que o unrar interpreta como curinga na lista de membros (-n@); não
+    # há como escapá-los, então esses membros são lidos um a um pelo rarfile
+    RAR_LIST_WILDCARDS = ('*', '?', '[')
+    
+    def __init__(self, allowed_extensions: Optional[Iterable[str]] = None, parallel_workers: int = 0,
+                 budget: Optional[ExtractionBudget] = None, rar_bulk_extraction: bool = False):
+        """
+        Args:
+            allowed_extensions: Extensões que devem ser extraídas (ex.: ('.pdf', '.dxf')).
+                Membros com outras extensões são ignorados a partir dos metadados do
+                índice, sem descompactação. None extrai todos os arquivos.
+                Compactados aninhados são sempre percorridos.
+            parallel_workers: Número de processos para descompactar ZIPs em paralelo.
+                Com 0 ou 1 a extração é serial e sob demanda. O modo paralelo só é
+                usado quando o upload está em disco.
+            budget: Limites de recursos aplicados a cada upload. None não impõe limites.
+            rar_bulk_extraction: Se True, cada RAR é extraído por uma única execução
+                do unrar para um diretório temporário privado (no diretório
+                temporário padrão), em vez de um processo unrar por membro.
+        """
         # Configurar rarfile para usar o unrar do sistema
         rarfile.UNRAR_TOOL = "unrar"
+        self.allowed_extensions = tuple(ext.lower() for ext in allowed_extensions) if allowed_extensions is not None else None
+        self.parallel_workers = parallel_workers
+        self.budget = budget
+        self.rar_bulk_extraction = rar_bulk_extraction
+        self.estatisticas = {}
+        # Formato do último upload aberto ("ZIP", "RAR", "TAR.GZ"...), detectado pelo conteúdo no caso do TAR
+        self.formato: Optional[str] = None
+        self._somente_indice = False
+        self._reset_statistics()
     
     def extract_archive_recursive(self, uploaded_file) -> Dict[str, bytes]:
         """
-        Descompacta arquivo ZIP ou RAR recursivamente, incluindo arquivos aninhados.
+        Descompacta arquivo ZIP, RAR ou TAR recursivamente, incluindo arquivos aninhados.
+        
+        Mantém todo o conteúdo em memória; para arquivos grandes prefira
+        open_archive() ou iter_archive_members().
         
         Args:
             uploaded_file: Arquivo enviado via upload
@@ -24,6 +322,7 @@ class ArchiveProcessor:
             Dicionário com caminho do arquivo como chave e bytes como valor
         """
         arquivos_extraidos = {}
+        self._reset_statistics()
         
         # Ler arquivo em memória
         in_memory = io.BytesIO(uploaded_file.read())
@@ -34,6 +333,10 @@ class ArchiveProcessor:
                 self._extract_zip_recursive(in_memory, '', arquivos_extraidos)
             elif nome_arquivo.endswith('.rar'):
                 self._extract_rar_recursive(in_memory, '', arquivos_extraidos)
+            elif nome_arquivo.endswith(self.TAR_EXTENSIONS):
+                with ExitStack() as pilha:
+                    for membro in self._iter_tar_members(in_memory, nome_arquivo, '', pilha):
+                        arquivos_extraidos[membro.path] = membro.read()
             else:
                 raise ValueError(f"Formato de arquivo não suportado: {nome_arquivo}")
                 
@@ -42,6 +345,122 @@ class ArchiveProcessor:
         
         return arquivos_extraidos
     
+    def iter_archive_members(self, uploaded_file) -> Iterator[ArchiveMember]:
+        """
+        Percorre o arquivo ZIP, RAR ou TAR recursivamente, produzindo um ArchiveMember
+        por arquivo encontrado, sem descompactar o conteúdo.
+        
+        Cada membro só é válido até o gerador avançar para o próximo; para manter
+        todos os membros acessíveis ao mesmo tempo use open_archive().
+        
+        Args:
+            uploaded_file: Arquivo enviado via upload
+        
+        Yields:
+            ArchiveMember de cada arquivo (exceto diretórios e compactados aninhados)
+        """
+        with ExitStack() as pilha:
+            yield from self._iter_archive(uploaded_file, pilha)
+    
+    @contextmanager
+    def open_archive(self, uploaded_file) -> Iterator[Dict[str, ArchiveMember]]:
+        """
+        Abre o arquivo ZIP, RAR ou TAR e disponibiliza os membros (inclusive dos
+        compactados aninhados) enquanto o contexto estiver aberto.
+        
+        Apenas os metadados são lidos na abertura; o conteúdo de cada membro é
+        descompactado sob demanda, permitindo processar e descartar um arquivo
+        por vez.
+        
+        Args:
+            uploaded_file: Arquivo enviado via upload
+        
+        Yields:
+            Dicionário com caminho do arquivo como chave e ArchiveMember como valor
+        """
+        with ExitStack() as pilha:
+            membros = {membro.path: membro for membro in self._iter_archive(uploaded_file, pilha)}
+            yield membros
+    
+    def list_archive_members(self, uploaded_file) -> List[ArchiveMember]:
+        """
+        Lista os membros do arquivo (inclusive dos compactados aninhados) lendo
+        apenas os índices, sem descompactar os arquivos selecionados.
+        
+        Compactados aninhados ainda precisam ser descompactados para que o seu
+        índice seja lido, e TARs, que não têm índice, são percorridos por inteiro.
+        Os limites do budget são verificados normalmente. Os membros retornados
+        servem apenas para consulta de metadados e não podem ser abertos.
+        
+        Args:
+            uploaded_file: Arquivo enviado via upload
+        
+        Returns:
+            Lista de ArchiveMember na ordem dos índices
+        """
+        self._somente_indice = True
+        try:
+            with ExitStack() as pilha:
+                return list(self._iter_archive(uploaded_file, pilha))
+        finally:
+            self._somente_indice = False
+    
+    def _iter_archive(self, uploaded_file, pilha: ExitStack) -> Iterator[ArchiveMember]:
+        """Seleciona o leitor adequado ao formato do arquivo enviado."""
+        nome_arquivo = uploaded_file.name.lower()
+        self._reset_statistics()
+        self.formato = None
+        
+        try:
+            if nome_arquivo.endswith('.zip'):
+                self.formato = 'ZIP'
+                paralelo = self.parallel_workers > 1 and not self._somente_indice
+                fonte = self._open_source(uploaded_file, pilha, allow_path=paralelo)
+                if isinstance(fonte, str):
+                    yield from self._iter_zip_parallel(fonte, pilha)
+                else:
+                    yield from self._iter_zip_members(fonte, '', pilha)
+            elif nome_arquivo.endswith('.rar'):
+                self.formato = 'RAR'
+                yield from self._iter_rar_members(self._open_source(uploaded_file, pilha, allow_path=True), '', pilha)
+            elif nome_arquivo.endswith(self.TAR_EXTENSIONS):
+                yield from self._iter_tar_members(self._open_source(uploaded_file, pilha), nome_arquivo, '', pilha)
+            else:
+                raise ValueError(f"Formato de arquivo não suportado: {nome_arquivo}")
+        
+        except ExtractionBudgetExceeded:
+            raise
+        except Exception as e:
+            raise Exception(f"Erro ao descompactar arquivo: {str(e)}")
+    
+    def _open_source(self, uploaded_file, pilha: ExitStack, allow_path: bool = False):
+        """
+        Abre o arquivo enviado sem copiá-lo para a memória.
+        
+        Uploads gravados em disco pelo Django (TemporaryUploadedFile) são mapeados
+        com mmap, ou repassados pelo caminho quando o leitor aceita (RAR, que usa
+        o unrar externo diretamente sobre o arquivo). Uploads em memória são lidos
+        pelo próprio handle.
+        
+        Args:
+            uploaded_file: Arquivo enviado via upload
+            pilha: Pilha que mantém o arquivo aberto enquanto os membros forem usados
+            allow_path: Se True, retorna o caminho em disco quando disponível
+        """
+        temporary_file_path = getattr(uploaded_file, 'temporary_file_path', None)
+        if callable(temporary_file_path):
+            path = temporary_file_path()
+            if allow_path:
+                return path
+            handle = pilha.enter_context(open(path, 'rb'))
+            if os.fstat(handle.fileno()).st_size > 0:
+                mapped = pilha.enter_context(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+                return _MappedFile(mapped)
+            return handle
+        
+        uploaded_file.seek(0)
+        return uploaded_file
+    
     def _extract_zip_recursive(self, zip_bytes: io.BytesIO, parent_path: str, arquivos_extraidos: Dict[str, bytes]):
         """
         Descompacta arquivo ZIP recursivamente.
@@ -51,25 +470,9 @@ class ArchiveProcessor:
             parent_path: Caminho pai para manter estrutura de pastas
             arquivos_extraidos: Dicionário para armazenar arquivos extraídos
         """
-        with zipfile.ZipFile(zip_bytes) as zf:
-            for info in zf.infolist():
-                full_path = f"{parent_path}{info.filename}"
-                
-                if info.is_dir():
-                    continue
-                
-                with zf.open(info) as file:
-                    file_bytes = file.read()
-                    
-                    # Verificar se é um arquivo compactado aninhado
-                    if info.filename.lower().endswith('.zip'):
-                        nested_zip = io.BytesIO(file_bytes)
-                        self._extract_zip_recursive(nested_zip, full_path.rsplit('/', 1)[0] + '/', arquivos_extraidos)
-                    elif info.filename.lower().endswith('.rar'):
-                        nested_rar = io.BytesIO(file_bytes)
-                        self._extract_rar_recursive(nested_rar, full_path.rsplit('/', 1)[0] + '/', arquivos_extraidos)
-                    else:
-                        arquivos_extraidos[full_path] = file_bytes
+        with ExitStack() as pilha:
+            for membro in self._iter_zip_members(zip_bytes, parent_path, pilha):
+                arquivos_extraidos[membro.path] = membro.read()
     
     def _extract_rar_recursive(self, rar_bytes: io.BytesIO, parent_path: str, arquivos_extraidos: Dict[str, bytes]):
         """
@@ -80,32 +483,439 @@ class ArchiveProcessor:
             parent_path: Caminho pai para manter estrutura de pastas
             arquivos_extraidos: Dicionário para armazenar arquivos extraídos
         """
+        with ExitStack() as pilha:
+            for membro in self._iter_rar_members(rar_bytes, parent_path, pilha):
+                arquivos_extraidos[membro.path] = membro.read()
+    
+    def _iter_zip_members(self, zip_bytes: BinaryIO, parent_path: str, pilha: ExitStack, profundidade: int = 0) -> Iterator[ArchiveMember]:
+        """
+        Percorre o diretório central de um ZIP, produzindo membros preguiçosos.
+        
+        Args:
+            zip_bytes: Stream do arquivo ZIP
+            parent_path: Caminho pai para manter estrutura de pastas
+            pilha: Pilha que mantém o ZIP aberto enquanto os membros forem usados
+            profundidade: Nível de aninhamento deste ZIP (0 para o upload)
+        """
+        if self.budget:
+            self.budget.check_depth(profundidade, parent_path)
+        zf = pilha.enter_context(zipfile.ZipFile(zip_bytes))
+        for info in zf.infolist():
+            full_path = f"{parent_path}{info.filename}"
+            
+            if info.is_dir():
+                continue
+            if self.budget:
+                self.budget.check_member(full_path)
+            
+            # Verificar se é um arquivo compactado aninhado
+            if info.filename.lower().endswith(self.ARCHIVE_EXTENSIONS):
+                nested = self._spool_member(zf, info, full_path, pilha)
+                yield from self._iter_nested(info.filename, nested, full_path, pilha, profundidade + 1)
+            elif self._select_member(info.filename, info.file_size, info.compress_size):
+                yield self._lazy_member(zf, info, full_path)
+    
+    def _iter_rar_members(self, rar_bytes: BinaryIO, parent_path: str, pilha: ExitStack, profundidade: int = 0) -> Iterator[ArchiveMember]:
+        """
+        Percorre o índice de um RAR, produzindo membros preguiçosos.
+        
+        Args:
+            rar_bytes: Stream do arquivo RAR
+            parent_path: Caminho pai para manter estrutura de pastas
+            pilha: Pilha que mantém o RAR aberto enquanto os membros forem usados
+            profundidade: Nível de aninhamento deste RAR (0 para o upload)
+        """
         try:
-            with rarfile.RarFile(rar_bytes) as rf:
-                for info in rf.infolist():
-                    full_path = f"{parent_path}{info.filename}"
+            if self.budget:
+                self.budget.check_depth(profundidade, parent_path)
+            rf = pilha.enter_context(rarfile.RarFile(rar_bytes))
+            if self.rar_bulk_extraction and not self._somente_indice and shutil.which(rarfile.UNRAR_TOOL):
+                yield from self._iter_rar_bulk(rf, rar_bytes, parent_path, pilha, profundidade)
+                return
+            
+            for info in rf.infolist():
+                full_path = f"{parent_path}{info.filename}"
                     
-                    if info.is_dir():
-                        continue
+                if info.is_dir():
+                    continue
+                if self.budget:
+                    self.budget.check_member(full_path)
                     
-                    with rf.open(info) as file:
-                        file_bytes = file.read()
-                        
-                        # Verificar se é um arquivo compactado aninhado
-                        if info.filename.lower().endswith('.zip'):
-                            nested_zip = io.BytesIO(file_bytes)
-                            self._extract_zip_recursive(nested_zip, full_path.rsplit('/', 1)[0] + '/', arquivos_extraidos)
-                        elif info.filename.lower().endswith('.rar'):
-                            nested_rar = io.BytesIO(file_bytes)
-                            self._extract_rar_recursive(nested_rar, full_path.rsplit('/', 1)[0] + '/', arquivos_extraidos)
-                        else:
-                            arquivos_extraidos[full_path] = file_bytes
+                # Verificar se é um arquivo compactado aninhado
+                if info.filename.lower().endswith(self.ARCHIVE_EXTENSIONS):
+                    nested = self._spool_member(rf, info, full_path, pilha)
+                    yield from self._iter_nested(info.filename, nested, full_path, pilha, profundidade + 1)
+                elif self._select_member(info.filename, info.file_size, info.compress_size):
+                    yield self._lazy_member(rf, info, full_path)
                             
+        except ExtractionBudgetExceeded:
+            raise
         except rarfile.BadRarFile:
             raise Exception("Arquivo RAR inválido ou corrompido")
         except Exception as e:
             raise Exception(f"Erro ao processar arquivo RAR: {str(e)}")
     
+    def _iter_rar_bulk(self, rf, rar_bytes, parent_path: str, pilha: ExitStack, profundidade: int) -> Iterator[ArchiveMember]:
+        """
+        Extrai os membros selecionados de um RAR com uma única execução do unrar
+        e produz membros lidos do diretório temporário.
+        
+        O unrar recebe a lista exata dos membros selecionados, já conferidos
+        pelo budget, e só extrai esses. Membros cujo nome tem curingas do unrar
+        (RAR_LIST_WILDCARDS) casariam com outros membros; eles ficam fora da
+        lista e são lidos um a um pelo rarfile.
+        
+        Args:
+            rf: RarFile já aberto (usado apenas para ler o índice)
+            rar_bytes: Caminho ou stream do arquivo RAR
+            parent_path: Caminho pai para manter estrutura de pastas
+            pilha: Pilha que mantém o diretório temporário enquanto os membros forem usados
+            profundidade: Nível de aninhamento deste RAR (0 para o upload)
+        """
+        selecionados = []
+        avulsos = []
+        for info in rf.infolist():
+            if info.is_dir():
+                continue
+            full_path = f"{parent_path}{info.filename}"
+            if self.budget:
+                self.budget.check_member(full_path)
+            if info.filename.lower().endswith(self.ARCHIVE_EXTENSIONS) or self._select_member(info.filename, info.file_size, info.compress_size):
+                if any(curinga in info.filename for curinga in self.RAR_LIST_WILDCARDS):
+                    avulsos.append(info)
+                    continue
+                if self.budget:
+                    self.budget.check_declared(full_path, info.file_size, info.compress_size)
+                selecionados.append(info)
+        
+        for info in avulsos:
+            full_path = f"{parent_path}{info.filename}"
+            if info.filename.lower().endswith(self.ARCHIVE_EXTENSIONS):
+                nested = self._spool_member(rf, info, full_path, pilha)
+                yield from self._iter_nested(info.filename, nested, full_path, pilha, profundidade + 1)
+            else:
+                yield self._lazy_member(rf, info, full_path)
+        if not selecionados:
+            return
+        
+        # Cópia do RAR e lista de membros ficam fora do diretório de extração,
+        # para que nenhum membro extraído tenha o mesmo caminho que elas
+        trabalho = pilha.enter_context(tempfile.TemporaryDirectory(prefix='rar_'))
+        dest_dir = os.path.join(trabalho, 'membros')
+        os.mkdir(dest_dir)
+        if isinstance(rar_bytes, str):
+            rar_path = rar_bytes
+        else:
+            # O unrar precisa de um arquivo em disco
+            rar_path = os.path.join(trabalho, 'arquivo.rar')
+            rar_bytes.seek(0)
+            with open(rar_path, 'wb') as destino:
+                shutil.copyfileobj(rar_bytes, destino)
+        lista_path = os.path.join(trabalho, 'membros.lst')
+        with open(lista_path, 'w', encoding='utf-8') as lista:
+            lista.write('\n'.join(info.filename for info in selecionados))
+        
+        inicio = time.perf_counter()
+        resultado = subprocess.run(
+            [rarfile.UNRAR_TOOL, 'x', '-y', '-idq', '-p-', '-scfl', f'-n@{lista_path}', rar_path, dest_dir + os.sep],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        self.estatisticas['execucoes_unrar'] = self.estatisticas.get('execucoes_unrar', 0) + 1
+        self.estatisticas['tempo_extracao_rar_s'] = self.estatisticas.get('tempo_extracao_rar_s', 0.0) + time.perf_counter() - inicio
+        if resultado.returncode != 0:
+            raise Exception(f"Falha na extração do RAR (código {resultado.returncode}): {resultado.stderr.decode(errors='replace').strip()}")
+        
+        raiz = os.path.realpath(dest_dir)
+        for info in selecionados:
+            full_path = f"{parent_path}{info.filename}"
+            destino = os.path.realpath(os.path.join(raiz, info.filename))
+            if not destino.startswith(raiz + os.sep):
+                raise Exception(f"Caminho inválido no arquivo RAR: {info.filename}")
+            
+            if info.filename.lower().endswith(self.ARCHIVE_EXTENSIONS):
+                yield from self._iter_nested_path(info.filename, destino, full_path, pilha, profundidade + 1)
+            else:
+                yield ArchiveMember(
+                    full_path, info.file_size, info.CRC,
+                    lambda destino=destino, full_path=full_path, size=info.file_size: self._open_extracted(destino, full_path, size),
+                    compressed_size=info.compress_size,
+                )
+    
+    def _iter_tar_members(self, tar_bytes: BinaryIO, nome_arquivo: str, parent_path: str, pilha: ExitStack, profundidade: int = 0) -> Iterator[ArchiveMember]:
+        """
+        Lê um TAR (comprimido ou não) em modo streaming, numa única passada sobre
+        o stream e sem reposicionamento.
+        
+        Como o TAR não tem índice, cada membro só pode ser lido quando o stream
+        passa por ele: os membros selecionados são copiados para arquivos
+        temporários em disco e os compactados aninhados para buffers temporários
+        (em memória até NESTED_SPOOL_MAX_MEMORY) à medida que são lidos, e os
+        demais são descartados sem cópia. Como todos os membros selecionados são
+        copiados antes do primeiro par ser processado, mantê-los em disco deixa
+        a memória independente do tamanho do TAR. O TAR não
+        declara tamanho compactado por membro, então a taxa de compressão não é
+        verificada; os demais limites do budget se aplicam normalmente.
+        
+        Args:
+            tar_bytes: Stream do arquivo TAR
+            nome_arquivo: Nome do arquivo, usado para identificar a compressão
+            parent_path: Caminho pai para manter estrutura de pastas
+            pilha: Pilha que mantém os buffers enquanto os membros forem usados
+            profundidade: Nível de aninhamento deste TAR (0 para o upload)
+        """
+        if self.budget:
+            self.budget.check_depth(profundidade, parent_path)
+        
+        if nome_arquivo.lower().endswith(self.ZSTD_EXTENSIONS):
+            tar_bytes = self._open_zstd(tar_bytes, pilha)
+            modo = 'r|'
+        else:
+            # Detecta gzip, bzip2, xz ou TAR sem compressão
+            modo = 'r|*'
+        
+        try:
+            with tarfile.open(fileobj=tar_bytes, mode=modo) as tf:
+                if profundidade == 0:
+                    compressao = 'zst' if modo == 'r|' else getattr(tf.fileobj, 'comptype', 'tar')
+                    self.formato = self.TAR_FORMATS.get(compressao, 'TAR')
+                for info in tf:
+                    # Diretórios, links e dispositivos não têm conteúdo a extrair
+                    if not info.isfile():
+                        continue
+                    full_path = f"{parent_path}{info.name}"
+                    if self.budget:
+                        self.budget.check_member(full_path)
+                    
+                    # Verificar se é um arquivo compactado aninhado
+                    if info.name.lower().endswith(self.ARCHIVE_EXTENSIONS):
+                        nested, _ = self._spool_tar_member(tf, info, full_path, pilha)
+                        yield from self._iter_nested(info.name, nested, full_path, pilha, profundidade + 1)
+                    # O TAR não guarda o tamanho compactado de cada membro
+                    elif self._select_member(info.name, info.size, 0):
+                        if self._somente_indice:
+                            if self.budget:
+                                self.budget.check_declared(full_path, info.size, info.size)
+                            yield ArchiveMember(full_path, info.size, 0, self._sem_conteudo)
+                            continue
+                        spool, crc = self._spool_tar_member(tf, info, full_path, pilha, em_disco=True)
+                        yield ArchiveMember(full_path, info.size, crc, lambda spool=spool: _SpoolView(spool))
+        
+        except ExtractionBudgetExceeded:
+            raise
+        except tarfile.TarError as e:
+            raise Exception(f"Arquivo TAR inválido ou corrompido: {str(e)}")
+    
+    @staticmethod
+    def _sem_conteudo() -> BinaryIO:
+        raise Exception("Membro listado apenas pelo índice; use open_archive() para ler o conteúdo")
+    
+    def _open_zstd(self, stream: BinaryIO, pilha: ExitStack) -> BinaryIO:
+        """Abre um stream Zstandard para leitura sequencial descomprimida."""
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception("Suporte a .tar.zst requer o pacote zstandard")
+        return pilha.enter_context(zstandard.ZstdDecompressor().stream_reader(stream))
+    
+    def _spool_tar_member(self, tf: tarfile.TarFile, info: tarfile.TarInfo, full_path: str, pilha: ExitStack,
+                          em_disco: bool = False) -> Tuple[BinaryIO, int]:
+        """
+        Copia o membro corrente de um TAR em streaming para um buffer temporário,
+        calculando o CRC-32 durante a cópia.
+        
+        Args:
+            em_disco: Se True, copia direto para um arquivo temporário; senão o
+                buffer fica em memória até NESTED_SPOOL_MAX_MEMORY
+        
+        Returns:
+            Tupla (buffer posicionado no início, crc)
+        """
+        if self.budget:
+            self.budget.check_declared(full_path, info.size, info.size)
+        if em_disco:
+            spool = pilha.enter_context(tempfile.TemporaryFile())
+        else:
+            spool = pilha.enter_context(tempfile.SpooledTemporaryFile(max_size=self.NESTED_SPOOL_MAX_MEMORY))
+        stream = tf.extractfile(info)
+        if self.budget:
+            stream = _BudgetedReader(stream, self.budget, full_path, info.size)
+        crc = 0
+        with stream:
+            while True:
+                bloco = stream.read(_BudgetedReader.CHUNK_SIZE)
+                if not bloco:
+                    break
+                crc = zlib.crc32(bloco, crc)
+                spool.write(bloco)
+        spool.seek(0)
+        return spool, crc
+    
+    def _iter_nested(self, filename: str, nested: BinaryIO, full_path: str, pilha: ExitStack, profundidade: int) -> Iterator[ArchiveMember]:
+        """Percorre um compactado aninhado já copiado para um stream seekable."""
+        parent_path = full_path.rsplit('/', 1)[0] + '/'
+        nome = filename.lower()
+        if nome.endswith('.zip'):
+            yield from self._iter_zip_members(nested, parent_path, pilha, profundidade)
+        elif nome.endswith('.rar'):
+            yield from self._iter_rar_members(nested, parent_path, pilha, profundidade)
+        else:
+            yield from self._iter_tar_members(nested, nome, parent_path, pilha, profundidade)
+    
+    def _iter_nested_path(self, filename: str, destino: str, full_path: str, pilha: ExitStack, profundidade: int) -> Iterator[ArchiveMember]:
+        """Percorre um compactado aninhado já extraído para disco."""
+        if filename.lower().endswith('.rar'):
+            # O unrar trabalha diretamente sobre o caminho
+            yield from self._iter_nested(filename, destino, full_path, pilha, profundidade)
+        else:
+            yield from self._iter_nested(filename, pilha.enter_context(open(destino, 'rb')), full_path, pilha, profundidade)
+    
+    def _iter_zip_parallel(self, zip_path: str, pilha: ExitStack) -> Iterator[ArchiveMember]:
+        """
+        Descompacta um ZIP em disco usando um pool de processos.
+        
+        Os membros selecionados de cada ZIP são divididos em lotes disjuntos,
+        equilibrados pelo tamanho compactado, e cada processo descompacta o seu
+        lote para um diretório temporário privado. ZIPs aninhados encontrados em
+        um nível são distribuídos da mesma forma no nível seguinte; RARs e TARs
+        aninhados são percorridos serialmente.
+        
+        Os processos usam o contexto spawn, como o pool de workers: um fork de
+        um servidor com threads (e conexões, locks e o estado do MuPDF) pode
+        herdar um lock preso e travar o processo filho.
+        
+        Args:
+            zip_path: Caminho do ZIP em disco
+            pilha: Pilha que mantém o pool e o diretório temporário enquanto os membros forem usados
+        """
+        dest_dir = pilha.enter_context(tempfile.TemporaryDirectory(prefix='extracao_'))
+        executor = pilha.enter_context(ProcessPoolExecutor(max_workers=self.parallel_workers,
+                                                           mp_context=multiprocessing.get_context('spawn')))
+        
+        pendentes = [(zip_path, '')]
+        nivel = 0
+        while pendentes:
+            tarefas = []
+            for numero, (caminho, parent_path) in enumerate(pendentes):
+                if self.budget:
+                    self.budget.check_depth(nivel, parent_path)
+                selecionados = []
+                with zipfile.ZipFile(caminho) as zf:
+                    for indice, info in enumerate(zf.infolist()):
+                        if info.is_dir():
+                            continue
+                        full_path = f"{parent_path}{info.filename}"
+                        if self.budget:
+                            self.budget.check_member(full_path)
+                        if (info.filename.lower().endswith(self.ARCHIVE_EXTENSIONS)
+                                or self._select_member(info.filename, info.file_size, info.compress_size)):
+                            if self.budget:
+                                self.budget.check_declared(full_path, info.file_size, info.compress_size)
+                            selecionados.append((indice, info.compress_size))
+                for lote in self._partition_members(selecionados, self.parallel_workers * 2):
+                    future = executor.submit(_inflate_zip_members, caminho, lote, dest_dir, f"{nivel}_{numero}")
+                    tarefas.append((parent_path, future))
+            
+            pendentes = []
+            nivel += 1
+            for parent_path, future in tarefas:
+                for filename, size, crc, compressed_size, destino in future.result():
+                    full_path = f"{parent_path}{filename}"
+                    if filename.lower().endswith('.zip'):
+                        pendentes.append((destino, full_path.rsplit('/', 1)[0] + '/'))
+                    elif filename.lower().endswith(self.ARCHIVE_EXTENSIONS):
+                        yield from self._iter_nested_path(filename, destino, full_path, pilha, nivel)
+                    else:
+                        yield ArchiveMember(
+                            full_path, size, crc,
+                            lambda destino=destino, full_path=full_path, size=size: self._open_extracted(destino, full_path, size),
+                            compressed_size=compressed_size,
+                        )
+    
+    @staticmethod
+    def _partition_members(membros: List[Tuple[int, int]], quantidade: int) -> List[List[int]]:
+        """
+        Divide (índice, tamanho_compactado) em até `quantidade` lotes de custo
+        semelhante, atribuindo sempre o maior membro restante ao lote mais leve.
+        """
+        lotes = [[] for _ in range(max(1, min(quantidade, len(membros))))]
+        custos = [0] * len(lotes)
+        for indice, tamanho in sorted(membros, key=lambda membro: membro[1], reverse=True):
+            mais_leve = custos.index(min(custos))
+            lotes[mais_leve].append(indice)
+            custos[mais_leve] += tamanho
+        return [sorted(lote) for lote in lotes if lote]
+    
+    def _select_member(self, filename: str, size: int, compressed_size: int) -> bool:
+        """
+        Decide, apenas pelos metadados do índice, se um membro deve ser extraído,
+        contabilizando os membros e bytes ignorados.
+        
+        Args:
+            filename: Nome do membro dentro do arquivo compactado
+            size: Tamanho descompactado declarado
+            compressed_size: Tamanho compactado declarado (0 quando o formato não o informa, como no TAR)
+        
+        Returns:
+            True se o membro deve ser extraído
+        """
+        if self.allowed_extensions is None or filename.lower().endswith(self.allowed_extensions):
+            self.estatisticas['membros_selecionados'] += 1
+            return True
+        
+        self.estatisticas['membros_ignorados'] += 1
+        self.estatisticas['bytes_ignorados'] += size
+        self.estatisticas['bytes_compactados_ignorados'] += compressed_size
+        return False
+    
+    def _reset_statistics(self):
+        """Zera as estatísticas e o consumo do budget do upload corrente."""
+        if self.budget:
+            self.budget.reset()
+        self.estatisticas.clear()
+        self.estatisticas.update({
+            'membros_selecionados': 0,
+            'membros_ignorados': 0,
+            'bytes_ignorados': 0,
+            'bytes_compactados_ignorados': 0,
+        })
+    
+    def _lazy_member(self, archive, info, full_path: str) -> ArchiveMember:
+        """Cria o ArchiveMember de um membro selecionado, aplicando o budget."""
+        if self.budget:
+            self.budget.check_declared(full_path, info.file_size, info.compress_size)
+        return ArchiveMember(
+            full_path, info.file_size, info.CRC,
+            lambda: self._open_member(archive, info, full_path),
+            compressed_size=info.compress_size,
+        )
+    
+    def _open_member(self, archive, info, full_path: str) -> BinaryIO:
+        """Abre um membro para leitura, contabilizando os bytes lidos no budget."""
+        stream = archive.open(info)
+        if self.budget:
+            return _BudgetedReader(stream, self.budget, full_path, info.file_size)
+        return stream
+    
+    def _open_extracted(self, destino: str, full_path: str, size: int) -> BinaryIO:
+        """Abre um membro já extraído para disco, contabilizando os bytes lidos no budget."""
+        stream = open(destino, 'rb')
+        if self.budget:
+            return _BudgetedReader(stream, self.budget, full_path, size)
+        return stream
+    
+    def _spool_member(self, archive, info, full_path: str, pilha: ExitStack) -> BinaryIO:
+        """
+        Copia um compactado aninhado para um buffer temporário, que fica em
+        memória até NESTED_SPOOL_MAX_MEMORY e é transferido para disco acima disso.
+        """
+        if self.budget:
+            self.budget.check_declared(full_path, info.file_size, info.compress_size)
+        spool = pilha.enter_context(tempfile.SpooledTemporaryFile(max_size=self.NESTED_SPOOL_MAX_MEMORY))
+        with self._open_member(archive, info, full_path) as file:
+            shutil.copyfileobj(file, spool)
+        spool.seek(0)
+        return spool
+    
     def get_supported_formats(self) -> List[str]:
         """
         Retorna lista de formatos suportados.
@@ -113,7 +923,7 @@ class ArchiveProcessor:
         Returns:
             Lista de extensões suportadas
         """
-        return ['.zip', '.rar']
+        return ['.zip', '.rar'] + list(self.TAR_EXTENSIONS)
     
     def validate_file_format(self, filename: str) -> bool:
         """
@@ -125,4 +935,4 @@ class ArchiveProcessor:
         Returns:
             True se o formato é suportado, False caso contrário
         """
-        return filename.lower().endswith(tuple(self.get_supported_formats())) 
\ No newline at end of file
+        return filename.lower().endswith(tuple(self.get_supported_formats()))
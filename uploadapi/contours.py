@@ -0,0 +1,199 @@
+"""
+Reconstrução de contornos de corte a partir das extremidades das entidades.
+
+Cada entidade aberta (LINE, ARC, arco de elipse, polilinha ou SPLINE abertos)
+é uma aresta entre dois pontos; extremidades a menos da tolerância são unidas
+por hash espacial e as componentes conexas do grafo resultante são os
+contornos. Uma componente em que todos os vértices têm grau par é um contorno
+fechado (um único percurso, uma perfuração); uma componente com k vértices de
+grau ímpar precisa de k / 2 cadeias abertas, cada uma com sua perfuração.
+Além das contagens, cada contorno e cada cadeia aberta fornece um ponto de
+perfuração, usado para estimar o deslocamento entre contornos (ver travel).
+
+Tudo é vetorizado com NumPy e linear no número de extremidades, exceto pela
+ordenação das chaves do hash.
+"""
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+# Tolerância padrão (mm) para unir extremidades
+CONTOUR_TOLERANCE = 0.01
+
+# Deslocamentos das grades do hash (em células): dois pontos a menos de meia
+# célula em cada eixo caem na mesma célula em pelo menos uma das quatro grades
+_GRADES = ((0.0, 0.0), (0.5, 0.0), (0.0, 0.5), (0.5, 0.5))
+
+
+_SEM_PONTOS = np.empty((0, 2))
+
+
+class ContourStats:
+    """
+    Contornos fechados e cadeias abertas de um conjunto de entidades, com um
+    ponto de perfuração (x, y) por contorno e por cadeia.
+
+    A igualdade compara apenas as contagens.
+    """
+
+    __slots__ = ('fechados', 'abertos', 'pontos')
+
+    def __init__(self, fechados: int = 0, abertos: int = 0, pontos: np.ndarray = None):
+        self.fechados = fechados
+        self.abertos = abertos
+        self.pontos = _SEM_PONTOS if pontos is None else pontos
+
+    @property
+    def perfuracoes(self) -> int:
+        """Uma perfuração por contorno fechado e por cadeia aberta."""
+        return self.fechados + self.abertos
+
+    def __add__(self, outro: 'ContourStats') -> 'ContourStats':
+        return ContourStats(self.fechados + outro.fechados, self.abertos + outro.abertos,
+                            np.concatenate([self.pontos, outro.pontos]))
+    
+    @staticmethod
+    def combine(partes: Iterable['ContourStats']) -> 'ContourStats':
+        """
+        Soma de várias parcelas com uma única cópia dos pontos (somar com +
+        em laço copia de novo os pontos já acumulados a cada parcela).
+        """
+        partes = list(partes)
+        if not partes:
+            return ContourStats()
+        return ContourStats(sum(parte.fechados for parte in partes), sum(parte.abertos for parte in partes),
+                            np.concatenate([parte.pontos for parte in partes]))
+
+    def placed(self, ux: Sequence[float], uy: Sequence[float], origens: np.ndarray) -> 'ContourStats':
+        """
+        Cópias dos contornos posicionadas por uma transformação afim 2D.
+
+        Args:
+            ux, uy: Imagens dos eixos x e y (rotação e escala)
+            origens: Array (m, 2) com a translação de cada cópia
+
+        Returns:
+            ContourStats com m vezes as contagens e os pontos transformados
+        """
+        origens = np.asarray(origens, dtype=np.float64).reshape(-1, 2)
+        copias = len(origens)
+        base = self.pontos[:, :1] * np.asarray(ux[:2]) + self.pontos[:, 1:] * np.asarray(uy[:2])
+        pontos = (origens[:, None, :] + base[None, :, :]).reshape(-1, 2)
+        return ContourStats(self.fechados * copias, self.abertos * copias, pontos)
+
+    def __eq__(self, outro) -> bool:
+        return (isinstance(outro, ContourStats)
+                and (self.fechados, self.abertos) == (outro.fechados, outro.abertos))
+
+    def __repr__(self) -> str:
+        return f"ContourStats(fechados={self.fechados}, abertos={self.abertos})"
+
+
+def merge_points(x: np.ndarray, y: np.ndarray, tolerancia: float) -> np.ndarray:
+    """
+    Agrupa pontos próximos com um hash espacial de células de lado `tolerancia`.
+
+    Pontos a menos de tolerancia / 2 em cada eixo sempre ficam no mesmo grupo;
+    pontos de um mesmo grupo estão ligados por uma cadeia de vizinhos a menos
+    de `tolerancia` em cada eixo.
+
+    Returns:
+        Array com o índice do grupo (0..g-1) de cada ponto
+    """
+    n = len(x)
+    rotulos = np.arange(n)
+    if n == 0:
+        return rotulos
+    chaves = []
+    for dx, dy in _GRADES:
+        cx = np.floor(x / tolerancia + dx).astype(np.int64)
+        cy = np.floor(y / tolerancia + dy).astype(np.int64)
+        chave = (cx << 32) ^ (cy & 0xFFFFFFFF)
+        ordem = np.argsort(chave, kind='stable')
+        ordenada = chave[ordem]
+        inicios = np.flatnonzero(np.r_[True, ordenada[1:] != ordenada[:-1]])
+        # Grades sem nenhuma célula com mais de um ponto não unem nada
+        if len(inicios) < n:
+            chaves.append((ordem, inicios, np.diff(np.r_[inicios, n])))
+
+    # Propagação do menor rótulo por célula, em todas as grades, até estabilizar
+    while chaves:
+        anterior = rotulos
+        for ordem, inicios, tamanhos in chaves:
+            minimos = np.minimum.reduceat(rotulos[ordem], inicios)
+            rotulos = rotulos.copy()
+            rotulos[ordem] = np.repeat(minimos, tamanhos)
+            rotulos = rotulos[rotulos]
+        if np.array_equal(rotulos, anterior):
+            break
+    return np.unique(rotulos, return_inverse=True)[1]
+
+
+def connected_components(origem: np.ndarray, destino: np.ndarray, vertices: int) -> np.ndarray:
+    """
+    Componentes conexas de um grafo não direcionado por enganche de raízes ao
+    menor rótulo e compressão de caminhos (Shiloach-Vishkin), vetorizado.
+
+    Returns:
+        Rótulo da componente de cada vértice
+    """
+    componente = np.arange(vertices)
+    if len(origem) == 0:
+        return componente
+    while True:
+        ca, cb = componente[origem], componente[destino]
+        diferentes = ca != cb
+        if not diferentes.any():
+            return componente
+        ca, cb = ca[diferentes], cb[diferentes]
+        menor = np.minimum(ca, cb)
+        np.minimum.at(componente, ca, menor)
+        np.minimum.at(componente, cb, menor)
+        while True:
+            saltos = componente[componente]
+            if np.array_equal(saltos, componente):
+                break
+            componente = saltos
+
+
+def build_contours(extremos: np.ndarray, tolerancia: float = CONTOUR_TOLERANCE) -> Tuple[ContourStats, np.ndarray]:
+    """
+    Monta os contornos a partir das extremidades das entidades abertas.
+
+    Args:
+        extremos: Array (n, 4) com x1, y1, x2, y2 de cada entidade
+        tolerancia: Distância (mm) até a qual extremidades são unidas
+
+    Returns:
+        Tupla (ContourStats, rótulo do contorno de cada entidade). O ponto de
+        perfuração de um contorno fechado é um de seus vértices; os de uma
+        componente aberta são metade de seus vértices de grau ímpar (as
+        pontas de onde partem as cadeias).
+    """
+    n = len(extremos)
+    if n == 0:
+        return ContourStats(), np.empty(0, dtype=np.int64)
+    x = np.concatenate([extremos[:, 0], extremos[:, 2]])
+    y = np.concatenate([extremos[:, 1], extremos[:, 3]])
+    vertice = merge_points(x, y, tolerancia)
+    total_vertices = int(vertice.max()) + 1
+    origem, destino = vertice[:n], vertice[n:]
+
+    componente = connected_components(origem, destino, total_vertices)
+    grau = np.bincount(vertice, minlength=total_vertices)
+    impares = np.bincount(componente[grau % 2 == 1], minlength=total_vertices)
+    raizes = np.unique(componente[origem])
+
+    fechados = int(np.count_nonzero(impares[raizes] == 0))
+    abertos = int(impares[raizes].sum() // 2)
+
+    # Coordenadas de cada vértice: as da sua primeira extremidade
+    primeira = np.empty(total_vertices, dtype=np.int64)
+    primeira[vertice[::-1]] = np.arange(2 * n - 1, -1, -1)
+    # O rótulo de uma componente é o seu menor vértice
+    raizes_fechadas = raizes[impares[raizes] == 0]
+    pontas = np.flatnonzero(grau % 2 == 1)
+    pontas = pontas[np.argsort(componente[pontas], kind='stable')][::2]
+    perfuracoes = primeira[np.concatenate([raizes_fechadas, pontas])]
+    pontos = np.column_stack([x[perfuracoes], y[perfuracoes]])
+    return ContourStats(fechados, abertos, pontos), componente[origem]
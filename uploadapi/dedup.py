@@ -0,0 +1,156 @@
+"""
+Remoção de geometria duplicada ou sobreposta antes da soma do perímetro.
+
+Exportações de CAD costumam repetir a mesma LINE, ou trazer arcos e círculos
+sobrepostos; somá-los todos infla o perímetro e o tempo de corte. Cada
+segmento é reduzido à reta que o contém, quantizada em uma grade (ângulo,
+distância à origem), e cada arco ao círculo que o contém (centro e raio
+quantizados). Dentro de cada grupo os intervalos (posição ao longo da reta ou
+ângulo no círculo) são unidos, e o comprimento que sobra da união é o
+comprimento removido.
+
+Tudo é vetorizado com NumPy; o custo é dominado pela ordenação das chaves.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+# Tolerância padrão (mm) para considerar duas entidades sobre a mesma reta ou círculo
+DEDUP_TOLERANCE = 0.01
+
+# Quantum angular das retas em radianos por mm de tolerância: com 0,01 mm,
+# retas que divergem menos de 0,01 mm a cada metro caem no mesmo grupo
+_ANGULO_POR_TOLERANCIA = 1e-3
+
+
+def interval_union(grupo: np.ndarray, inicio: np.ndarray, fim: np.ndarray,
+                   folga: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    União dos intervalos [inicio, fim] de cada grupo.
+
+    Intervalos que apenas se tocam (sobreposição menor que `folga`) não são
+    unidos, para não apagar o vértice compartilhado por duas entidades
+    consecutivas.
+
+    Args:
+        grupo: Grupo de cada intervalo (inteiros)
+        inicio, fim: Extremos de cada intervalo (inicio <= fim)
+        folga: Sobreposição mínima para unir, por intervalo
+
+    Returns:
+        Tupla (ordem, início da corrida de cada intervalo ordenado, início e
+        fim de cada corrida), em que ordem é a permutação que ordena os
+        intervalos por (grupo, inicio)
+    """
+    ordem = np.lexsort((inicio, grupo))
+    g, s, e, f = grupo[ordem], inicio[ordem], fim[ordem], folga[ordem]
+    novo_grupo = np.r_[True, g[1:] != g[:-1]]
+    # Máximo acumulado do fim dentro de cada grupo: um deslocamento crescente
+    # por grupo impede que o máximo de um grupo passe para o seguinte
+    base = s.min()
+    deslocamento = np.cumsum(novo_grupo) * (e.max() - base + 1.0)
+    maximo = np.maximum.accumulate(e - base + deslocamento) - deslocamento + base
+    anterior = np.r_[-np.inf, maximo[:-1]]
+    nova_corrida = novo_grupo | (s > anterior - f)
+    inicios = np.flatnonzero(nova_corrida)
+    fins = np.r_[inicios[1:], len(s)] - 1
+    return ordem, nova_corrida, s[inicios], maximo[fins]
+
+
+def merge_segments(segmentos: np.ndarray, tolerancia: float = DEDUP_TOLERANCE) -> Tuple[np.ndarray, float]:
+    """
+    Une segmentos repetidos ou sobrepostos sobre a mesma reta.
+
+    Args:
+        segmentos: Array (n, 4) com x1, y1, x2, y2
+        tolerancia: Distância (mm) entre retas consideradas a mesma
+
+    Returns:
+        Tupla (array (m, 4) de segmentos sem sobreposição, comprimento removido
+        em mm). Segmentos sem sobreposição são devolvidos inalterados.
+    """
+    n = len(segmentos)
+    if n < 2:
+        return segmentos, 0.0
+    x1, y1, x2, y2 = segmentos.T
+    dx, dy = x2 - x1, y2 - y1
+    comprimento = np.hypot(dx, dy)
+    # Sentido canônico (dx > 0, ou vertical para cima): a mesma reta tem o mesmo ângulo
+    sentido = np.where((dx < 0) | ((dx == 0) & (dy < 0)), -1.0, 1.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ux, uy = sentido * dx / comprimento, sentido * dy / comprimento
+    ux, uy = np.nan_to_num(ux, nan=1.0), np.nan_to_num(uy)
+    rho = ux * y1 - uy * x1
+    t1, t2 = ux * x1 + uy * y1, ux * x2 + uy * y2
+    chave = np.column_stack([np.round(np.arctan2(uy, ux) / (tolerancia * _ANGULO_POR_TOLERANCIA)),
+                             np.round(rho / tolerancia)]).astype(np.int64)
+    grupo = np.unique(chave, axis=0, return_inverse=True)[1].ravel()
+
+    ordem, nova_corrida, inicio, fim = interval_union(
+        grupo, np.minimum(t1, t2), np.maximum(t1, t2), np.full(n, tolerancia))
+    corrida = np.cumsum(nova_corrida) - 1
+    tamanhos = np.bincount(corrida)
+    removido = float(comprimento.sum() - (fim - inicio).sum())
+    if len(tamanhos) == n:
+        return segmentos, 0.0
+
+    # Corridas de um único segmento ficam como estavam; as demais são
+    # reconstruídas sobre a reta do primeiro segmento da corrida
+    primeiro = ordem[np.flatnonzero(nova_corrida)]
+    unidas = tamanhos > 1
+    k = primeiro[unidas]
+    a, b = inicio[unidas], fim[unidas]
+    reconstruidos = np.column_stack([a * ux[k] - rho[k] * uy[k], a * uy[k] + rho[k] * ux[k],
+                                     b * ux[k] - rho[k] * uy[k], b * uy[k] + rho[k] * ux[k]])
+    return np.concatenate([segmentos[primeiro[~unidas]], reconstruidos]), removido
+
+
+def merge_arcs(arcos: np.ndarray, tolerancia: float = DEDUP_TOLERANCE) -> Tuple[np.ndarray, float]:
+    """
+    Une arcos e círculos repetidos ou sobrepostos sobre o mesmo círculo.
+
+    Args:
+        arcos: Array (n, 5) com centro x, y, raio, ângulo inicial e abertura
+            (radianos, anti-horário); círculos têm abertura 2π
+        tolerancia: Distância (mm) entre centros e raios considerados iguais
+
+    Returns:
+        Tupla (array (m, 5) de arcos sem sobreposição, comprimento removido em
+        mm). Arcos sem sobreposição são devolvidos inalterados; uniões que
+        cobrem o círculo inteiro têm abertura 2π.
+    """
+    n = len(arcos)
+    if n < 2:
+        return arcos, 0.0
+    cx, cy, raio, angulo, abertura = arcos.T
+    chave = np.round(arcos[:, :3] / tolerancia).astype(np.int64)
+    grupo = np.unique(chave, axis=0, return_inverse=True)[1].ravel()
+    if len(np.unique(grupo)) == n:
+        return arcos, 0.0
+
+    # Ângulos em [0, 2π); arcos que passam de 2π são divididos em dois intervalos
+    inicio = np.mod(angulo, math.tau)
+    fim = inicio + abertura
+    volta = fim > math.tau
+    indice = np.r_[np.arange(n), np.flatnonzero(volta)]
+    inicio_i = np.r_[inicio, np.zeros(volta.sum())]
+    fim_i = np.r_[np.minimum(fim, math.tau), fim[volta] - math.tau]
+    with np.errstate(divide='ignore'):
+        folga = np.where(raio > 0, tolerancia / raio, 0.0)
+
+    ordem, nova_corrida, a, b = interval_union(grupo[indice], inicio_i, fim_i, folga[indice])
+    primeiro = indice[ordem[np.flatnonzero(nova_corrida)]]
+    removido = float((raio * abertura).sum() - (raio[primeiro] * (b - a)).sum())
+
+    # Grupos sem nenhuma corrida de mais de um intervalo ficam como estavam;
+    # os demais são reconstruídos
+    unidas = np.bincount(np.cumsum(nova_corrida) - 1) > 1
+    grupo_alterado = np.bincount(grupo[primeiro], weights=unidas, minlength=grupo.max() + 1) > 0
+    alterado = grupo_alterado[grupo[primeiro]]
+    intactos = np.flatnonzero(~grupo_alterado[grupo])
+    k = primeiro[alterado]
+    a, b = a[alterado], b[alterado]
+    completo = b - a >= math.tau - folga[k]
+    reconstruidos = np.column_stack([cx[k], cy[k], raio[k], a, np.where(completo, math.tau, b - a)])
+    return np.concatenate([arcos[intactos], reconstruidos]), max(removido, 0.0)
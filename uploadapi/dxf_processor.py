@@ -1,14 +1,72 @@
 import ezdxf
 import io
 import math
-import tempfile
-import os
-from typing import Dict, List, Tuple
+import numpy as np
+from ezdxf.document import Drawing
+from ezdxf.lldxf.tagger import binary_tags_loader
+from ezdxf.tools.codepage import toencoding
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .dxf_scanner import DXFScanError, scan_entities
+from .contours import CONTOUR_TOLERANCE, ContourStats
+from .dedup import DEDUP_TOLERANCE
+from .layer_index import LAYER_PADRAO, LayerSelector, Selecao
+from .travel import MAX_GREEDY_POINTS, estimate_rapid
+from .geometry_kernel import (
+    SPLINE_TOLERANCE, GeometryBatch, ellipse_lengths, ellipse_params, polyline_length, polyline_vertices,
+    spline_vertices,
+)
+
+# Medidas de um conjunto de entidades por layer: layer -> (comprimento, contornos, comprimento duplicado)
+MedidasPorLayer = Dict[str, Tuple[float, ContourStats, float]]
+
+
+def _todas_as_layers(layer: str) -> bool:
+    return True
+
 
 class DXFProcessor:
-    def __init__(self, target_layer: str = "Corte"):
+    # Assinatura que abre todo DXF binário
+    BINARY_DXF_SENTINEL = b"AutoCAD Binary DXF\r\n\x1a\x00"
+    
+    # Valor de layer_utilizada quando nenhuma layer casa com target_layer
+    TODAS_AS_LAYERS = "todas as layers"
+    
+    def __init__(self, target_layer: Selecao = "Corte", fast_scan: bool = False,
+                 spline_tolerance: float = SPLINE_TOLERANCE, contour_tolerance: float = CONTOUR_TOLERANCE,
+                 travel_optimization_seconds: float = 0.0, dedup_tolerance: Optional[float] = DEDUP_TOLERANCE,
+                 travel_max_greedy_points: Optional[int] = MAX_GREEDY_POINTS):
+        """
+        Args:
+            target_layer: Layer(s) de corte: um nome, um padrão glob ("Corte*") ou
+                uma coleção de nomes/padrões. Se nenhuma layer do DXF casar (ou se
+                for None), todas as layers são somadas.
+            fast_scan: Se True, o perímetro de DXFs ASCII é calculado pelo scanner
+                leve (dxf_scanner), sem carregar o documento completo no ezdxf.
+                DXFs binários ou fora do padrão esperado usam o ezdxf.
+            spline_tolerance: Distância máxima (mm) entre um SPLINE e as cordas
+                usadas para medi-lo; valores menores são mais precisos e mais lentos
+            contour_tolerance: Distância (mm) até a qual extremidades de entidades
+                são unidas na reconstrução dos contornos
+            travel_optimization_seconds: Tempo máximo (s) de melhoria 2-opt da
+                ordem dos contornos no cálculo do deslocamento rápido; 0 usa só
+                o percurso do vizinho mais próximo
+            dedup_tolerance: Distância (mm) até a qual LINEs, ARCs e círculos
+                repetidos ou sobrepostos na mesma layer são contados uma única
+                vez; None soma todas as entidades
+            travel_max_greedy_points: Perfurações acima das quais a ordem dos
+                contornos vem da curva de Hilbert em vez do vizinho mais
+                próximo (ver travel); None sempre usa o vizinho mais próximo
+        """
         self.target_layer = target_layer
+        self.fast_scan = fast_scan
+        self.spline_tolerance = spline_tolerance
+        self.contour_tolerance = contour_tolerance
+        self.travel_optimization_seconds = travel_optimization_seconds
+        self.dedup_tolerance = dedup_tolerance
+        self.travel_max_greedy_points = travel_max_greedy_points
         self.cutting_speed_mm_per_second = 50  # Velocidade de corte em mm/s (configurável)
+        self.pierce_time_seconds = 0.5  # Tempo de cada perfuração em segundos (configurável)
+        self.rapid_speed_mm_per_second = 500  # Velocidade de deslocamento rápido em mm/s (configurável)
     
     def process_dxf_files(self, arquivos_extraidos: Dict[str, bytes]) -> List[Dict]:
         """
@@ -56,7 +114,7 @@ class DXFProcessor:
                     "arquivo": caminho_arquivo,
                     "perimetro_mm": 0,
                     "tempo_corte_segundos": 0,
-                    "layer_utilizada": "todas as layers",
+                    "layer_utilizada": self.TODAS_AS_LAYERS,
                     "status": f"erro: {str(e)}"
                 }
                 resultados.append(resultado_erro)
@@ -69,27 +127,27 @@ class DXFProcessor:
         Processa um único arquivo DXF, recebendo material e espessura (do PDF),
         retornando o dicionário consolidado para integração PDF+DXF.
         """
-        temp_file_path = None
         try:
             if len(conteudo_bytes) == 0:
                 raise Exception("Arquivo vazio")
-            temp_file_path = tempfile.mktemp(suffix='.dxf')
-            with open(temp_file_path, 'wb') as temp_file:
-                temp_file.write(conteudo_bytes)
-            if not os.path.exists(temp_file_path):
-                raise Exception("Falha ao criar arquivo temporário")
-            doc = ezdxf.readfile(temp_file_path)
-            msp = doc.modelspace()
-            perimetro_mm = self._calculate_perimeter(msp)
+            perimetro_por_layer, contornos, filtrado, duplicado_mm = self._layer_perimeters_from_bytes(conteudo_bytes)
+            perimetro_mm = sum(perimetro_por_layer.values())
             # Converter espessura para float se possível
             try:
                 espessura_float = float(str(espessura).replace('mm','').replace(',','.').strip())
             except Exception:
                 espessura_float = 0.0
-            tempo_corte_segundos = self._estimate_cutting_time(perimetro_mm, str(material), espessura_float)
+            rapid_mm = self._estimate_rapid(contornos)
+            tempo_corte_segundos = self._estimate_cutting_time(perimetro_mm, str(material), espessura_float,
+                                                               contornos.perfuracoes, rapid_mm)
             resultado = {
                 "perimetro_mm": round(perimetro_mm, 2),
-                "tempo_corte_segundos": round(tempo_corte_segundos, 2)
+                "tempo_corte_segundos": round(tempo_corte_segundos, 2),
+                "layer_utilizada": self._layer_description(perimetro_por_layer, filtrado),
+                "perimetro_por_layer": self._round_layers(perimetro_por_layer),
+                **self._contour_fields(contornos),
+                **self._travel_fields(rapid_mm),
+                "comprimento_duplicado_mm": round(duplicado_mm, 2)
             }
             return resultado
         except Exception as e:
@@ -98,12 +156,6 @@ class DXFProcessor:
                 "tempo_corte_segundos": 0,
                 "erro": str(e)
             }
-        finally:
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
     
     def _process_single_dxf(self, caminho_arquivo: str, conteudo_bytes: bytes) -> Dict:
         """
@@ -116,36 +168,29 @@ class DXFProcessor:
         Returns:
             Dicionário com informações do arquivo processado
         """
-        temp_file_path = None
         try:
             # Verificar se o conteúdo não está vazio
             if len(conteudo_bytes) == 0:
                 raise Exception("Arquivo vazio")
             
-            # Criar arquivo temporário para o ezdxf
-            temp_file_path = tempfile.mktemp(suffix='.dxf')
-            with open(temp_file_path, 'wb') as temp_file:
-                temp_file.write(conteudo_bytes)
-            
-            # Verificar se o arquivo foi criado corretamente
-            if not os.path.exists(temp_file_path):
-                raise Exception("Falha ao criar arquivo temporário")
-            
-            # Carregar o arquivo DXF usando ezdxf
-            doc = ezdxf.readfile(temp_file_path)
-            msp = doc.modelspace()
-            
-            # Calcular perímetro
-            perimetro_mm = self._calculate_perimeter(msp)
+            # Calcular perímetro direto dos bytes extraídos, por layer
+            perimetro_por_layer, contornos, filtrado, duplicado_mm = self._layer_perimeters_from_bytes(conteudo_bytes)
+            perimetro_mm = sum(perimetro_por_layer.values())
             
             # Estimar tempo de corte (sem dados de material/espessura por enquanto)
-            tempo_corte_segundos = self._estimate_cutting_time(perimetro_mm)
+            rapid_mm = self._estimate_rapid(contornos)
+            tempo_corte_segundos = self._estimate_cutting_time(perimetro_mm, perfuracoes=contornos.perfuracoes,
+                                                               rapid_mm=rapid_mm)
             
             resultado = {
                 "arquivo": caminho_arquivo,
                 "perimetro_mm": round(perimetro_mm, 2),
                 "tempo_corte_segundos": round(tempo_corte_segundos, 2),
-                "layer_utilizada": "todas as layers",
+                "layer_utilizada": self._layer_description(perimetro_por_layer, filtrado),
+                "perimetro_por_layer": self._round_layers(perimetro_por_layer),
+                **self._contour_fields(contornos),
+                **self._travel_fields(rapid_mm),
+                "comprimento_duplicado_mm": round(duplicado_mm, 2),
                 "status": "processado"
             }
             
@@ -156,37 +201,288 @@ class DXFProcessor:
                 "arquivo": caminho_arquivo,
                 "perimetro_mm": 0,
                 "tempo_corte_segundos": 0,
-                "layer_utilizada": "todas as layers",
+                "layer_utilizada": self.TODAS_AS_LAYERS,
                 "status": f"erro: {str(e)}"
             }
             return resultado_erro
-        finally:
-            # Limpar arquivo temporário
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
+    
+    def _perimeter_from_bytes(self, conteudo_bytes: bytes) -> float:
+        """
+        Calcula o perímetro de corte (layers de target_layer) de um DXF em bytes.
+        
+        Args:
+            conteudo_bytes: Conteúdo do arquivo em bytes
+        
+        Returns:
+            Perímetro total em milímetros
+        """
+        perimetro_por_layer = self._layer_perimeters_from_bytes(conteudo_bytes)[0]
+        return sum(perimetro_por_layer.values())
+    
+    def _layer_perimeters_from_bytes(self, conteudo_bytes: bytes) -> Tuple[Dict[str, float], ContourStats, bool, float]:
+        """
+        Calcula o perímetro por layer do model space de um DXF em bytes, pelo
+        scanner leve quando fast_scan está ativo ou pelo documento completo do ezdxf.
+        
+        Args:
+            conteudo_bytes: Conteúdo do arquivo em bytes
+        
+        Returns:
+            Tupla (perímetro por layer, contornos, se target_layer casou com
+            alguma layer, comprimento duplicado); ver _calculate_layer_perimeters
+        """
+        if self.fast_scan and not conteudo_bytes.startswith(self.BINARY_DXF_SENTINEL):
+            encoding = self._detect_encoding(conteudo_bytes)
+            try:
+                # Cada passada relê os bytes: as entidades não ficam guardadas
+                return self._calculate_layer_perimeters(
+                    scan_entities(io.BytesIO(conteudo_bytes), encoding),
+                    reabrir=lambda: scan_entities(io.BytesIO(conteudo_bytes), encoding))
+            except DXFScanError:
+                # Estrutura não suportada pelo scanner: carregar com o ezdxf
+                pass
+        
+        doc = self._load_document(conteudo_bytes)
+        return self._calculate_layer_perimeters(doc.modelspace())
+    
+    def _calculate_layer_perimeters(self, modelspace, layers: Selecao = None,
+                                    reabrir: Optional[Callable[[], Iterable]] = None
+                                    ) -> Tuple[Dict[str, float], ContourStats, bool, float]:
+        """
+        Calcula o perímetro e os contornos das layers selecionadas.
+        
+        O model space é percorrido uma única vez e cada entidade de uma layer
+        selecionada vai direto para o GeometryBatch da sua layer; as entidades
+        não ficam guardadas. As entidades de um bloco contam na própria layer;
+        as da layer "0" herdam a layer do INSERT, como no AutoCAD. Os contornos
+        e a remoção de geometria duplicada (dedup_tolerance) são feitos por layer.
+        Se nenhuma layer casar com a seleção, o model space é percorrido de novo
+        somando todas as layers.
+        
+        Args:
+            modelspace: Espaço do modelo do DXF (ou entidades do scanner)
+            layers: Seleção de layers (nome, glob ou coleção); por padrão target_layer
+            reabrir: Função que devolve as entidades de novo, para a segunda
+                passada quando `modelspace` só pode ser percorrido uma vez
+        
+        Returns:
+            Tupla (perímetro em mm por layer, contornos das layers somadas, True
+            se a seleção casou com alguma layer; False quando nenhuma casou e
+            todas as layers foram somadas; comprimento duplicado em mm,
+            descontado do perímetro)
+        """
+        selecao = self.target_layer if layers is None else layers
+        medidas_blocos: Dict[str, MedidasPorLayer] = {}
+        medidas = self._sum_layers(modelspace, medidas_blocos, LayerSelector(selecao).matches)
+        filtrado = bool(medidas)
+        if not filtrado and selecao is not None:
+            medidas = self._sum_layers(reabrir() if reabrir else modelspace, medidas_blocos, _todas_as_layers)
+        
+        perimetro_por_layer = {}
+        duplicado_mm = 0.0
+        for layer, (comprimento, _, duplicado_layer) in medidas.items():
+            perimetro_por_layer[layer] = comprimento
+            duplicado_mm += duplicado_layer
+        contornos = ContourStats.combine(contornos_layer for _, contornos_layer, _ in medidas.values())
+        return perimetro_por_layer, contornos, filtrado, duplicado_mm
+    
+    def _layer_description(self, perimetro_por_layer: Dict[str, float], filtrado: bool) -> str:
+        """Texto de layer_utilizada: as layers somadas ou "todas as layers"."""
+        if not filtrado:
+            return self.TODAS_AS_LAYERS
+        return ", ".join(perimetro_por_layer)
+    
+    @staticmethod
+    def _contour_fields(contornos: ContourStats) -> Dict[str, int]:
+        return {
+            "contornos_fechados": contornos.fechados,
+            "cadeias_abertas": contornos.abertos,
+            "perfuracoes": contornos.perfuracoes,
+        }
+    
+    def _estimate_rapid(self, contornos: ContourStats) -> float:
+        """
+        Deslocamento rápido (mm) entre as perfurações dos contornos, na ordem do
+        vizinho mais próximo (melhorada por 2-opt se travel_optimization_seconds > 0).
+        """
+        rapid_mm, _ = estimate_rapid(contornos.pontos, orcamento_2opt_s=self.travel_optimization_seconds,
+                                     max_pontos_guloso=self.travel_max_greedy_points)
+        return rapid_mm
+    
+    def _travel_fields(self, rapid_mm: float) -> Dict[str, float]:
+        return {
+            "rapid_mm": round(rapid_mm, 2),
+            "tempo_deslocamento_segundos": round(rapid_mm / self.rapid_speed_mm_per_second, 2),
+        }
+    
+    @staticmethod
+    def _round_layers(perimetro_por_layer: Dict[str, float]) -> Dict[str, float]:
+        return {layer: round(perimetro, 2) for layer, perimetro in perimetro_por_layer.items()}
+    
+    def _load_document(self, conteudo_bytes: bytes) -> Drawing:
+        """
+        Carrega um documento DXF a partir dos bytes, sem arquivo temporário.
+        
+        DXFs binários são reconhecidos pela assinatura inicial. Nos DXFs ASCII a
+        codificação é detectada pelo cabeçalho (ver _detect_encoding) e o
+        conteúdo é decodificado uma única vez, durante o parse.
+        
+        Args:
+            conteudo_bytes: Conteúdo do arquivo em bytes
+        
+        Returns:
+            Documento ezdxf
+        """
+        if conteudo_bytes.startswith(self.BINARY_DXF_SENTINEL):
+            return Drawing.load(binary_tags_loader(conteudo_bytes, errors="surrogateescape"))
+        
+        stream = io.TextIOWrapper(io.BytesIO(conteudo_bytes), encoding=self._detect_encoding(conteudo_bytes), errors="surrogateescape")
+        return ezdxf.read(stream)
+    
+    def _detect_encoding(self, conteudo_bytes: bytes) -> str:
+        """
+        Detecta a codificação de um DXF ASCII pelas variáveis $ACADVER e
+        $DWGCODEPAGE do cabeçalho: R2007 (AC1021) e posteriores são sempre UTF-8,
+        as versões anteriores usam o code page declarado (cp1252 se ausente).
+        
+        Busca apenas as duas variáveis nos bytes do cabeçalho, em vez de
+        tokenizar a seção HEADER inteira como o dxf_stream_info do ezdxf.
+        """
+        fim_cabecalho = conteudo_bytes.find(b"ENDSEC")
+        if fim_cabecalho < 0:
+            fim_cabecalho = len(conteudo_bytes)
+        versao = self._header_var(conteudo_bytes, b"$ACADVER", fim_cabecalho)
+        if versao >= "AC1021":
+            return "utf-8"
+        codepage = self._header_var(conteudo_bytes, b"$DWGCODEPAGE", fim_cabecalho)
+        return toencoding(codepage) if codepage else "cp1252"
+    
+    @staticmethod
+    def _header_var(conteudo_bytes: bytes, nome: bytes, fim_cabecalho: int) -> str:
+        """Retorna o valor textual de uma variável do cabeçalho, ou '' se ausente."""
+        inicio = conteudo_bytes.find(nome, 0, fim_cabecalho)
+        if inicio < 0:
+            return ""
+        # Linhas: nome da variável, código de grupo e valor
+        linhas = conteudo_bytes[inicio:inicio + 256].splitlines()
+        if len(linhas) < 3:
+            return ""
+        return linhas[2].strip().decode("ascii", errors="ignore")
     
     def _calculate_perimeter(self, modelspace) -> float:
         """
         Calcula o perímetro total de todas as entidades (todas as layers).
         
+        LINE, ARC, CIRCLE, ELLIPSE, SPLINE, LWPOLYLINE e POLYLINE são acumulados
+        em um GeometryBatch e somados de forma vetorizada; INSERTs somam o
+        comprimento do bloco, calculado uma única vez por documento; os demais
+        tipos usam o cálculo por entidade de _get_entity_length.
+        
         Args:
             modelspace: Espaço do modelo do DXF
             
         Returns:
             Perímetro total em milímetros
         """
-        perimetro_total = 0.0
+        return self._sum_entities(modelspace, {})[0]
+    
+    def _sum_entities(self, entidades, medidas_blocos: Dict[str, MedidasPorLayer]
+                      ) -> Tuple[float, ContourStats, float]:
+        """
+        Soma o comprimento e monta os contornos de uma sequência de entidades
+        (model space, definição de bloco ou entidades virtuais de um INSERT),
+        em todas as layers.
+        
+        Returns:
+            Tupla (comprimento em milímetros, contornos, comprimento duplicado
+            removido em milímetros); ver _sum_layers
+        """
+        medidas = self._sum_layers(entidades, medidas_blocos, _todas_as_layers).values()
+        perimetro_total = sum(comprimento for comprimento, _, _ in medidas)
+        duplicado_mm = sum(duplicado for _, _, duplicado in medidas)
+        return perimetro_total, ContourStats.combine(contornos for _, contornos, _ in medidas), duplicado_mm
+    
+    def _sum_layers(self, entidades, medidas_blocos: Dict[str, MedidasPorLayer],
+                    selecionada: Callable[[str], bool]) -> MedidasPorLayer:
+        """
+        Soma o comprimento e monta os contornos, por layer, de uma sequência de
+        entidades, consumindo-a uma única vez.
+        
+        Cada entidade de uma layer selecionada é acumulada no GeometryBatch da
+        sua layer e descartada. Um INSERT contribui em cada layer das entidades
+        do bloco; as da layer "0" contam na layer do INSERT. Sobreposições só são
+        detectadas entre entidades da própria sequência; cada INSERT traz o
+        comprimento duplicado dentro do seu bloco.
+        
+        Args:
+            entidades: Entidades do DXF
+            medidas_blocos: Cache nome do bloco -> medidas por layer (com a
+                layer "0" ainda não resolvida), compartilhado por todo o documento
+            selecionada: Indica se uma layer deve ser medida
+        
+        Returns:
+            Dicionário layer -> (comprimento em milímetros, contornos,
+            comprimento duplicado removido em milímetros), na ordem em que as
+            layers selecionadas aparecem
+        """
+        lotes: Dict[str, GeometryBatch] = {}
+        # layer -> [comprimento, contornos de cada INSERT, duplicado] fora do lote; os
+        # contornos são concatenados uma única vez no fim, e não a cada INSERT
+        avulsos: Dict[str, List] = {}
         
-        # Processar diferentes tipos de entidades
-        for entity in modelspace:
-            # Calcular comprimento baseado no tipo de entidade (todas as layers)
-            comprimento = self._get_entity_length(entity)
-            perimetro_total += comprimento
+        def _avulso(layer: str) -> List:
+            if layer not in avulsos:
+                avulsos[layer] = [0.0, [], 0.0]
+                lotes[layer] = GeometryBatch(self.spline_tolerance, self.dedup_tolerance)
+            return avulsos[layer]
         
-        return perimetro_total
+        for entity in entidades:
+            layer = getattr(entity.dxf, 'layer', LAYER_PADRAO)
+            try:
+                entity_type = entity.dxftype()
+                if entity_type == 'INSERT':
+                    for layer_bloco, (comprimento, contornos_bloco, duplicado_bloco) in self._measure_insert(
+                            entity, medidas_blocos).items():
+                        efetiva = layer if layer_bloco == LAYER_PADRAO else layer_bloco
+                        if selecionada(efetiva):
+                            soma = _avulso(efetiva)
+                            soma[0] += comprimento
+                            soma[1].append(contornos_bloco)
+                            soma[2] += duplicado_bloco
+                    continue
+                if not selecionada(layer):
+                    continue
+                soma = _avulso(layer)
+                adicionar = self._ACUMULAR.get(entity_type)
+                if adicionar is not None:
+                    adicionar(lotes[layer], entity)
+                    continue
+            except DXFScanError:
+                # Geometria que o scanner não sabe transformar: recomeçar pelo ezdxf
+                raise
+            except Exception:
+                # Entidade inválida não contribui para o perímetro
+                continue
+            # Outros tipos de entidade
+            soma[0] += self._get_entity_length(entity)
+        
+        return {
+            layer: (comprimento + lotes[layer].total_length(),
+                    ContourStats.combine(contornos + [lotes[layer].contour_stats(self.contour_tolerance)]),
+                    duplicado + lotes[layer].removed_length())
+            for layer, (comprimento, contornos, duplicado) in avulsos.items()
+        }
+    
+    # Tipo de entidade -> método do GeometryBatch que a acumula
+    _ACUMULAR = {
+        'LINE': GeometryBatch.add_line,
+        'ARC': GeometryBatch.add_arc,
+        'CIRCLE': GeometryBatch.add_circle,
+        'ELLIPSE': GeometryBatch.add_ellipse,
+        'SPLINE': GeometryBatch.add_spline,
+        'LWPOLYLINE': GeometryBatch.add_polyline,
+        'POLYLINE': GeometryBatch.add_polyline,
+    }
     
     def _get_entity_length(self, entity) -> float:
         """
@@ -211,6 +507,12 @@ class DXFProcessor:
                 return self._calculate_polyline_length(entity)
             elif entity_type == 'POLYLINE':
                 return self._calculate_polyline_length(entity)
+            elif entity_type == 'ELLIPSE':
+                return self._calculate_ellipse_length(entity)
+            elif entity_type == 'SPLINE':
+                return self._calculate_spline_length(entity)
+            elif entity_type == 'INSERT':
+                return sum(medidas[0] for medidas in self._measure_insert(entity, {}).values())
             else:
                 # Para outros tipos de entidade, tentar calcular como linha
                 return self._calculate_line_length(entity)
@@ -253,30 +555,109 @@ class DXFProcessor:
             return 0.0
     
     def _calculate_polyline_length(self, polyline) -> float:
-        """Calcula o comprimento de uma polylinha."""
+        """Calcula o comprimento de uma polylinha, incluindo arcos (bulge) e o fechamento."""
         try:
-            total_length = 0.0
-            points = list(polyline.get_points())
-            
-            for i in range(len(points) - 1):
-                p1 = points[i]
-                p2 = points[i + 1]
-                
-                # Extrair coordenadas (pode variar dependendo do tipo de polyline)
-                if len(p1) >= 2 and len(p2) >= 2:
-                    x1, y1 = p1[0], p1[1]
-                    x2, y2 = p2[0], p2[1]
-                    
-                    segment_length = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-                    total_length += segment_length
-            
-            return total_length
+            pontos, fechada = polyline_vertices(polyline)
+            return polyline_length(pontos, fechada)
+        except:
+            return 0.0
+    
+    def _calculate_ellipse_length(self, ellipse) -> float:
+        """Calcula o comprimento de uma elipse ou arco de elipse por quadratura."""
+        try:
+            semieixo, razao, inicio, abertura = ellipse_params(ellipse)
+            return float(ellipse_lengths(*(np.array([valor]) for valor in (semieixo, razao, inicio, abertura)))[0])
         except:
             return 0.0
     
-    def _estimate_cutting_time(self, perimetro_mm: float, material: str = None, espessura_mm: float = None) -> float:
+    def _calculate_spline_length(self, spline) -> float:
+        """Calcula o comprimento de um SPLINE achatado com a tolerância configurada."""
+        try:
+            return polyline_length(spline_vertices(spline, self.spline_tolerance))
+        except:
+            return 0.0
+    
+    def _measure_insert(self, insert, medidas_blocos: Dict[str, MedidasPorLayer]) -> MedidasPorLayer:
+        """
+        Calcula o comprimento e os contornos, por layer, de um INSERT (ou
+        MINSERT) a partir das medidas do bloco referenciado.
+        
+        Com escala uniforme em x/y as medidas do bloco são calculadas uma vez e
+        guardadas em medidas_blocos, de modo que cada inserção repetida custa
+        O(1) no comprimento; rotação e translação não alteram o comprimento nem
+        a contagem de contornos, só a posição dos pontos de perfuração, que são
+        transformados para o sistema de quem contém o INSERT. Com escala não
+        uniforme (círculos viram elipses) são medidas as entidades virtuais do
+        INSERT. MINSERTs multiplicam o resultado por linhas x colunas.
+        
+        Args:
+            insert: Entidade INSERT
+            medidas_blocos: Cache nome do bloco -> medidas por layer do documento
+        
+        Returns:
+            Dicionário layer das entidades do bloco -> (comprimento em
+            milímetros, contornos, comprimento duplicado em milímetros); a
+            layer "0" é resolvida por quem contém o INSERT
+        """
+        escala_x = abs(insert.dxf.xscale)
+        escala_y = abs(insert.dxf.yscale)
+        eixo_x, eixo_y, celulas = self._insert_axes(insert)
+        
+        if not math.isclose(escala_x, escala_y):
+            # As entidades virtuais já estão posicionadas (primeira célula)
+            return {
+                layer: (comprimento * len(celulas), contornos.placed((1.0, 0.0), (0.0, 1.0), celulas),
+                        duplicado * len(celulas))
+                for layer, (comprimento, contornos, duplicado) in self._sum_layers(
+                    insert.virtual_entities(), medidas_blocos, _todas_as_layers).items()
+            }
+        
+        nome = insert.dxf.name
+        bloco = insert.block()
+        if nome not in medidas_blocos:
+            # Bloco que se referencia (direta ou indiretamente) contribui 0
+            medidas_blocos[nome] = {}
+            if bloco is not None:
+                medidas_blocos[nome] = self._sum_layers(bloco, medidas_blocos, _todas_as_layers)
+        
+        # O ponto base do bloco vai para o ponto de inserção
+        base = getattr(getattr(getattr(bloco, 'block', None), 'dxf', None), 'base_point', (0.0, 0.0, 0.0))
+        insercao = insert.dxf.insert
+        origem = (insercao[0] - base[0] * eixo_x[0] - base[1] * eixo_y[0],
+                  insercao[1] - base[0] * eixo_x[1] - base[1] * eixo_y[1])
+        return {
+            layer: (comprimento * escala_x * len(celulas), contornos.placed(eixo_x, eixo_y, celulas + origem),
+                    duplicado * escala_x * len(celulas))
+            for layer, (comprimento, contornos, duplicado) in medidas_blocos[nome].items()
+        }
+    
+    @staticmethod
+    def _insert_axes(insert) -> Tuple[Tuple[float, float], Tuple[float, float], np.ndarray]:
+        """
+        Eixos x e y do bloco no sistema de quem contém o INSERT (rotação e
+        escala) e o deslocamento de cada célula de um MINSERT, como no
+        multi_insert() do ezdxf (espaçamentos rotacionados, sem escala).
+        
+        Returns:
+            Tupla (eixo x, eixo y, array (linhas x colunas, 2) de deslocamentos)
+        """
+        rotacao = math.radians(insert.dxf.rotation)
+        cos_r, sen_r = math.cos(rotacao), math.sin(rotacao)
+        escala_x, escala_y = insert.dxf.xscale, insert.dxf.yscale
+        colunas = max(int(getattr(insert.dxf, 'column_count', 1)), 1)
+        linhas = max(int(getattr(insert.dxf, 'row_count', 1)), 1)
+        dx, dy = np.meshgrid(np.arange(colunas) * float(getattr(insert.dxf, 'column_spacing', 0.0)),
+                             np.arange(linhas) * float(getattr(insert.dxf, 'row_spacing', 0.0)))
+        dx, dy = dx.ravel(), dy.ravel()
+        celulas = np.column_stack([dx * cos_r - dy * sen_r, dx * sen_r + dy * cos_r])
+        return (escala_x * cos_r, escala_x * sen_r), (-escala_y * sen_r, escala_y * cos_r), celulas
+    
+    def _estimate_cutting_time(self, perimetro_mm: float, material: str = None, espessura_mm: float = None,
+                               perfuracoes: int = 0, rapid_mm: float = 0.0) -> float:
         """
-        Estima o tempo de corte baseado no perímetro e propriedades do material.
+        Estima o tempo de corte baseado no perímetro, na quantidade de
+        perfurações (uma por contorno) e nas propriedades do material, somando
+        o deslocamento rápido entre contornos (que não depende do material).
         """
         # Garantir tipos corretos
         if material is None:
@@ -285,8 +666,8 @@ class DXFProcessor:
             espessura_mm = 0.0
         material_factor = self._get_material_factor(str(material))
         thickness_factor = self._get_thickness_factor(float(espessura_mm))
-        tempo_base = perimetro_mm / self.cutting_speed_mm_per_second
-        tempo_final = tempo_base * material_factor * thickness_factor
+        tempo_base = perimetro_mm / self.cutting_speed_mm_per_second + perfuracoes * self.pierce_time_seconds
+        tempo_final = tempo_base * material_factor * thickness_factor + rapid_mm / self.rapid_speed_mm_per_second
         return tempo_final
     
     def _get_material_factor(self, material: str) -> float:
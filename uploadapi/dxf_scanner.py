@@ -0,0 +1,356 @@
+"""
+Scanner leve de DXF ASCII para cálculos que só dependem da geometria do model space.
+
+Em vez de construir o documento completo com o ezdxf (tabelas, objetos e banco
+de entidades), percorre o fluxo de pares código de grupo / valor em uma única
+passada e produz apenas as entidades da seção ENTITIES que estão no model space.
+As definições da seção BLOCKS são guardadas para que os INSERTs possam ser
+medidos; o scanner não guarda as entidades do model space: cada uma é produzida
+e pode ser descartada assim que consumida. A memória do cálculo fica por conta
+de quem consome: o DXFProcessor só mantém, em arrays compactos, as coordenadas
+das entidades das layers selecionadas, então as demais layers não ocupam
+memória, mas a geometria selecionada cresce com o arquivo.
+
+As entidades produzidas expõem o subconjunto da API do ezdxf usado pelo
+DXFProcessor (dxftype(), atributos em .dxf, get_points() do LWPOLYLINE,
+points() do POLYLINE, flattening() do SPLINE e block() do INSERT), de modo que
+os mesmos cálculos servem aos dois caminhos.
+"""
+import math
+from types import SimpleNamespace
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from ezdxf.math import BSpline, Vec3, fit_points_to_cad_cv
+
+
+class DXFScanError(Exception):
+    """DXF fora da estrutura esperada pelo scanner; use o ezdxf nesses casos."""
+
+
+# Atributos padrão do ezdxf para as entidades que o scanner interpreta
+_PADROES = {
+    'LINE': lambda: {'start': (0.0, 0.0, 0.0), 'end': (0.0, 0.0, 0.0)},
+    'ARC': lambda: {'center': (0.0, 0.0, 0.0), 'radius': 1.0, 'start_angle': 0.0, 'end_angle': 360.0,
+                    'extrusion': (0.0, 0.0, 1.0)},
+    'CIRCLE': lambda: {'center': (0.0, 0.0, 0.0), 'radius': 1.0, 'extrusion': (0.0, 0.0, 1.0)},
+    'ELLIPSE': lambda: {'center': (0.0, 0.0, 0.0), 'major_axis': (1.0, 0.0, 0.0), 'ratio': 1.0,
+                        'start_param': 0.0, 'end_param': math.tau, 'extrusion': (0.0, 0.0, 1.0)},
+    'SPLINE': lambda: {'flags': 0, 'degree': 3},
+    'INSERT': lambda: {'name': '', 'insert': (0.0, 0.0, 0.0), 'xscale': 1.0, 'yscale': 1.0, 'zscale': 1.0,
+                       'rotation': 0.0, 'column_count': 1, 'row_count': 1, 'column_spacing': 0.0,
+                       'row_spacing': 0.0},
+    'BLOCK': lambda: {'name': '', 'base_point': (0.0, 0.0, 0.0)},
+    'LWPOLYLINE': lambda: {'flags': 0, 'const_width': 0.0, 'extrusion': (0.0, 0.0, 1.0)},
+    'POLYLINE': lambda: {'flags': 0, 'extrusion': (0.0, 0.0, 1.0)},
+    'VERTEX': lambda: {'location': (0.0, 0.0, 0.0), 'bulge': 0.0, 'flags': 0},
+}
+
+# Vetor de extrusão (210/220/230): define o OCS de ARC, CIRCLE e polilinhas 2D
+_EXTRUSAO = {210: ('extrusion', 0), 220: ('extrusion', 1), 230: ('extrusion', 2)}
+
+# Código de grupo -> (atributo, índice da coordenada ou None para escalares)
+_CODIGOS = {
+    'LINE': {10: ('start', 0), 20: ('start', 1), 30: ('start', 2), 11: ('end', 0), 21: ('end', 1), 31: ('end', 2)},
+    'ARC': {10: ('center', 0), 20: ('center', 1), 30: ('center', 2), 40: ('radius', None),
+            50: ('start_angle', None), 51: ('end_angle', None), **_EXTRUSAO},
+    'CIRCLE': {10: ('center', 0), 20: ('center', 1), 30: ('center', 2), 40: ('radius', None), **_EXTRUSAO},
+    'ELLIPSE': {10: ('center', 0), 20: ('center', 1), 30: ('center', 2), 11: ('major_axis', 0),
+                21: ('major_axis', 1), 31: ('major_axis', 2), 40: ('ratio', None),
+                41: ('start_param', None), 42: ('end_param', None), **_EXTRUSAO},
+    'INSERT': {2: ('name', None), 10: ('insert', 0), 20: ('insert', 1), 30: ('insert', 2), 41: ('xscale', None),
+               42: ('yscale', None), 43: ('zscale', None), 50: ('rotation', None), 70: ('column_count', None),
+               71: ('row_count', None), 44: ('column_spacing', None), 45: ('row_spacing', None)},
+    'BLOCK': {2: ('name', None), 10: ('base_point', 0), 20: ('base_point', 1), 30: ('base_point', 2)},
+    'POLYLINE': {70: ('flags', None), **_EXTRUSAO},
+    'VERTEX': {10: ('location', 0), 20: ('location', 1), 30: ('location', 2), 42: ('bulge', None), 70: ('flags', None)},
+}
+
+_INTEIROS = {'flags', 'degree', 'column_count', 'row_count'}
+_TEXTOS = {'name'}
+
+
+class ScannedBlock(list):
+    """Entidades de uma definição de bloco; .block é a entidade BLOCK (ponto base), como no BlockLayout do ezdxf."""
+
+    def __init__(self, block: 'ScannedEntity'):
+        super().__init__()
+        self.block = block
+
+
+class ScannedEntity:
+    """Entidade lida pelo scanner, com a interface mínima do ezdxf."""
+
+    __slots__ = ('_tipo', 'dxf', '_pontos', 'vertices', '_spline', '_blocos')
+
+    def __init__(self, tipo: str, atributos: dict, blocos: Optional[Dict[str, ScannedBlock]] = None):
+        self._tipo = tipo
+        self.dxf = SimpleNamespace(**atributos)
+        self._pontos: List[List[float]] = []
+        self.vertices: List['ScannedEntity'] = []
+        # SPLINE: pontos de ajuste, nós e pesos (os pontos de controle ficam em _pontos)
+        self._spline = {'ajuste': [], 'nos': [], 'pesos': []} if tipo == 'SPLINE' else None
+        # INSERT: definições de bloco do documento, por nome
+        self._blocos = blocos
+
+    def dxftype(self) -> str:
+        return self._tipo
+
+    @property
+    def closed(self) -> bool:
+        """LWPOLYLINE fechado (bit 1 de flags)."""
+        return bool(getattr(self.dxf, 'flags', 0) & 1)
+
+    @property
+    def is_closed(self) -> bool:
+        """POLYLINE fechado (bit 1 de flags)."""
+        return self.closed
+
+    def get_points(self, format: str = 'xyseb') -> List[tuple]:
+        """Vértices do LWPOLYLINE no formato do ezdxf (x, y, largura inicial, largura final, bulge)."""
+        if self._tipo != 'LWPOLYLINE':
+            raise AttributeError('get_points')
+        if format == 'xyseb':
+            return [tuple(ponto) for ponto in self._pontos]
+        indices = ['xyseb'.index(letra) for letra in format]
+        return [tuple(ponto[i] for i in indices) for ponto in self._pontos]
+
+    def points(self) -> Iterator[tuple]:
+        """Localização dos vértices do POLYLINE."""
+        if self._tipo != 'POLYLINE':
+            raise AttributeError('points')
+        return (vertex.dxf.location for vertex in self.vertices)
+
+    def flattening(self, distance: float, segments: int = 4) -> Iterator[Vec3]:
+        """Achatamento adaptativo do SPLINE, com a mesma construção do Spline.flattening() do ezdxf."""
+        if self._tipo != 'SPLINE':
+            raise AttributeError('flattening')
+        if self._pontos:
+            curva = BSpline(
+                control_points=self._pontos,
+                order=self.dxf.degree + 1,
+                knots=self._spline['nos'] or None,
+                weights=self._spline['pesos'] or None,
+            )
+        elif self._spline['ajuste']:
+            tangentes = None
+            if hasattr(self.dxf, 'start_tangent') and hasattr(self.dxf, 'end_tangent'):
+                tangentes = [self.dxf.start_tangent, self.dxf.end_tangent]
+            curva = fit_points_to_cad_cv(self._spline['ajuste'], tangents=tangentes)
+        else:
+            raise ValueError("SPLINE sem pontos de controle ou de ajuste")
+        return curva.flattening(distance, segments)
+
+    def block(self) -> Optional[ScannedBlock]:
+        """Entidades da definição de bloco referenciada pelo INSERT (None se não existir)."""
+        if self._tipo != 'INSERT':
+            raise AttributeError('block')
+        return self._blocos.get(self.dxf.name) if self._blocos is not None else None
+
+    def virtual_entities(self):
+        """Transformar a geometria do bloco (escala não uniforme) exige o ezdxf."""
+        raise DXFScanError("INSERT com escala não uniforme não é suportado pelo scanner")
+
+    def __repr__(self) -> str:
+        return f"ScannedEntity({self._tipo!r}, layer={self.dxf.layer!r})"
+
+
+def iter_group_codes(stream: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """
+    Lê pares (código de grupo, valor) de um DXF ASCII, sem decodificar os valores.
+
+    Args:
+        stream: Stream binário posicionado no início do DXF
+
+    Yields:
+        Tupla (código, valor sem o fim de linha)
+    """
+    readline = stream.readline
+    while True:
+        codigo = readline()
+        if not codigo:
+            return
+        valor = readline()
+        if not valor:
+            raise DXFScanError("Fim de arquivo inesperado após código de grupo")
+        try:
+            yield int(codigo), valor.rstrip(b'\r\n')
+        except ValueError:
+            raise DXFScanError(f"Código de grupo inválido: {codigo.strip()[:20]!r}")
+
+
+def scan_entities(stream: BinaryIO, encoding: str = 'cp1252') -> Iterator[ScannedEntity]:
+    """
+    Produz as entidades do model space contidas na seção ENTITIES de um DXF ASCII.
+
+    LINE, ARC, CIRCLE, ELLIPSE, SPLINE, LWPOLYLINE, POLYLINE (com seus VERTEX) e
+    INSERT trazem a geometria; as demais entidades trazem apenas o tipo e a layer.
+    Entidades do paper space (código 67 = 1) são descartadas, como no
+    modelspace() do ezdxf. As definições da seção BLOCKS ficam acessíveis pelo
+    block() de cada INSERT.
+
+    Args:
+        stream: Stream binário posicionado no início do DXF
+        encoding: Codificação dos textos (nomes de layer e de bloco)
+
+    Yields:
+        ScannedEntity de cada entidade do model space
+    """
+    pares = iter_group_codes(stream)
+    blocos: Dict[str, ScannedBlock] = {}
+
+    anterior = None
+    for codigo, valor in pares:
+        if not (codigo == 2 and anterior == (0, b'SECTION')):
+            anterior = (codigo, valor.strip())
+            continue
+        anterior = None
+        secao = valor.strip()
+        if secao == b'BLOCKS':
+            _ler_blocos(_ler_secao(pares, encoding, blocos, 'BLOCKS'), blocos)
+        elif secao == b'ENTITIES':
+            for entity in _ler_secao(pares, encoding, blocos, 'ENTITIES'):
+                if not entity.dxf.paperspace:
+                    yield entity
+            return
+
+
+def _ler_blocos(entidades: Iterator[ScannedEntity], blocos: Dict[str, ScannedBlock]):
+    """Agrupa as entidades da seção BLOCKS pela definição (BLOCK ... ENDBLK) a que pertencem."""
+    bloco: Optional[ScannedBlock] = None
+    for entity in entidades:
+        if entity._tipo == 'BLOCK':
+            bloco = blocos[entity.dxf.name] = ScannedBlock(entity)
+        elif entity._tipo == 'ENDBLK':
+            bloco = None
+        elif bloco is not None:
+            bloco.append(entity)
+
+
+def _ler_secao(pares: Iterator[Tuple[int, bytes]], encoding: str, blocos: Dict[str, ScannedBlock],
+               nome: str) -> Iterator[ScannedEntity]:
+    """
+    Produz as entidades de uma seção até o ENDSEC, juntando os VERTEX ao seu
+    POLYLINE. O código 67 é guardado em dxf.paperspace.
+    """
+    polyline: Optional[ScannedEntity] = None
+    atual: Optional[ScannedEntity] = None
+
+    for codigo, valor in pares:
+        if codigo == 0:
+            # Entidade anterior concluída
+            if atual is not None:
+                if atual._tipo == 'VERTEX':
+                    if polyline is not None:
+                        polyline.vertices.append(atual)
+                elif atual._tipo == 'POLYLINE':
+                    polyline = atual
+                else:
+                    yield atual
+
+            tipo = valor.strip().decode('ascii', errors='replace')
+            if tipo == 'SEQEND':
+                if polyline is not None:
+                    yield polyline
+                polyline = None
+                atual = None
+                continue
+            if tipo == 'ENDSEC':
+                if polyline is not None:
+                    yield polyline
+                return
+            if tipo == 'EOF':
+                raise DXFScanError(f"Seção {nome} sem ENDSEC")
+
+            if polyline is not None and tipo != 'VERTEX':
+                # POLYLINE sem SEQEND: encerrar com os vértices lidos
+                yield polyline
+                polyline = None
+
+            padrao = _PADROES.get(tipo)
+            atributos = padrao() if padrao else {}
+            atributos['layer'] = '0'
+            atributos['paperspace'] = 0
+            atual = ScannedEntity(tipo, atributos, blocos if tipo == 'INSERT' else None)
+            codigos = _CODIGOS.get(tipo, {})
+            continue
+
+        if atual is None:
+            continue
+        try:
+            if codigo == 8:
+                atual.dxf.layer = valor.strip().decode(encoding, errors='replace')
+            elif codigo == 67:
+                atual.dxf.paperspace = int(valor)
+            elif atual._tipo == 'LWPOLYLINE':
+                _lwpolyline_tag(atual, codigo, valor)
+            elif atual._tipo == 'SPLINE':
+                _spline_tag(atual, codigo, valor)
+            elif codigo in codigos:
+                atributo, indice = codigos[codigo]
+                if atributo in _TEXTOS:
+                    setattr(atual.dxf, atributo, valor.strip().decode(encoding, errors='replace'))
+                elif indice is None:
+                    setattr(atual.dxf, atributo, int(valor) if atributo in _INTEIROS else float(valor))
+                else:
+                    coordenadas = list(getattr(atual.dxf, atributo))
+                    coordenadas[indice] = float(valor)
+                    setattr(atual.dxf, atributo, tuple(coordenadas))
+        except ValueError:
+            raise DXFScanError(f"Valor inválido para o código {codigo} em {atual._tipo}: {valor[:20]!r}")
+
+    raise DXFScanError(f"Seção {nome} sem ENDSEC")
+
+
+# Código de grupo -> posição no vértice (x, y, largura inicial, largura final, bulge)
+_LWPOLYLINE_INDICES = {20: 1, 40: 2, 41: 3, 42: 4}
+
+
+def _lwpolyline_tag(entity: ScannedEntity, codigo: int, valor: bytes):
+    """Acumula um código de grupo de LWPOLYLINE (vértices repetidos por 10/20/40/41/42)."""
+    pontos = entity._pontos
+    if codigo == 10:
+        largura = entity.dxf.const_width
+        pontos.append([float(valor), 0.0, largura, largura, 0.0])
+    elif codigo in _LWPOLYLINE_INDICES and pontos:
+        pontos[-1][_LWPOLYLINE_INDICES[codigo]] = float(valor)
+    elif codigo == 70:
+        entity.dxf.flags = int(valor)
+    elif codigo == 43:
+        entity.dxf.const_width = float(valor)
+    elif codigo in _EXTRUSAO:
+        extrusao = list(entity.dxf.extrusion)
+        extrusao[_EXTRUSAO[codigo][1]] = float(valor)
+        entity.dxf.extrusion = tuple(extrusao)
+
+
+# Código de grupo -> (lista de pontos do SPLINE, índice da coordenada)
+_SPLINE_PONTOS = {
+    10: ('controle', 0), 20: ('controle', 1), 30: ('controle', 2),
+    11: ('ajuste', 0), 21: ('ajuste', 1), 31: ('ajuste', 2),
+}
+_SPLINE_TANGENTES = {12: 'start_tangent', 22: 'start_tangent', 32: 'start_tangent',
+                     13: 'end_tangent', 23: 'end_tangent', 33: 'end_tangent'}
+
+
+def _spline_tag(entity: ScannedEntity, codigo: int, valor: bytes):
+    """Acumula um código de grupo de SPLINE (nós, pesos, pontos de controle e de ajuste)."""
+    if codigo in _SPLINE_PONTOS:
+        lista, indice = _SPLINE_PONTOS[codigo]
+        pontos = entity._pontos if lista == 'controle' else entity._spline['ajuste']
+        if indice == 0:
+            pontos.append([float(valor), 0.0, 0.0])
+        elif pontos:
+            pontos[-1][indice] = float(valor)
+    elif codigo == 40:
+        entity._spline['nos'].append(float(valor))
+    elif codigo == 41:
+        entity._spline['pesos'].append(float(valor))
+    elif codigo in _SPLINE_TANGENTES:
+        atributo = _SPLINE_TANGENTES[codigo]
+        tangente = list(getattr(entity.dxf, atributo, (0.0, 0.0, 0.0)))
+        tangente[codigo // 10 - 1] = float(valor)
+        setattr(entity.dxf, atributo, tuple(tangente))
+    elif codigo == 70:
+        entity.dxf.flags = int(valor)
+    elif codigo == 71:
+        entity.dxf.degree = int(valor)
@@ -0,0 +1,346 @@
+"""
+Kernel vetorizado de comprimentos para as entidades de corte de um DXF.
+
+As entidades são acumuladas em arrays float64 contíguos por tipo (segmentos de
+LINE, arcos, círculos, elipses e vértices de polilinhas com seus bulges) e os
+comprimentos são calculados de uma vez com NumPy, em vez de um laço Python por
+entidade e por segmento.
+
+Bulges e arcos têm fórmula fechada; arcos de elipse usam quadratura de
+Gauss-Legendre e SPLINEs são achatadas adaptativamente com a tolerância
+escolhida pelo chamador.
+
+O lote também guarda as extremidades das entidades abertas e um ponto de
+perfuração de cada entidade fechada, para a reconstrução de contornos
+(uploadapi.contours). LINEs, ARCs e círculos repetidos ou sobrepostos podem ser
+unidos antes da soma (uploadapi.dedup).
+"""
+import math
+from array import array
+from typing import List, Optional, Tuple
+
+import numpy as np
+from ezdxf.math import ellipse_param_span
+
+from .contours import CONTOUR_TOLERANCE, ContourStats, build_contours
+from .dedup import merge_arcs, merge_segments
+
+# Flags do POLYLINE (código 70) e do VERTEX
+_POLYLINE_MALHA = 16 | 64  # polygon mesh / polyface mesh: não são contornos de corte
+_VERTEX_CONTROLE_SPLINE = 16  # frame control point: não pertence à curva
+
+# Tolerância padrão (mm) do achatamento de SPLINEs: distância máxima entre a
+# corda e a curva
+SPLINE_TOLERANCE = 0.01
+
+# Quadratura das elipses: painéis por arco x pontos de Gauss-Legendre por painel.
+# Erro relativo < 1e-9 até razão 0,1 e < 1e-5 até razão 0,001.
+_ELIPSE_PAINEIS = 16
+_ELIPSE_NOS, _ELIPSE_PESOS = np.polynomial.legendre.leggauss(8)
+
+
+def bulge_segment_lengths(x: np.ndarray, y: np.ndarray, bulge: np.ndarray) -> np.ndarray:
+    """
+    Comprimento de cada segmento de uma sequência de vértices, considerando o
+    bulge do vértice inicial (bulge = tan(ângulo_incluído / 4); 0 é reta).
+
+    Args:
+        x, y: Coordenadas dos vértices (n)
+        bulge: Bulge de cada vértice (n); o do último vértice é ignorado
+
+    Returns:
+        Array com os n - 1 comprimentos
+    """
+    corda = np.hypot(np.diff(x), np.diff(y))
+    b = bulge[:-1]
+    curvos = b != 0.0
+    if not curvos.any():
+        return corda
+    # Arco de ângulo incluído theta sobre a corda c: c * theta / (2 * sin(theta / 2))
+    theta = 4.0 * np.arctan(np.abs(b[curvos]))
+    comprimentos = corda.copy()
+    comprimentos[curvos] = corda[curvos] * theta / (2.0 * np.sin(theta / 2.0))
+    return comprimentos
+
+
+def polyline_length(pontos: np.ndarray, closed: bool = False) -> float:
+    """
+    Comprimento de uma polilinha a partir de um array (n, 2) de x, y ou (n, 3)
+    de x, y, bulge.
+
+    Args:
+        pontos: Vértices da polilinha
+        closed: Se True, inclui o segmento do último ao primeiro vértice
+    """
+    if pontos.ndim != 2 or pontos.shape[0] < 2 or pontos.shape[1] < 2:
+        return 0.0
+    if closed:
+        pontos = np.vstack([pontos, pontos[:1]])
+    bulge = pontos[:, 2] if pontos.shape[1] >= 3 else np.zeros(len(pontos))
+    return float(bulge_segment_lengths(pontos[:, 0], pontos[:, 1], bulge).sum())
+
+
+def ellipse_lengths(eixo_maior: np.ndarray, razao: np.ndarray, inicio: np.ndarray, abertura: np.ndarray) -> np.ndarray:
+    """
+    Comprimento de arcos de elipse, integrando |dP/dt| = sqrt(a² sen² t + b² cos² t)
+    pelo parâmetro t com quadratura de Gauss-Legendre em painéis.
+
+    Args:
+        eixo_maior: Semieixo maior a de cada elipse
+        razao: Razão b / a
+        inicio: Parâmetro inicial (radianos)
+        abertura: Extensão do parâmetro (radianos, 2π para a elipse completa)
+
+    Returns:
+        Array com o comprimento de cada arco
+    """
+    a = eixo_maior[:, None, None]
+    b = (eixo_maior * razao)[:, None, None]
+    meio_painel = (abertura / (2 * _ELIPSE_PAINEIS))[:, None, None]
+    centros = inicio[:, None] + (2 * np.arange(_ELIPSE_PAINEIS) + 1)[None, :] * meio_painel[:, :, 0]
+    t = centros[:, :, None] + meio_painel * _ELIPSE_NOS[None, None, :]
+    integrando = np.sqrt((a * np.sin(t)) ** 2 + (b * np.cos(t)) ** 2)
+    return (integrando * _ELIPSE_PESOS).sum(axis=(1, 2)) * meio_painel[:, 0, 0]
+
+
+def ellipse_params(entity) -> Tuple[float, float, float, float]:
+    """
+    Extrai (semieixo maior, razão, parâmetro inicial, abertura) de um ELLIPSE.
+    """
+    eixo = entity.dxf.major_axis
+    semieixo = float(np.hypot(np.hypot(eixo[0], eixo[1]), eixo[2] if len(eixo) > 2 else 0.0))
+    inicio = float(entity.dxf.start_param)
+    return semieixo, float(entity.dxf.ratio), inicio, ellipse_param_span(inicio, float(entity.dxf.end_param))
+
+
+def spline_vertices(entity, tolerancia: float = SPLINE_TOLERANCE) -> np.ndarray:
+    """
+    Achata um SPLINE em vértices (x, y, bulge=0) com subdivisão adaptativa: um
+    trecho só é subdividido enquanto a curva se afasta mais que `tolerancia`
+    da corda, então tolerâncias maiores custam menos pontos.
+    """
+    pontos = [(v[0], v[1], 0.0) for v in entity.flattening(tolerancia, segments=4)]
+    return np.asarray(pontos, dtype=np.float64).reshape(-1, 3)
+
+
+def _espelho_x(entity) -> float:
+    """-1.0 para entidades com extrusão (0, 0, -1), cujo OCS espelha o eixo x; 1.0 caso contrário."""
+    extrusao = getattr(entity.dxf, 'extrusion', None)
+    return -1.0 if extrusao is not None and extrusao[2] < 0 else 1.0
+
+
+def polyline_vertices(entity) -> Tuple[np.ndarray, bool]:
+    """
+    Extrai os vértices (x, y, bulge) de um LWPOLYLINE ou POLYLINE do ezdxf (ou
+    de uma entidade com a mesma interface).
+
+    Returns:
+        Tupla (array (n, 3) float64, fechada)
+    """
+    if entity.dxftype() == 'POLYLINE':
+        if entity.dxf.flags & _POLYLINE_MALHA:
+            return np.empty((0, 3)), False
+        vertices = [
+            (v.dxf.location[0], v.dxf.location[1], v.dxf.bulge)
+            for v in entity.vertices
+            if not v.dxf.flags & _VERTEX_CONTROLE_SPLINE
+        ]
+        return np.asarray(vertices, dtype=np.float64).reshape(-1, 3), bool(entity.is_closed)
+
+    valores = getattr(getattr(entity, 'lwpoints', None), 'values', None)
+    if isinstance(valores, np.ndarray) and valores.ndim == 2 and valores.shape[1] == 5:
+        # Armazenamento interno do ezdxf: (x, y, largura inicial, largura final, bulge)
+        pontos = valores[:, [0, 1, 4]]
+    else:
+        pontos = np.asarray(entity.get_points('xyb'), dtype=np.float64)
+    if pontos.ndim != 2:
+        pontos = pontos.reshape(-1, 3) if pontos.size else np.empty((0, 3))
+    return pontos, bool(entity.closed)
+
+
+class GeometryBatch:
+    """
+    Acumula a geometria de várias entidades e calcula o comprimento total de
+    forma vetorizada.
+
+    Cada método add_* lê os atributos da entidade antes de acumular qualquer
+    valor; se a entidade for inválida a exceção é propagada e o lote não é
+    alterado.
+    """
+
+    def __init__(self, spline_tolerance: float = SPLINE_TOLERANCE, dedup_tolerance: Optional[float] = None):
+        """
+        Args:
+            spline_tolerance: Distância máxima (mm) entre a curva e as cordas no
+                achatamento de SPLINEs
+            dedup_tolerance: Se informado, LINEs, ARCs e círculos repetidos ou
+                sobrepostos (a menos dessa distância em mm) são contados uma vez
+        """
+        self.spline_tolerance = spline_tolerance
+        self.dedup_tolerance = dedup_tolerance
+        self._segmentos = array('d')  # x1, y1, x2, y2
+        self._arcos = array('d')      # raio, ângulo inicial, ângulo final (graus), centro x, y, espelho x
+        self._circulos = array('d')   # centro x (já espelhado), y, raio
+        self._elipses = array('d')    # semieixo maior, razão, parâmetro inicial, abertura
+        self._polilinhas: List[np.ndarray] = []  # (n, 3) x, y, bulge; fechadas já repetem o 1º vértice
+        self._extremos = array('d')   # x1, y1, x2, y2 de elipses, polilinhas e SPLINEs abertos
+        self._perfuracoes = array('d')  # x, y de elipses e polilinhas fechados
+        self._retas_e_curvas: Optional[Tuple[np.ndarray, np.ndarray, float]] = None
+
+    def add_line(self, entity):
+        inicio, fim = entity.dxf.start, entity.dxf.end
+        valores = (float(inicio[0]), float(inicio[1]), float(fim[0]), float(fim[1]))
+        self._descartar_retas()
+        self._segmentos.extend(valores)
+
+    def add_arc(self, entity):
+        centro = entity.dxf.center
+        valores = (float(entity.dxf.radius), float(entity.dxf.start_angle), float(entity.dxf.end_angle),
+                   float(centro[0]), float(centro[1]), _espelho_x(entity))
+        self._descartar_retas()
+        self._arcos.extend(valores)
+
+    def add_circle(self, entity):
+        raio, centro = float(entity.dxf.radius), entity.dxf.center
+        valores = (_espelho_x(entity) * centro[0], float(centro[1]), raio)
+        self._descartar_retas()
+        self._circulos.extend(valores)
+    
+    def _descartar_retas(self):
+        """
+        Descarta o cache de _retas() antes de acumular mais LINEs, ARCs ou
+        círculos: sem dedup_tolerance ele guarda uma view (np.frombuffer) de
+        _segmentos, e um array('d') com views exportadas não pode crescer
+        (BufferError).
+        """
+        self._retas_e_curvas = None
+
+    def add_ellipse(self, entity):
+        semieixo, razao, inicio, abertura = ellipse_params(entity)
+        centro, eixo = entity.dxf.center, entity.dxf.major_axis
+        if math.isclose(abertura, math.tau):
+            self._perfuracoes.extend((centro[0] + eixo[0], centro[1] + eixo[1]))
+        else:
+            # Pontos em t: centro + eixo maior * cos t + eixo menor * sen t (eixo menor = extrusão x eixo maior)
+            menor_x, menor_y = -eixo[1] * razao * _espelho_x(entity), eixo[0] * razao * _espelho_x(entity)
+            fim = inicio + abertura
+            self._extremos.extend((
+                centro[0] + eixo[0] * math.cos(inicio) + menor_x * math.sin(inicio),
+                centro[1] + eixo[1] * math.cos(inicio) + menor_y * math.sin(inicio),
+                centro[0] + eixo[0] * math.cos(fim) + menor_x * math.sin(fim),
+                centro[1] + eixo[1] * math.cos(fim) + menor_y * math.sin(fim),
+            ))
+        self._elipses.extend((semieixo, razao, inicio, abertura))
+
+    def add_spline(self, entity):
+        pontos = spline_vertices(entity, self.spline_tolerance)
+        if len(pontos) >= 2:
+            self._polilinhas.append(pontos)
+            self._extremos.extend((pontos[0, 0], pontos[0, 1], pontos[-1, 0], pontos[-1, 1]))
+
+    def add_polyline(self, entity):
+        """Acumula um LWPOLYLINE ou POLYLINE."""
+        pontos, fechada = polyline_vertices(entity)
+        if len(pontos) < 2:
+            return
+        espelho = _espelho_x(entity)
+        if fechada:
+            pontos = np.vstack([pontos, pontos[:1]])
+            self._perfuracoes.extend((espelho * pontos[0, 0], pontos[0, 1]))
+        else:
+            self._extremos.extend((espelho * pontos[0, 0], pontos[0, 1], espelho * pontos[-1, 0], pontos[-1, 1]))
+        self._polilinhas.append(np.ascontiguousarray(pontos, dtype=np.float64))
+
+    def total_length(self) -> float:
+        """Soma dos comprimentos de toda a geometria acumulada."""
+        return (self.lines_length() + self.arcs_length() + self.circles_length()
+                + self.ellipses_length() + self.polylines_length())
+
+    def lines_length(self) -> float:
+        s = self._retas()[0]
+        return float(np.hypot(s[:, 2] - s[:, 0], s[:, 3] - s[:, 1]).sum())
+
+    def arcs_length(self) -> float:
+        c = self._retas()[1]
+        arcos = c[:, 4] < math.tau
+        return float((c[arcos, 2] * c[arcos, 4]).sum())
+
+    def circles_length(self) -> float:
+        c = self._retas()[1]
+        return float(2 * np.pi * c[c[:, 4] >= math.tau, 2].sum())
+
+    def removed_length(self) -> float:
+        """Comprimento de LINEs, ARCs e círculos repetidos ou sobrepostos, descontado do total."""
+        return self._retas()[2]
+
+    def _retas(self) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Segmentos (n, 4) e curvas (m, 5: centro x, y, raio, ângulo inicial e
+        abertura em radianos, no WCS; círculos com abertura 2π) acumulados,
+        já sem sobreposições se dedup_tolerance foi informado, e o comprimento
+        removido.
+        """
+        if self._retas_e_curvas is None:
+            segmentos = np.frombuffer(self._segmentos, dtype=np.float64).reshape(-1, 4)
+            a = np.frombuffer(self._arcos, dtype=np.float64).reshape(-1, 6)
+            inicio, fim = np.radians(a[:, 1]), np.radians(a[:, 2])
+            # Arcos que cruzam 0°: normalizar o ângulo final
+            abertura = np.where(fim < inicio, fim + 2 * np.pi, fim) - inicio
+            # ARC está no OCS: com extrusão (0, 0, -1) o x é espelhado e o sentido se inverte
+            espelhado = a[:, 5] < 0
+            inicio = np.where(espelhado, np.pi - inicio - abertura, inicio)
+            c = np.frombuffer(self._circulos, dtype=np.float64).reshape(-1, 3)
+            curvas = np.concatenate([
+                np.column_stack([a[:, 5] * a[:, 3], a[:, 4], a[:, 0], inicio, abertura]),
+                np.column_stack([c, np.zeros(len(c)), np.full(len(c), math.tau)]),
+            ])
+            removido = 0.0
+            if self.dedup_tolerance is not None:
+                segmentos, removido_retas = merge_segments(segmentos, self.dedup_tolerance)
+                curvas, removido_curvas = merge_arcs(curvas, self.dedup_tolerance)
+                removido = removido_retas + removido_curvas
+            self._retas_e_curvas = (segmentos, curvas, removido)
+        return self._retas_e_curvas
+
+    def ellipses_length(self) -> float:
+        if not self._elipses:
+            return 0.0
+        e = np.frombuffer(self._elipses, dtype=np.float64).reshape(-1, 4)
+        return float(ellipse_lengths(e[:, 0], e[:, 1], e[:, 2], e[:, 3]).sum())
+
+    def polylines_length(self) -> float:
+        if not self._polilinhas:
+            return 0.0
+        # Todas as polilinhas em um único array; os "segmentos" entre o último
+        # vértice de uma e o primeiro da seguinte são descartados
+        pontos = np.concatenate(self._polilinhas)
+        comprimentos = bulge_segment_lengths(pontos[:, 0], pontos[:, 1], pontos[:, 2])
+        fronteiras = np.cumsum([len(p) for p in self._polilinhas])[:-1] - 1
+        comprimentos[fronteiras] = 0.0
+        return float(comprimentos.sum())
+
+    def contour_stats(self, tolerance: float = CONTOUR_TOLERANCE) -> ContourStats:
+        """
+        Contornos fechados e cadeias abertas da geometria acumulada.
+
+        Círculos e elipses, polilinhas e SPLINEs fechados são contornos por si
+        só; LINEs, ARCs e as demais entidades abertas são unidos pelas
+        extremidades (ver contours.build_contours).
+
+        Args:
+            tolerance: Distância (mm) até a qual extremidades são unidas
+        """
+        segmentos, curvas, _ = self._retas()
+        circulos = curvas[curvas[:, 4] >= math.tau]
+        a = curvas[curvas[:, 4] < math.tau]
+        inicio, fim = a[:, 3], a[:, 3] + a[:, 4]
+        pecas = [segmentos, np.frombuffer(self._extremos, dtype=np.float64).reshape(-1, 4), np.column_stack([
+            a[:, 0] + a[:, 2] * np.cos(inicio), a[:, 1] + a[:, 2] * np.sin(inicio),
+            a[:, 0] + a[:, 2] * np.cos(fim), a[:, 1] + a[:, 2] * np.sin(fim),
+        ])]
+        estatisticas, _ = build_contours(np.concatenate(pecas), tolerance)
+        fechadas = np.concatenate([
+            np.column_stack([circulos[:, 0] + circulos[:, 2], circulos[:, 1]]),
+            np.frombuffer(self._perfuracoes, dtype=np.float64).reshape(-1, 2),
+        ])
+        return estatisticas + ContourStats(len(fechadas), 0, fechadas)
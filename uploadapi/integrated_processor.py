@@ -1,8 +1,26 @@
 import os
-from typing import Dict, List
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .archive_processor import ArchiveMember
 from .pdf_processor import PDFProcessor
+from .layout_registry import get_registry
+from .name_index import NameMatcher
 from .dxf_processor import DXFProcessor
-from collections import defaultdict
+from .geometry_kernel import SPLINE_TOLERANCE
+from .contours import CONTOUR_TOLERANCE
+from .dedup import DEDUP_TOLERANCE
+from .travel import MAX_GREEDY_POINTS
+from .worker_pool import get_pool, worker_dxf_processor
+from collections import defaultdict, deque
+
+# Quantidade de pares mais lentos listados no resumo do processamento
+ARQUIVOS_LENTOS_NO_RELATORIO = 10
+
+# Intervalo (s) entre consultas ao pool enquanto há pares na fila, ainda não iniciados
+_INTERVALO_INICIO_S = 0.25
 
 def extrair_grupo_do_caminho(caminho: str) -> str:
     # Remove o nome do arquivo e pega a última subpasta
@@ -11,86 +29,388 @@ def extrair_grupo_do_caminho(caminho: str) -> str:
         return partes[-2]
     return 'raiz'
 
-def processar_lote_pdfs_dxfs(arquivos_extraidos: Dict[str, bytes], margem: float = 5.0) -> Dict[str, List[Dict]]:
+def ler_conteudo(conteudo) -> bytes:
     """
-    Processa todos os arquivos PDF e DXF extraídos, agrupando por grupo (última subpasta),
-    e retorna um dicionário no formato solicitado pelo usuário.
+    Retorna os bytes de um arquivo extraído, aceitando tanto bytes já carregados
+    quanto membros preguiçosos (ArchiveMember), que são descompactados aqui.
     """
-    grupos = defaultdict(list)
-    pdfs = [f for f in arquivos_extraidos if f.lower().endswith('.pdf')]
-    dxfs = [f for f in arquivos_extraidos if f.lower().endswith('.dxf')]
-    dxf_processor = DXFProcessor()
-
-    # Indexar PDFs por nome base e grupo
-    pdfs_info = []
-    for pdf in pdfs:
-        nome_base = os.path.splitext(os.path.basename(pdf))[0]
-        grupo = extrair_grupo_do_caminho(pdf)
-        pdfs_info.append({"caminho": pdf, "nome_base": nome_base, "grupo": grupo})
-
-    # Indexar DXFs por grupo
+    if isinstance(conteudo, (bytes, bytearray)):
+        return bytes(conteudo)
+    return conteudo.read()
+
+def planejar_pareamento(caminhos: Iterable[str]) -> Dict[str, Dict[str, List]]:
+    """
+    Define, apenas pelos caminhos, os pares PDF/DXF que processar_lote_pdfs_dxfs
+    processa: os arquivos são agrupados pela última subpasta e cada DXF é associado
+    ao PDF do grupo de nome base mais longo contido no nome do DXF (ver
+    name_index.NameMatcher), independentemente da ordem dos arquivos.
+
+    Args:
+        caminhos: Caminhos dos arquivos extraídos
+
+    Returns:
+        Dicionário grupo -> {"pares": [{"codigo", "pdf", "dxf", "dxf_nome"}],
+        "pdfs_sem_dxf": [caminhos], "dxfs_sem_pdf": [caminhos]}, em ordem de grupo
+    """
+    pdfs_por_grupo = defaultdict(dict)
     dxfs_por_grupo = defaultdict(list)
-    for dxf in dxfs:
-        grupo = extrair_grupo_do_caminho(dxf)
-        dxfs_por_grupo[grupo].append(dxf)
-
-    # Para cada grupo, montar a estrutura
-    for grupo in set([p["grupo"] for p in pdfs_info] + list(dxfs_por_grupo.keys())):
-        # PDFs desse grupo
-        pdfs_do_grupo = [p for p in pdfs_info if p["grupo"] == grupo]
-        dxfs_do_grupo = dxfs_por_grupo.get(grupo, [])
-
-        # Mapear PDFs por nome_base
-        pdfs_por_nome_base = {p["nome_base"]: p for p in pdfs_do_grupo}
-        # Mapear DXFs por nome_base do PDF correspondente
-        sub_pecas = {}
+    for caminho in caminhos:
+        nome = caminho.lower()
+        if nome.endswith('.pdf'):
+            nome_base = os.path.splitext(os.path.basename(caminho))[0]
+            # Mesmo nome base no grupo: prevalece o último PDF, como no mapeamento original
+            pdfs_por_grupo[extrair_grupo_do_caminho(caminho)][nome_base] = caminho
+        elif nome.endswith('.dxf'):
+            dxfs_por_grupo[extrair_grupo_do_caminho(caminho)].append(caminho)
+
+    plano = {}
+    for grupo in sorted(set(pdfs_por_grupo) | set(dxfs_por_grupo)):
+        pdfs_por_nome_base = pdfs_por_grupo.get(grupo, {})
+        indice_nomes = NameMatcher(pdfs_por_nome_base)
+        pares = []
+        dxfs_sem_pdf = []
         usados_pdf = set()
-        for dxf in dxfs_do_grupo:
+        for dxf in dxfs_por_grupo.get(grupo, []):
             dxf_nome = os.path.splitext(os.path.basename(dxf))[0]
-            pdf_correspondente = None
-            for nome_base, pdf_info in pdfs_por_nome_base.items():
-                if nome_base in dxf_nome:
-                    pdf_correspondente = pdf_info
+            nome_base = indice_nomes.longest_match(dxf_nome)
+            if nome_base is None:
+                dxfs_sem_pdf.append(dxf)
+                continue
+            usados_pdf.add(nome_base)
+            pares.append({"codigo": nome_base, "pdf": pdfs_por_nome_base[nome_base], "dxf": dxf, "dxf_nome": dxf_nome})
+        plano[grupo] = {
+            "pares": pares,
+            "pdfs_sem_dxf": [pdf for nome_base, pdf in pdfs_por_nome_base.items() if nome_base not in usados_pdf],
+            "dxfs_sem_pdf": dxfs_sem_pdf,
+        }
+    return plano
+
+def montar_manifesto(membros: Iterable[ArchiveMember]) -> Dict:
+    """
+    Monta o manifesto de um upload a partir dos metadados dos membros, sem ler
+    o conteúdo: grupos, pares PDF/DXF, arquivos órfãos e tamanhos declarados.
+    """
+    tamanhos = {membro.path: membro.size for membro in membros}
+    plano = planejar_pareamento(tamanhos)
+
+    def _arquivo(caminho):
+        return {"caminho": caminho, "tamanho": tamanhos[caminho]}
+
+    grupos = {}
+    resumo = {"grupos": 0, "pares": 0, "pdfs_sem_dxf": 0, "dxfs_sem_pdf": 0, "bytes_declarados": sum(tamanhos.values())}
+    for grupo, dados in plano.items():
+        grupos[grupo] = {
+            "pares": [
+                {"codigo": par["codigo"], "pdf": _arquivo(par["pdf"]), "dxf": _arquivo(par["dxf"])}
+                for par in dados["pares"]
+            ],
+            "pdfs_sem_dxf": [_arquivo(pdf) for pdf in dados["pdfs_sem_dxf"]],
+            "dxfs_sem_pdf": [_arquivo(dxf) for dxf in dados["dxfs_sem_pdf"]],
+        }
+        resumo["grupos"] += 1
+        resumo["pares"] += len(dados["pares"])
+        resumo["pdfs_sem_dxf"] += len(dados["pdfs_sem_dxf"])
+        resumo["dxfs_sem_pdf"] += len(dados["dxfs_sem_pdf"])
+    return {"grupos": grupos, "resumo": resumo}
+
+def configuracao_dxf() -> Dict:
+    """Argumentos do DXFProcessor definidos no settings (usados também pelos workers do pool)."""
+    return {
+        "target_layer": getattr(settings, 'DXF_TARGET_LAYER', 'Corte'),
+        "fast_scan": getattr(settings, 'DXF_FAST_SCAN', False),
+        "spline_tolerance": getattr(settings, 'DXF_SPLINE_TOLERANCE', SPLINE_TOLERANCE),
+        "contour_tolerance": getattr(settings, 'DXF_CONTOUR_TOLERANCE', CONTOUR_TOLERANCE),
+        "travel_optimization_seconds": getattr(settings, 'DXF_TRAVEL_2OPT_SECONDS', 0.0),
+        "dedup_tolerance": getattr(settings, 'DXF_DEDUP_TOLERANCE', DEDUP_TOLERANCE),
+        "travel_max_greedy_points": getattr(settings, 'DXF_TRAVEL_MAX_GREEDY_POINTS', MAX_GREEDY_POINTS),
+    }
+
+class PDFResultMemo:
+    """
+    Campos extraídos de cada PDF de um lote, por caminho: o primeiro par de um
+    PDF o processa e os demais pares (outros DXFs do mesmo desenho) reaproveitam
+    o resultado.
+    """
+
+    def __init__(self):
+        self._dados: Dict[str, Dict] = {}
+        self.acertos = 0
+
+    def get(self, caminho: str) -> Optional[Dict]:
+        """Campos já extraídos do PDF (contando o reaproveitamento), ou None."""
+        dados = self._dados.get(caminho)
+        if dados is not None:
+            self.acertos += 1
+        return dados
+
+    def put(self, caminho: str, dados_pdf: Dict):
+        self._dados.setdefault(caminho, dados_pdf)
+
+    def __contains__(self, caminho: str) -> bool:
+        return caminho in self._dados
+
+    def resumo(self) -> Dict:
+        return {"pdfs_processados": len(self._dados), "pdfs_reaproveitados": self.acertos}
+
+def processar_par(pdf_nome: str, pdf_bytes: Optional[bytes], dxf_nome: str, dxf_bytes: bytes, margem: float,
+                  dxf_processor: DXFProcessor, dados_pdf: Optional[Dict] = None) -> Tuple[Dict, Dict, Dict]:
+    """
+    Processa um par PDF/DXF: extrai os campos do PDF e calcula o DXF com o
+    material e a espessura lidos.
+
+    Args:
+        dados_pdf: Campos do PDF já extraídos por outro par do lote; se
+            informados, o PDF não é processado (e pdf_bytes pode ser None)
+
+    Returns:
+        Tupla (dados do PDF, resultado do DXF, tempos em segundos de cada
+        arquivo e de cada etapa do PDF)
+    """
+    inicio = time.perf_counter()
+    tempos_pdf = {}
+    if dados_pdf is None:
+        pdf_proc = PDFProcessor(pdf_bytes, pdf_nome, margin=margem,
+                                layouts=get_registry(getattr(settings, 'PDF_LAYOUTS_FILE', None)))
+        dados_pdf = pdf_proc.process()
+        tempos_pdf = pdf_proc.tempos
+    meio = time.perf_counter()
+    dxf_result = dxf_processor.process_single_dxf_completo(
+        dxf_nome,
+        dxf_bytes,
+        material=dados_pdf.get('material', ''),
+        espessura=dados_pdf.get('espessura', '')
+    )
+    tempos = {"pdf_s": meio - inicio, "dxf_s": time.perf_counter() - meio}
+    tempos.update((f"pdf_{etapa}_s", segundos) for etapa, segundos in tempos_pdf.items())
+    return dados_pdf, dxf_result, tempos
+
+def _processar_par_no_worker(pdf_nome: str, pdf_bytes: Optional[bytes], dxf_nome: str, dxf_bytes: bytes,
+                             margem: float, dados_pdf: Optional[Dict] = None) -> Tuple[Dict, Dict, Dict]:
+    """Tarefa do pool de workers: processar_par com o DXFProcessor aquecido do worker."""
+    return processar_par(pdf_nome, pdf_bytes, dxf_nome, dxf_bytes, margem, worker_dxf_processor(), dados_pdf)
+
+def _par_com_erro(mensagem: str) -> Tuple[Dict, Dict, Dict]:
+    """Resultado de um par que não pôde ser processado (erro, prazo excedido ou worker encerrado)."""
+    return {"erro": mensagem}, {"perimetro_mm": 0, "tempo_corte_segundos": 0, "erro": mensagem}, {}
+
+def _processar_pares(arquivos_extraidos: Dict[str, Union[bytes, ArchiveMember]], pares: List[Dict],
+                     margem: float, dxf_processor: DXFProcessor, tempos: List[Dict],
+                     memo: PDFResultMemo) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Processa os pares em ordem, produzindo (dados do PDF, resultado do DXF) e
+    acrescentando a `tempos` o tempo de cada par.
+
+    Cada PDF é processado (e descompactado) uma única vez: os pares seguintes
+    do mesmo PDF recebem os campos guardados em `memo`.
+
+    Com o pool de workers iniciado, os pares são processados nos workers (ver
+    _processar_pares_no_pool); sem o pool, cada par é processado na própria
+    thread da requisição, sem prazo. Nos dois casos, um par que falha recebe
+    status de erro e os demais seguem.
+    """
+    pool = get_pool()
+    if pool is None:
+        for par in pares:
+            inicio = time.perf_counter()
+            dados_memo = memo.get(par["pdf"])
+            pdf_bytes = ler_conteudo(arquivos_extraidos[par["pdf"]]) if dados_memo is None else None
+            dxf_bytes = ler_conteudo(arquivos_extraidos[par["dxf"]])
+            try:
+                dados_pdf, dxf_result, tempo = processar_par(
+                    par["pdf"], pdf_bytes, par["dxf_nome"], dxf_bytes, margem, dxf_processor, dados_memo)
+            except Exception as e:
+                dados_pdf, dxf_result, tempo = _par_com_erro(str(e))
+            else:
+                memo.put(par["pdf"], dados_pdf)
+            tempos.append(_tempo_do_par(par, time.perf_counter() - inicio, dados_pdf, dxf_result, tempo))
+            yield dados_pdf, dxf_result
+        return
+    yield from _processar_pares_no_pool(pool, arquivos_extraidos, pares, margem, tempos, memo)
+
+def _proximo_par(fila: deque, pares: List[Dict], bloqueados: set) -> Optional[int]:
+    """Retira da fila o primeiro par cujo PDF não está sendo processado por outro par em andamento."""
+    for posicao, indice in enumerate(fila):
+        if pares[indice]["pdf"] not in bloqueados:
+            del fila[posicao]
+            return indice
+    return None
+
+def _processar_pares_no_pool(pool, arquivos_extraidos: Dict[str, Union[bytes, ArchiveMember]], pares: List[Dict],
+                             margem: float, tempos: List[Dict], memo: PDFResultMemo) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Processa os pares nos workers do pool, com prazo e isolamento de falhas.
+
+    Um par cujo PDF já foi processado é enviado com os campos de `memo`, sem
+    os bytes do PDF; enquanto um par processa um PDF, os outros pares do mesmo
+    PDF esperam na fila e os seguintes são enviados na frente.
+
+    No máximo um par por worker fica em andamento (e com os bytes lidos). O
+    prazo do pool (deadline_seconds) conta a partir do início do par no worker
+    (pool.started_at): um par que espera na fila, atrás dos pares de outras
+    requisições, nunca vence o prazo nem provoca um reinício. Um par que excede
+    o prazo recebe status de erro e o pool é reiniciado; os demais pares em
+    andamento voltam para a fila. Se um worker morre (BrokenProcessPool),
+    não se sabe qual dos pares em andamento o derrubou: eles são reenviados um
+    de cada vez, e o par que derruba o worker sozinho recebe status de erro.
+    Os resultados são produzidos na ordem de `pares`.
+    """
+    prazo = pool.deadline_seconds
+    fila = deque(range(len(pares)))
+    suspeitos = deque()
+    em_andamento = {}  # futuro -> (índice do par, instante do envio, geração do pool)
+    extraindo = set()  # pares em andamento que processam o PDF (sem campos em memo)
+    prontos = {}
+    proximo = 0
+    isolado = False  # um suspeito está em andamento sozinho
+
+    while proximo < len(pares):
+        # Suspeitos são reenviados sozinhos; os demais, um por worker
+        if not em_andamento:
+            isolado = False
+        while True:
+            if suspeitos and not em_andamento:
+                indice, isolado = suspeitos.popleft(), True
+            elif fila and not suspeitos and not isolado and len(em_andamento) < pool.workers:
+                bloqueados = {pares[i]["pdf"] for i, _, _ in em_andamento.values() if i in extraindo}
+                indice = _proximo_par(fila, pares, bloqueados)
+                if indice is None:
                     break
-            if not pdf_correspondente:
-                continue  # Só processa DXFs com PDF correspondente
-            usados_pdf.add(pdf_correspondente["nome_base"])
-            # Processar PDF
-            pdf_path = None
+            else:
+                break
+            par = pares[indice]
+            dados_memo = memo.get(par["pdf"])
+            pdf_bytes = None
+            if dados_memo is None:
+                extraindo.add(indice)
+                pdf_bytes = ler_conteudo(arquivos_extraidos[par["pdf"]])
+            else:
+                extraindo.discard(indice)
+            geracao = pool.geracao
+            futuro = pool.submit(_processar_par_no_worker, par["pdf"], pdf_bytes, par["dxf_nome"],
+                                 ler_conteudo(arquivos_extraidos[par["dxf"]]), margem, dados_memo)
+            em_andamento[futuro] = (indice, time.perf_counter(), geracao)
+
+        espera = None
+        if prazo is not None and em_andamento:
+            inicios = [pool.started_at(futuro) for futuro in em_andamento]
+            iniciados = [inicio for inicio in inicios if inicio is not None]
+            espera = min(iniciados) + prazo - time.monotonic() if iniciados else prazo
+            if len(iniciados) < len(inicios):
+                # O início de um par na fila só é visto consultando o pool
+                espera = min(espera, _INTERVALO_INICIO_S)
+            espera = max(espera, 0)
+        concluidos, _ = wait(em_andamento, timeout=espera, return_when=FIRST_COMPLETED)
+
+        quebrados = []
+        for futuro in concluidos:
+            indice, enviado, geracao = em_andamento.pop(futuro)
             try:
-                import tempfile
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
-                    temp_pdf.write(arquivos_extraidos[pdf_correspondente["caminho"]])
-                    pdf_path = temp_pdf.name
-                pdf_proc = PDFProcessor(pdf_path, pdf_correspondente["caminho"], margin=margem)
-                dados_pdf = pdf_proc.process()
-            finally:
-                if pdf_path and os.path.exists(pdf_path):
-                    try:
-                        os.unlink(pdf_path)
-                    except Exception:
-                        pass
-            # Processar DXF
-            dxf_bytes = arquivos_extraidos[dxf]
-            dxf_result = dxf_processor.process_single_dxf_completo(
-                dxf_nome,
-                dxf_bytes,
-                material=dados_pdf.get('material', ''),
-                espessura=dados_pdf.get('espessura', '')
-            )
+                prontos[indice] = futuro.result()
+                if indice in extraindo:
+                    memo.put(pares[indice]["pdf"], prontos[indice][0])
+            except BrokenProcessPool:
+                quebrados.append((indice, enviado, geracao))
+                continue
+            except Exception as e:
+                prontos[indice] = _par_com_erro(str(e))
+            tempos.append(_tempo_do_par(pares[indice], time.perf_counter() - enviado, *prontos[indice]))
+
+        agora = time.perf_counter()
+        vencidos = []
+        if prazo is not None:
+            for futuro in list(em_andamento):
+                inicio = pool.started_at(futuro)
+                if inicio is not None and time.monotonic() - inicio >= prazo:
+                    vencidos.append(em_andamento.pop(futuro))
+        if vencidos or quebrados:
+            for indice, enviado, _ in vencidos:
+                prontos[indice] = _par_com_erro(f"prazo de {prazo:g} s excedido")
+                tempos.append(_tempo_do_par(pares[indice], agora - enviado, *prontos[indice]))
+            # Os demais pares em andamento são interrompidos pelo reinício
+            interrompidos = sorted(indice for indice, _, _ in em_andamento.values())
+            geracao = max(geracao for _, _, geracao in vencidos + quebrados)
+            em_andamento.clear()
+            if quebrados:
+                afetados = sorted([indice for indice, _, _ in quebrados] + interrompidos)
+                if len(afetados) == 1:
+                    indice, enviado, _ = quebrados[0]
+                    prontos[indice] = _par_com_erro("o processo do worker foi encerrado inesperadamente")
+                    tempos.append(_tempo_do_par(pares[indice], agora - enviado, *prontos[indice]))
+                else:
+                    suspeitos.extend(afetados)
+            else:
+                fila.extendleft(reversed(interrompidos))
+            pool.restart(geracao)
+
+        while proximo in prontos:
+            dados_pdf, dxf_result, _ = prontos.pop(proximo)
+            yield dados_pdf, dxf_result
+            proximo += 1
+
+def _tempo_do_par(par: Dict, segundos: float, dados_pdf: Dict, dxf_result: Dict, tempo: Dict) -> Dict:
+    """Registro de tempo de um par para o relatório de arquivos lentos."""
+    return {
+        "pdf": par["pdf"],
+        "dxf": par["dxf"],
+        "segundos": round(segundos, 3),
+        **{chave: round(valor, 3) for chave, valor in tempo.items()},
+        "status": _status_do_par(dados_pdf, dxf_result),
+    }
+
+def _status_do_par(dados_pdf: Dict, dxf_result: Dict) -> str:
+    erro = dxf_result.get('erro') or dados_pdf.get('erro')
+    return f"erro: {erro}" if erro else "processado"
+
+def processar_lote_pdfs_dxfs(arquivos_extraidos: Dict[str, Union[bytes, ArchiveMember]], margem: float = 5.0,
+                             estatisticas: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+    """
+    Processa todos os arquivos PDF e DXF extraídos, agrupando por grupo (última subpasta),
+    e retorna um dicionário no formato solicitado pelo usuário.
+
+    Os valores de arquivos_extraidos podem ser bytes ou ArchiveMember; no segundo caso
+    cada arquivo só é descompactado quando o par PDF/DXF é processado e é descartado
+    em seguida, de modo que a memória fica limitada aos pares em processamento.
+    Se o pool de workers estiver iniciado (ver worker_pool), os pares são
+    processados nos workers aquecidos, cada um com prazo e isolado dos demais:
+    um par que excede o prazo ou derruba o worker recebe status de erro e os
+    outros continuam.
+
+    Cada PDF com DXF é processado uma única vez no lote, por mais DXFs que o
+    usem (variantes 1234_a.dxf, 1234_b.dxf...); PDFs sem DXF não são processados.
+
+    Se `estatisticas` for informado, recebe o resumo do processamento: pares,
+    pares com erro, tempo total, os pares mais lentos (relatório de arquivos
+    lentos) e quantos PDFs foram processados e reaproveitados.
+    """
+    grupos = defaultdict(list)
+    dxf_processor = DXFProcessor(**configuracao_dxf())
+    planos = planejar_pareamento(arquivos_extraidos)
+    todos_os_pares = [par for plano in planos.values() for par in plano["pares"]]
+    tempos = []
+    memo = PDFResultMemo()
+    resultados_pares = _processar_pares(arquivos_extraidos, todos_os_pares, margem, dxf_processor, tempos, memo)
+
+    for grupo, plano in planos.items():
+        sub_pecas = {}
+        for par in plano["pares"]:
+            dados_pdf, dxf_result = next(resultados_pares)
             # Montar resultado consolidado
             resultado = {
                 "nome": dados_pdf.get('nome', ''),
                 "material": dados_pdf.get('material', ''),
                 "espessura": dados_pdf.get('espessura', ''),
                 "perimetro_mm": dxf_result.get('perimetro_mm'),
-                "tempo_corte_segundos": dxf_result.get('tempo_corte_segundos')
+                "tempo_corte_segundos": dxf_result.get('tempo_corte_segundos'),
+                "perimetro_por_layer": dxf_result.get('perimetro_por_layer', {}),
+                "perfuracoes": dxf_result.get('perfuracoes', 0),
+                "rapid_mm": dxf_result.get('rapid_mm', 0),
+                "comprimento_duplicado_mm": dxf_result.get('comprimento_duplicado_mm', 0),
+                "status": _status_do_par(dados_pdf, dxf_result)
             }
-            sub_pecas[pdf_correspondente["nome_base"]] = resultado
+            sub_pecas[par["codigo"]] = resultado
 
-        # PDFs sem DXF correspondente
-        pdfs_sem_dxf = [p for p in pdfs_do_grupo if p["nome_base"] not in usados_pdf]
-        if sub_pecas or pdfs_sem_dxf:
+        # PDFs sem DXF correspondente também geram a peça principal
+        if sub_pecas or plano["pdfs_sem_dxf"]:
             obj = {}
             # Trocar para PascalCase e nome correto
             obj["PecaPrincipal"] = grupo
@@ -102,9 +422,26 @@ def processar_lote_pdfs_dxfs(arquivos_extraidos: Dict[str, bytes], margem: float
                     "Material": dados.get("material", ""),
                     "Espessura": dados.get("espessura", ""),
                     "PerimetroMm": dados.get("perimetro_mm"),
-                    "TempoCorteSegundos": dados.get("tempo_corte_segundos")
+                    "TempoCorteSegundos": dados.get("tempo_corte_segundos"),
+                    "PerimetroPorLayer": dados.get("perimetro_por_layer", {}),
+                    "Perfuracoes": dados.get("perfuracoes", 0),
+                    "RapidMm": dados.get("rapid_mm", 0),
+                    "ComprimentoDuplicadoMm": dados.get("comprimento_duplicado_mm", 0),
+                    "Status": dados.get("status", "processado")
                 }
             obj["SubPecas"] = subPecas
             grupos[grupo].append(obj)
 
-    return grupos 
\ No newline at end of file
+    if estatisticas is not None:
+        estatisticas.update(resumir_tempos(tempos))
+        estatisticas.update(memo.resumo())
+    return grupos
+
+def resumir_tempos(tempos: List[Dict]) -> Dict:
+    """Resumo dos tempos dos pares, com os ARQUIVOS_LENTOS_NO_RELATORIO pares mais lentos."""
+    return {
+        "pares": len(tempos),
+        "pares_com_erro": sum(1 for tempo in tempos if tempo["status"] != "processado"),
+        "tempo_pares_s": round(sum(tempo["segundos"] for tempo in tempos), 3),
+        "arquivos_lentos": sorted(tempos, key=lambda tempo: tempo["segundos"], reverse=True)[:ARQUIVOS_LENTOS_NO_RELATORIO],
+    } 
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Seleção de layers de um DXF e índice de entidades por layer.
+
+A seleção por nome, conjunto de nomes ou padrão glob (fnmatch) é feita sobre
+os nomes das layers: LayerSelector decide uma vez por nome de layer, e o
+cálculo de perímetro a consulta para cada entidade lida, sem guardar as
+entidades. LayerIndex agrupa as entidades do model space por layer em uma
+única passada, para quem precisa delas. Como no AutoCAD, nomes de layer são
+comparados sem diferenciar maiúsculas de minúsculas.
+"""
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, List, Optional, Union
+
+# Layer de uma entidade sem o atributo (padrão do DXF)
+LAYER_PADRAO = '0'
+
+Selecao = Optional[Union[str, Iterable[str]]]
+
+
+class LayerSelector:
+    """Decide se uma layer faz parte da seleção, com o resultado guardado por nome."""
+
+    def __init__(self, selecao: Selecao):
+        """
+        Args:
+            selecao: Nome de layer, padrão glob ("Corte*", "*_CUT") ou coleção de
+                nomes/padrões; None seleciona todas
+        """
+        if selecao is None:
+            self._padroes = None
+        else:
+            padroes = [selecao] if isinstance(selecao, str) else list(selecao)
+            self._padroes = [padrao.casefold() for padrao in padroes]
+        self._decididas: Dict[str, bool] = {}
+
+    def matches(self, layer: str) -> bool:
+        if self._padroes is None:
+            return True
+        casa = self._decididas.get(layer)
+        if casa is None:
+            nome = layer.casefold()
+            casa = self._decididas[layer] = any(
+                nome == padrao or fnmatchcase(nome, padrao) for padrao in self._padroes)
+        return casa
+
+
+class LayerIndex:
+    """Entidades agrupadas por layer, na ordem em que as layers aparecem."""
+
+    def __init__(self, entidades: Iterable):
+        """
+        Args:
+            entidades: Entidades do DXF (model space, scanner ou lista)
+        """
+        self._por_layer: Dict[str, List] = {}
+        for entity in entidades:
+            layer = getattr(entity.dxf, 'layer', LAYER_PADRAO)
+            grupo = self._por_layer.get(layer)
+            if grupo is None:
+                grupo = self._por_layer[layer] = []
+            grupo.append(entity)
+
+    def layers(self) -> List[str]:
+        return list(self._por_layer)
+
+    def entities(self, layer: str) -> List:
+        return self._por_layer.get(layer, [])
+
+    def counts(self) -> Dict[str, int]:
+        """Quantidade de entidades por layer."""
+        return {layer: len(grupo) for layer, grupo in self._por_layer.items()}
+
+    def select(self, selecao: Selecao) -> List[str]:
+        """
+        Layers do índice que casam com a seleção.
+
+        Args:
+            selecao: Nome de layer, padrão glob ("Corte*", "*_CUT") ou coleção de
+                nomes/padrões; None seleciona todas
+
+        Returns:
+            Nomes das layers selecionadas, na ordem do índice (lista vazia se
+            nenhuma casar)
+        """
+        seletor = LayerSelector(selecao)
+        return [layer for layer in self._por_layer if seletor.matches(layer)]
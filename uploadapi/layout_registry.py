@@ -0,0 +1,271 @@
+"""
+Registro dos layouts de carimbo dos PDFs, carregado de um arquivo JSON.
+
+Cada layout define a faixa de largura (e, opcionalmente, de altura e as
+rotações) da página em que é usado, um texto-chave opcional (e a região da
+página em que ele aparece) e o retângulo de cada campo. Os layouts são indexados por faixas quantizadas de (rotação,
+largura, altura): a detecção é uma consulta ao dicionário seguida da conferência
+exata das dimensões e, no máximo, de alguns textos-chave, em vez de percorrer
+todos os layouts.
+
+O arquivo é relido quando muda (data de modificação ou tamanho), sem reiniciar
+o servidor; se a nova versão for inválida, a anterior continua valendo e o erro
+fica em LayoutRegistry.erro_recarga.
+
+Formato do arquivo:
+
+    {
+        "bucket_pt": 10,
+        "tolerancia_pt": 2,
+        "layouts": [
+            {
+                "nome": "A1_SECURITY",
+                "largura": [2000, null],
+                "altura": 1684,
+                "rotacoes": [0],
+                "chave": "S E C U R I T Y",
+                "regiao_chave": [x0, y0, x1, y1],
+                "campos": {"nome": [x0, y0, x1, y1], ...}
+            }
+        ]
+    }
+
+Largura e altura são um intervalo [mínimo, máximo] exclusivo (null: sem
+limite) ou um valor exato, aceito com a tolerância de `tolerancia_pt`. Sem
+"altura" ou "rotacoes", qualquer altura ou rotação serve. A ordem do arquivo
+desempata layouts com as mesmas dimensões. "regiao_chave" é opcional: sem ela,
+um layout com chave só é confirmado pelo texto da página inteira.
+"""
+import json
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import fitz
+
+# Arquivo de layouts padrão, distribuído com a aplicação
+LAYOUTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts.json')
+
+# Maior dimensão de página do PDF (200 polegadas); limita as faixas sem máximo
+MAX_PAGE_PT = 14400.0
+
+# Faixas de altura com mais buckets que isso são indexadas só pela largura
+_MAX_BUCKETS_ALTURA = 64
+
+ROTACOES = (0, 90, 180, 270)
+
+
+class PDFLayout:
+    """Um layout de carimbo: dimensões da página, texto-chave e retângulos dos campos."""
+
+    def __init__(self, nome: str, campos: Dict[str, fitz.Rect], largura: Tuple[float, float],
+                 altura: Optional[Tuple[float, float]] = None, rotacoes: Iterable[int] = ROTACOES,
+                 chave: Optional[str] = None, regiao_chave: Optional[fitz.Rect] = None):
+        """
+        Args:
+            nome: Nome do layout (ex.: "A1_SECURITY")
+            campos: Retângulo de cada campo, em coordenadas da página
+            largura: Faixa (mínimo, máximo), exclusiva, da largura da página em pt
+            altura: Faixa da altura da página; None aceita qualquer altura
+            rotacoes: Rotações da página aceitas
+            chave: Texto que precisa estar na página (palavras em sequência
+                numa mesma linha); None dispensa a conferência
+            regiao_chave: Retângulo da página em que a chave aparece; None se
+                a posição não é conhecida
+        """
+        self.nome = nome
+        self.campos = campos
+        self.largura = largura
+        self.altura = altura
+        self.rotacoes = tuple(rotacoes)
+        self.chave = chave
+        self.regiao_chave = regiao_chave
+        regiao = fitz.Rect()
+        for rect in campos.values():
+            regiao |= rect
+        if regiao_chave is not None:
+            regiao |= regiao_chave
+        # União dos retângulos dos campos e da região da chave
+        self.carimbo = regiao
+
+    def matches(self, largura: float, altura: float, rotacao: int) -> bool:
+        """Indica se a página tem as dimensões e a rotação do layout."""
+        if rotacao not in self.rotacoes or not self.largura[0] < largura < self.largura[1]:
+            return False
+        return self.altura is None or self.altura[0] < altura < self.altura[1]
+
+    def __repr__(self):
+        return f"PDFLayout({self.nome!r})"
+
+
+class LayoutIndex:
+    """Layouts indexados por bucket de (rotação, largura, altura)."""
+
+    def __init__(self, layouts: List[PDFLayout], bucket_pt: float = 10.0):
+        """
+        Args:
+            layouts: Layouts na ordem de prioridade
+            bucket_pt: Tamanho (pt) de cada faixa quantizada de largura e altura
+        """
+        nomes = [layout.nome for layout in layouts]
+        repetidos = sorted({nome for nome in nomes if nomes.count(nome) > 1})
+        if repetidos:
+            raise ValueError(f"Layouts repetidos: {', '.join(repetidos)}")
+        self.layouts = layouts
+        self.bucket_pt = bucket_pt
+        self._por_nome = {layout.nome: layout for layout in layouts}
+        # (rotação, bucket da largura, bucket da altura ou None) -> posições em `layouts`
+        self._buckets: Dict[Tuple[int, int, Optional[int]], List[int]] = {}
+        for posicao, layout in enumerate(layouts):
+            alturas = [None]
+            if layout.altura is not None:
+                primeiro, ultimo = self._faixa(layout.altura)
+                if ultimo - primeiro < _MAX_BUCKETS_ALTURA:
+                    alturas = range(primeiro, ultimo + 1)
+            primeiro, ultimo = self._faixa(layout.largura)
+            for rotacao in layout.rotacoes:
+                for largura in range(primeiro, ultimo + 1):
+                    for altura in alturas:
+                        self._buckets.setdefault((rotacao, largura, altura), []).append(posicao)
+
+    def _bucket(self, valor: float) -> int:
+        return math.floor(valor / self.bucket_pt)
+
+    def _faixa(self, faixa: Tuple[float, float]) -> Tuple[int, int]:
+        return self._bucket(max(faixa[0], 0.0)), self._bucket(min(faixa[1], MAX_PAGE_PT))
+
+    def get(self, nome: str) -> Optional[PDFLayout]:
+        return self._por_nome.get(nome)
+
+    def candidates(self, largura: float, altura: float, rotacao: int = 0) -> List[PDFLayout]:
+        """
+        Layouts cujas dimensões e rotação aceitam a página, na ordem do registro.
+
+        Args:
+            largura, altura: Dimensões da página em pt
+            rotacao: Rotação da página em graus
+        """
+        chave = (rotacao % 360, self._bucket(largura))
+        posicoes = self._buckets.get(chave + (self._bucket(altura),), []) + self._buckets.get(chave + (None,), [])
+        return [self.layouts[posicao] for posicao in sorted(set(posicoes))
+                if self.layouts[posicao].matches(largura, altura, rotacao % 360)]
+
+
+def _faixa_da_definicao(valor, tolerancia: float, nome: str, dimensao: str) -> Optional[Tuple[float, float]]:
+    if valor is None:
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor) - tolerancia, float(valor) + tolerancia
+    if isinstance(valor, list) and len(valor) == 2:
+        minimo, maximo = valor
+        return (float(minimo) if minimo is not None else -math.inf,
+                float(maximo) if maximo is not None else math.inf)
+    raise ValueError(f"Layout {nome}: {dimensao} deve ser um número ou [mínimo, máximo]")
+
+
+def parse_layouts(definicao: Dict) -> LayoutIndex:
+    """
+    Monta o índice a partir do conteúdo do arquivo de layouts.
+
+    Raises:
+        ValueError: Se a definição for inválida (campos, dimensões ou nomes repetidos)
+    """
+    tolerancia = float(definicao.get('tolerancia_pt', 2.0))
+    layouts = []
+    for item in definicao.get('layouts', []):
+        nome = item.get('nome')
+        if not nome:
+            raise ValueError("Layout sem nome")
+        campos = item.get('campos') or {}
+        if not campos or any(not isinstance(rect, list) or len(rect) != 4 for rect in campos.values()):
+            raise ValueError(f"Layout {nome}: campos devem ser retângulos [x0, y0, x1, y1]")
+        largura = _faixa_da_definicao(item.get('largura'), tolerancia, nome, 'largura')
+        if largura is None:
+            raise ValueError(f"Layout {nome}: largura obrigatória")
+        rotacoes = item.get('rotacoes', ROTACOES)
+        if any(rotacao not in ROTACOES for rotacao in rotacoes):
+            raise ValueError(f"Layout {nome}: rotações devem ser 0, 90, 180 ou 270")
+        regiao_chave = item.get('regiao_chave')
+        if regiao_chave is not None and (not isinstance(regiao_chave, list) or len(regiao_chave) != 4):
+            raise ValueError(f"Layout {nome}: regiao_chave deve ser um retângulo [x0, y0, x1, y1]")
+        layouts.append(PDFLayout(
+            nome,
+            {campo: fitz.Rect(*rect) for campo, rect in campos.items()},
+            largura,
+            _faixa_da_definicao(item.get('altura'), tolerancia, nome, 'altura'),
+            rotacoes,
+            item.get('chave'),
+            fitz.Rect(*regiao_chave) if regiao_chave is not None else None,
+        ))
+    return LayoutIndex(layouts, float(definicao.get('bucket_pt', 10.0)))
+
+
+class LayoutRegistry:
+    """Índice de layouts de um arquivo JSON, relido quando o arquivo muda."""
+
+    def __init__(self, caminho: str = LAYOUTS_FILE):
+        """
+        Args:
+            caminho: Arquivo JSON de layouts
+
+        Raises:
+            ValueError, OSError: Se a primeira leitura falhar
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._assinatura = None
+        self._indice: Optional[LayoutIndex] = None
+        self.recargas = 0
+        self.erro_recarga: Optional[str] = None
+        self.current()
+
+    def _carregar(self) -> LayoutIndex:
+        with open(self.caminho, encoding='utf-8') as arquivo:
+            return parse_layouts(json.load(arquivo))
+
+    def current(self) -> LayoutIndex:
+        """
+        Índice atual; relê o arquivo se a data de modificação ou o tamanho mudaram.
+
+        Um índice devolvido nunca muda: quem o usa (um PDFProcessor, por exemplo)
+        não vê uma recarga no meio do processamento.
+        """
+        try:
+            estado = os.stat(self.caminho)
+            assinatura = (estado.st_mtime_ns, estado.st_size)
+        except OSError as e:
+            if self._indice is None:
+                raise
+            self.erro_recarga = str(e)
+            return self._indice
+        if assinatura == self._assinatura:
+            return self._indice
+        with self._lock:
+            if assinatura != self._assinatura:
+                try:
+                    indice = self._carregar()
+                except (OSError, ValueError, TypeError) as e:
+                    if self._indice is None:
+                        raise ValueError(f"Arquivo de layouts inválido ({self.caminho}): {e}") from e
+                    self.erro_recarga = str(e)
+                else:
+                    if self._indice is not None:
+                        self.recargas += 1
+                    self._indice, self.erro_recarga = indice, None
+                self._assinatura = assinatura
+        return self._indice
+
+
+# Registros já abertos no processo, por caminho
+_registros: Dict[str, LayoutRegistry] = {}
+_lock_registros = threading.Lock()
+
+
+def get_registry(caminho: Optional[str] = None) -> LayoutRegistry:
+    """Registro (compartilhado no processo) do arquivo de layouts; None usa o arquivo padrão."""
+    caminho = os.fspath(caminho) if caminho else LAYOUTS_FILE
+    with _lock_registros:
+        if caminho not in _registros:
+            _registros[caminho] = LayoutRegistry(caminho)
+        return _registros[caminho]
@@ -37,6 +37,11 @@ def validar_dados_peca(dados):
     Valida se todos os campos obrigatórios estão preenchidos.
     Retorna (True, None) se válido, (False, mensagem_erro) se inválido.
     """
+    # Pares que falharam no processamento (prazo excedido, worker encerrado, DXF ou PDF inválido)
+    status = dados.get("Status", "")
+    if isinstance(status, str) and status.startswith("erro"):
+        return False, status
+    
     campos_obrigatorios = ["Nome", "Material", "Espessura", "PerimetroMm", "TempoCorteSegundos"]
     
     for campo in campos_obrigatorios:
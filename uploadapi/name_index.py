@@ -0,0 +1,83 @@
+"""
+Índice de nomes para o pareamento PDF/DXF.
+
+O DXF de uma peça traz no nome o nome base do PDF do desenho ("1234.pdf" ->
+"1234_a.dxf", "1234-corte.dxf"). Em vez de testar cada nome base contra cada
+DXF (O(D×P) buscas de substring), os nomes base são reunidos em um autômato de
+Aho-Corasick: cada nome de DXF é percorrido uma única vez, em tempo linear no
+seu tamanho, e todas as ocorrências de nomes base são encontradas.
+
+Quando mais de um nome base ocorre no nome do DXF (um é prefixo do outro,
+como "1234" e "12345"), vale o mais longo; entre nomes do mesmo tamanho, o
+que começa antes. O resultado não depende da ordem dos arquivos no upload.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class NameMatcher:
+    """Autômato de Aho-Corasick sobre um conjunto de nomes."""
+
+    def __init__(self, nomes: Iterable[str]):
+        """
+        Args:
+            nomes: Nomes procurados (nomes vazios são ignorados)
+        """
+        # Nó 0 é a raiz; cada nó tem transições, link de falha e o nome que termina nele
+        self._filhos: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._nome: List[Optional[str]] = [None]
+        # Nó mais próximo, pela cadeia de falhas, em que termina algum nome
+        self._saida: List[int] = [0]
+        for nome in nomes:
+            if nome:
+                self._inserir(nome)
+        self._ligar()
+
+    def _inserir(self, nome: str):
+        no = 0
+        for caractere in nome:
+            proximo = self._filhos[no].get(caractere)
+            if proximo is None:
+                proximo = len(self._filhos)
+                self._filhos.append({})
+                self._falha.append(0)
+                self._nome.append(None)
+                self._saida.append(0)
+                self._filhos[no][caractere] = proximo
+            no = proximo
+        self._nome[no] = nome
+
+    def _ligar(self):
+        """Links de falha e de saída, em largura a partir da raiz."""
+        fila = deque(self._filhos[0].values())
+        while fila:
+            no = fila.popleft()
+            for caractere, filho in self._filhos[no].items():
+                falha = self._falha[no]
+                while falha and caractere not in self._filhos[falha]:
+                    falha = self._falha[falha]
+                alvo = self._falha[filho] = self._filhos[falha].get(caractere, 0)
+                self._saida[filho] = alvo if self._nome[alvo] is not None else self._saida[alvo]
+                fila.append(filho)
+
+    def longest_match(self, texto: str) -> Optional[str]:
+        """
+        Nome mais longo contido em `texto` (entre os do mesmo tamanho, o que começa antes).
+
+        Returns:
+            O nome encontrado, ou None se nenhum nome ocorre no texto
+        """
+        melhor = None
+        no = 0
+        for caractere in texto:
+            while no and caractere not in self._filhos[no]:
+                no = self._falha[no]
+            no = self._filhos[no].get(caractere, 0)
+            # O nome mais longo que termina aqui é o do próprio nó ou o da saída;
+            # o texto é percorrido da esquerda para a direita, então, entre nomes
+            # do mesmo tamanho, fica o primeiro encontrado
+            candidato = no if self._nome[no] is not None else self._saida[no]
+            if candidato and (melhor is None or len(self._nome[candidato]) > len(melhor)):
+                melhor = self._nome[candidato]
+        return melhor
@@ -1,88 +1,226 @@
+import os
+import time
 import fitz
-from typing import Dict, Optional
-
-# Estrutura de layouts de PDF e coordenadas dos campos
-PDF_LAYOUTS = {
-    "A1_SECURITY": {
-        "nome": fitz.Rect(2027.24, 1523, 2179, 1540),
-        "codigo": fitz.Rect(2193, 1607, 2230, 1621),
-        "material": fitz.Rect(2026.68, 1639, 2160, 1652),
-        "espessura": fitz.Rect(2198, 1638, 2228, 1655),
-    },
-    "A2_SECURITY": {
-        "nome": fitz.Rect(1334, 1038, 1530, 1055),
-        "codigo": fitz.Rect(1500, 1123, 1540, 1140),
-        "material": fitz.Rect(1335, 1154, 1470, 1170),
-        "espessura": fitz.Rect(1500, 1155, 1540, 1170),
-    },
-    "A3_SECURITY": {
-        "nome": fitz.Rect(841, 690, 1045, 708),
-        "codigo": fitz.Rect(1005, 774, 1048, 792),
-        "material": fitz.Rect(840, 805, 1000, 820),
-        "espessura": fitz.Rect(1005, 805, 1048, 820),
-    },
-    "A4_SECURITY": {
-        "nome": fitz.Rect(471, 540, 615, 550),
-        "codigo": fitz.Rect(760, 560, 795, 570),
-        "material": fitz.Rect(620, 540, 720, 550),
-        "espessura": fitz.Rect(725, 540, 760, 550),
-    },
-    # Adicione outros layouts conforme necessário
-}
+import numpy as np
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from .layout_registry import LayoutRegistry, PDFLayout, get_registry
 
 class PDFProcessor:
-    def __init__(self, pdf_path: str, pdf_name: str, margin: float = 5.0):
-        self.pdf_path = pdf_path
+    """
+    Extrai os campos do carimbo de um PDF.
+
+    O texto de cada página é extraído uma única vez, no nível de palavras
+    (get_text("words")), e guardado no processador; a detecção do layout e a
+    leitura de cada campo são respondidas por interseção de retângulos sobre
+    essas palavras, sem novas passadas pela lista de exibição da página. O
+    tempo de cada etapa fica em `tempos`.
+
+    Os layouts vêm do registro (ver layout_registry): o índice vigente na
+    criação do processador é usado até o fim, mesmo que o arquivo seja relido.
+
+    Quando o tamanho da página basta para identificar o layout, só o texto
+    do carimbo (a união dos retângulos dos campos) é extraído; em desenhos
+    com muito texto fora do carimbo (cotas, notas) é a maior parte do custo.
+    """
+
+    def __init__(self, pdf: Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO], pdf_name: str,
+                 margin: float = 5.0, title_block_only: bool = True, layouts: Optional[LayoutRegistry] = None):
+        """
+        Args:
+            pdf: Caminho do arquivo, conteúdo em memória (bytes, bytearray,
+                memoryview) ou stream binário; o conteúdo em memória é aberto
+                direto pelo MuPDF, sem arquivo temporário
+            pdf_name: Nome do arquivo (para mensagens)
+            margin: Tolerância (pt) ao redor dos campos do layout
+            title_block_only: Se True, tenta identificar o layout pelo tamanho
+                da página e extrair só o texto do carimbo antes de recorrer à
+                página inteira
+            layouts: Registro de layouts; None usa o arquivo padrão (layouts.json)
+        """
+        if isinstance(pdf, (str, os.PathLike)):
+            self.pdf_path, self._conteudo = pdf, None
+        else:
+            self.pdf_path, self._conteudo = None, pdf if isinstance(pdf, (bytes, bytearray, memoryview)) else pdf.read()
         self.pdf_name = pdf_name
         self.margin = margin
+        self.title_block_only = title_block_only
+        self.layouts = (layouts or get_registry()).current()
         self.layout = None
         self.page = None
         self.doc = None
+        # Palavras (e seus retângulos, como array) de cada página e região já extraídas
+        self._palavras: Dict[tuple, List[tuple]] = {}
+        self._caixas: Dict[tuple, np.ndarray] = {}
+        # Região da página de onde o texto é extraído (None: página inteira)
+        self._regiao: Optional[fitz.Rect] = None
+        # Segundos gastos em cada etapa: abrir, texto, layout, campos
+        self.tempos: Dict[str, float] = {}
+
+    def _open(self) -> fitz.Document:
+        if self._conteudo is not None:
+            return fitz.open(stream=self._conteudo, filetype='pdf')
+        return fitz.open(self.pdf_path)
+
+    def _open_first_page(self):
+        if self.doc is None:
+            inicio = time.perf_counter()
+            self.doc = self._open()
+            self.page = self.doc.load_page(0)
+            self._cronometrar('abrir', inicio)
+
+    def _cronometrar(self, etapa: str, inicio: float):
+        self.tempos[etapa] = self.tempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+    def words(self, pagina: int = 0, regiao: Optional[fitz.Rect] = None) -> List[tuple]:
+        """
+        Palavras da página, na ordem de leitura, extraídas uma única vez.
+
+        Args:
+            pagina: Número da página
+            regiao: Se informada, só o texto que cruza esta região é extraído
+
+        Returns:
+            Lista de tuplas (x0, y0, x1, y1, texto, bloco, linha, palavra) do get_text("words")
+        """
+        chave = (pagina, tuple(regiao) if regiao is not None else None)
+        if chave not in self._palavras:
+            inicio = time.perf_counter()
+            page = self.page if pagina == 0 and self.page is not None else self.doc.load_page(pagina)
+            palavras = page.get_text('words', clip=regiao)
+            self._palavras[chave] = palavras
+            self._caixas[chave] = np.array([palavra[:4] for palavra in palavras], dtype=np.float64).reshape(-1, 4)
+            self._cronometrar('texto', inicio)
+        return self._palavras[chave]
+
+    def text_in_rect(self, rect: fitz.Rect, pagina: int = 0) -> str:
+        """
+        Texto das palavras cujo retângulo cruza `rect`, linha a linha, separado por espaços.
+
+        Diferente do get_text("text", clip=...), palavras que cruzam a borda
+        do retângulo entram inteiras.
+        """
+        palavras = self.words(pagina, self._regiao)
+        caixas = self._caixas[(pagina, tuple(self._regiao) if self._regiao is not None else None)]
+        dentro = np.flatnonzero((caixas[:, 0] < rect.x1) & (caixas[:, 2] > rect.x0) &
+                                (caixas[:, 1] < rect.y1) & (caixas[:, 3] > rect.y0))
+        selecionadas = sorted((palavras[i] for i in dentro), key=lambda palavra: palavra[5:8])
+        return ' '.join(palavra[4] for palavra in selecionadas)
+
+    def _has_keyword(self, palavras: List[tuple], chave: str) -> bool:
+        """Indica se alguma linha contém as palavras de `chave` em sequência."""
+        linhas: Dict[tuple, List[str]] = {}
+        for palavra in palavras:
+            linhas.setdefault(palavra[5:7], []).append(palavra[4])
+        chave = f' {chave} '
+        return any(chave in f" {' '.join(textos)} " for textos in linhas.values())
+
+    def _candidates(self) -> List[PDFLayout]:
+        rect = self.page.rect
+        return self.layouts.candidates(rect.width, rect.height, self.page.rotation)
 
     def detect_layout(self) -> Optional[str]:
-        """Detecta o layout do PDF com base nas dimensões e textos-chave."""
-        self.doc = fitz.open(self.pdf_path)
-        self.page = self.doc.load_page(0)
-        text = self.page.get_text('text')
-        width = self.page.rect.width
-        # Lógica simplificada baseada no código original
-        if 'S   E   C   U   R   I   T   Y' in text:
-            if width > 2000:
-                return 'A1_SECURITY'
-            elif 1300 < width < 2000:
-                return 'A2_SECURITY'
-            elif 870 < width < 1200:
-                return 'A3_SECURITY'
-            elif width < 840:
-                return 'A4_SECURITY'
-        # Adicione outras regras conforme necessário
-        return None
+        """
+        Detecta o layout do PDF com base nas dimensões e textos-chave.
+
+        Os layouts com as dimensões da página saem do índice do registro; o
+        primeiro cuja chave aparece no texto (ou que não tem chave) é o layout.
+        """
+        self._open_first_page()
+        palavras = self.words(0)
+        inicio = time.perf_counter()
+        try:
+            chaves: Dict[str, bool] = {}
+            for layout in self._candidates():
+                if layout.chave is None:
+                    return layout.nome
+                if layout.chave not in chaves:
+                    chaves[layout.chave] = self._has_keyword(palavras, layout.chave)
+                if chaves[layout.chave]:
+                    return layout.nome
+            return None
+        finally:
+            self._cronometrar('layout', inicio)
+
+    def layout_from_page_size(self) -> Optional[str]:
+        """
+        Layout deduzido só do tamanho da página, sem extrair texto.
+
+        Só há resposta quando ela é inequívoca: página sem rotação, CropBox
+        igual à MediaBox com origem em (0, 0) (as coordenadas dos campos valem
+        para a folha inteira) e exatamente um layout com aquelas dimensões,
+        cuja chave, se houver, pode ser conferida dentro do carimbo
+        (regiao_chave).
+        """
+        self._open_first_page()
+        inicio = time.perf_counter()
+        try:
+            page = self.page
+            if page.rotation or page.cropbox != page.mediabox or page.mediabox.x0 or page.mediabox.y0:
+                return None
+            candidatos = self._candidates()
+            if len(candidatos) != 1 or (candidatos[0].chave is not None and candidatos[0].regiao_chave is None):
+                return None
+            return candidatos[0].nome
+        finally:
+            self._cronometrar('layout', inicio)
+
+    def title_block_rect(self, layout: str) -> fitz.Rect:
+        """União dos retângulos dos campos e da chave do layout, expandida pela margem."""
+        regiao = self.layouts.get(layout).carimbo
+        return fitz.Rect(regiao.x0 - self.margin, regiao.y0 - self.margin,
+                         regiao.x1 + self.margin, regiao.y1 + self.margin)
 
     def extract_field(self, field: str) -> str:
         """Extrai o campo do PDF usando o layout detectado e margem de tolerância."""
-        if not self.layout or self.layout not in PDF_LAYOUTS:
+        layout = self.layouts.get(self.layout) if self.layout else None
+        if not layout:
             return ''
-        rect = PDF_LAYOUTS[self.layout].get(field)
+        rect = layout.campos.get(field)
         if not rect:
             return ''
+        inicio = time.perf_counter()
         expanded_rect = fitz.Rect(
             rect.x0 - self.margin, rect.y0 - self.margin,
             rect.x1 + self.margin, rect.y1 + self.margin
         )
-        text = self.page.get_text("text", clip=expanded_rect)
-        return text.replace('\n', ' ').strip()
+        text = self.text_in_rect(expanded_rect)
+        self._cronometrar('campos', inicio)
+        return text.strip()
 
-    def process(self) -> Dict[str, str]:
-        """Processa o PDF e retorna os campos extraídos."""
-        self.layout = self.detect_layout()
-        if not self.layout:
-            return {"erro": "Layout não reconhecido"}
-        result = {
+    def _extract_fields(self) -> Dict[str, str]:
+        return {
             "codigo": self.extract_field("codigo"),
             "nome": self.extract_field("nome"),
             "material": self.extract_field("material"),
             "espessura": self.extract_field("espessura"),
         }
-        if self.doc:
-            self.doc.close()
-        return result 
\ No newline at end of file
+
+    def process(self) -> Dict[str, str]:
+        """
+        Processa o PDF e retorna os campos extraídos.
+
+        Com title_block_only, se o tamanho da página identifica o layout, só o
+        carimbo é lido; se a chave do layout não estiver no carimbo ou ele não
+        tiver texto algum nos campos (a página não segue o layout), o PDF passa
+        pela detecção completa, pela página inteira.
+        """
+        try:
+            if self.title_block_only:
+                self.layout = self.layout_from_page_size()
+                if self.layout:
+                    self._regiao = self.title_block_rect(self.layout)
+                    palavras = self.words(0, self._regiao)
+                    chave = self.layouts.get(self.layout).chave
+                    if chave is None or self._has_keyword(palavras, chave):
+                        resultado = self._extract_fields()
+                        if any(resultado.values()):
+                            return resultado
+                    self._regiao = None
+            self.layout = self.detect_layout()
+            if not self.layout:
+                return {"erro": "Layout não reconhecido"}
+            return self._extract_fields()
+        finally:
+            if self.doc:
+                self.doc.close()
@@ -1,19 +1,37 @@
 import unittest
-from unittest.mock import Mock, patch, MagicMock, mock_open
+from unittest.mock import Mock, patch, MagicMock
 import tempfile
 import os
 import io
 import zipfile
+import tarfile
 import math
+import time
+import mmap
+import tracemalloc
+import ezdxf
+import numpy as np
 from django.test import TestCase, Client
 from django.urls import reverse
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
 from rest_framework.test import APITestCase
 from rest_framework import status
 
-from .archive_processor import ArchiveProcessor
+from .archive_processor import ArchiveProcessor, ExtractionBudget, ExtractionBudgetExceeded, _BudgetedReader
 from .dxf_processor import DXFProcessor
+from .pdf_processor import PDFProcessor
+from .layout_registry import LayoutRegistry, get_registry, parse_layouts
+from .dxf_scanner import DXFScanError, scan_entities
+from .geometry_kernel import GeometryBatch, bulge_segment_lengths
+from .layer_index import LayerIndex
+from .name_index import NameMatcher
+from .contours import ContourStats, build_contours
+from .dedup import merge_arcs, merge_segments
+from .travel import KDTree, estimate_rapid, hilbert_order, nearest_neighbour_tour, path_length
 from .views import UploadZipView
+from .integrated_processor import planejar_pareamento, montar_manifesto, processar_lote_pdfs_dxfs
+from . import worker_pool
+from .worker_pool import WorkerPool, _ping, get_pool
 from .models import PecaPrincipal, SubPeca, validar_dados_peca, validar_e_salvar_pecas_e_subpecas_do_json
 
 
@@ -25,7 +43,7 @@ class ArchiveProcessorTestCase(TestCase):
     
     def test_init(self):
         """Testa inicialização do ArchiveProcessor"""
-        self.assertEqual(self.processor.get_supported_formats(), ['.zip', '.rar'])
+        self.assertEqual(self.processor.get_supported_formats()[:2], ['.zip', '.rar'])
     
     def test_validate_file_format_zip(self):
         """Testa validação de arquivo ZIP"""
@@ -37,6 +55,11 @@ class ArchiveProcessorTestCase(TestCase):
         self.assertTrue(self.processor.validate_file_format('arquivo.rar'))
         self.assertTrue(self.processor.validate_file_format('ARQUIVO.RAR'))
     
+    def test_validate_file_format_tar(self):
+        """Testa validação de arquivos TAR comprimidos ou não"""
+        for nome in ('arquivo.tar', 'arquivo.tar.gz', 'ARQUIVO.TGZ', 'arquivo.tar.bz2', 'arquivo.tar.xz', 'arquivo.tar.zst'):
+            self.assertTrue(self.processor.validate_file_format(nome))
+    
     def test_validate_file_format_invalid(self):
         """Testa validação de arquivo inválido"""
         self.assertFalse(self.processor.validate_file_format('arquivo.txt'))
@@ -47,7 +70,8 @@ class ArchiveProcessorTestCase(TestCase):
         formats = self.processor.get_supported_formats()
         self.assertIn('.zip', formats)
         self.assertIn('.rar', formats)
-        self.assertEqual(len(formats), 2)
+        self.assertIn('.tar.gz', formats)
+        self.assertEqual(len(formats), 2 + len(ArchiveProcessor.TAR_EXTENSIONS))
     
     @patch('zipfile.ZipFile')
     def test_extract_zip_recursive(self, mock_zipfile):
@@ -194,7 +218,7 @@ class ArchiveProcessorTestCase(TestCase):
         mock_file1.__exit__ = Mock(return_value=None)
         
         mock_file2 = Mock()
-        mock_file2.read.return_value = b'nested zip content'
+        mock_file2.read.side_effect = [b'nested zip content', b'']
         mock_file2.__enter__ = Mock(return_value=mock_file2)
         mock_file2.__exit__ = Mock(return_value=None)
         
@@ -226,14 +250,14 @@ class ArchiveProcessorTestCase(TestCase):
         
         # Mock do arquivo
         mock_file = Mock()
-        mock_file.read.return_value = b'nested zip content'
+        mock_file.read.side_effect = [b'nested zip content', b'']
         mock_file.__enter__ = Mock(return_value=mock_file)
         mock_file.__exit__ = Mock(return_value=None)
         
         mock_rar.open.return_value = mock_file
         
         # Mock da extração recursiva
-        with patch.object(self.processor, '_extract_zip_recursive') as mock_recursive:
+        with patch.object(self.processor, '_iter_zip_members', return_value=iter([])) as mock_recursive:
             arquivos_extraidos = {}
             rar_bytes = io.BytesIO(b'fake rar content')
             
@@ -271,7 +295,7 @@ class ArchiveProcessorTestCase(TestCase):
         
         # Mock do arquivo
         mock_file = Mock()
-        mock_file.read.return_value = b'nested rar content'
+        mock_file.read.side_effect = [b'nested rar content', b'']
         mock_file.__enter__ = Mock(return_value=mock_file)
         mock_file.__exit__ = Mock(return_value=None)
         
@@ -316,7 +340,7 @@ class ArchiveProcessorTestCase(TestCase):
         
         # Mock do arquivo
         mock_file = Mock()
-        mock_file.read.return_value = b'nested zip content'
+        mock_file.read.side_effect = [b'nested zip content', b'']
         mock_file.__enter__ = Mock(return_value=mock_file)
         mock_file.__exit__ = Mock(return_value=None)
         
@@ -354,14 +378,14 @@ class ArchiveProcessorTestCase(TestCase):
         
         # Mock do arquivo
         mock_file = Mock()
-        mock_file.read.return_value = b'nested zip content'
+        mock_file.read.side_effect = [b'nested zip content', b'']
         mock_file.__enter__ = Mock(return_value=mock_file)
         mock_file.__exit__ = Mock(return_value=None)
         
         mock_rar.open.return_value = mock_file
         
         # Mock da extração recursiva com erro
-        with patch.object(self.processor, '_extract_zip_recursive') as mock_recursive:
+        with patch.object(self.processor, '_iter_zip_members') as mock_recursive:
             mock_recursive.side_effect = Exception("Erro na extração recursiva")
             
             arquivos_extraidos = {}
@@ -375,6 +399,610 @@ class ArchiveProcessorTestCase(TestCase):
             
             # Verifica que pelo menos tentou processar
             self.assertGreater(mock_recursive.call_count, 0)
+    
+    def _criar_zip(self, arquivos):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for nome, conteudo in arquivos.items():
+                zf.writestr(nome, conteudo)
+        return buffer.getvalue()
+    
+    def _criar_tar(self, arquivos, modo='w:gz'):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode=modo) as tf:
+            for nome, conteudo in arquivos.items():
+                info = tarfile.TarInfo(nome)
+                info.size = len(conteudo)
+                tf.addfile(info, io.BytesIO(conteudo))
+        return buffer.getvalue()
+    
+    def test_open_archive_membros_preguicosos(self):
+        """Testa que open_archive retorna membros descompactados sob demanda"""
+        aninhado = self._criar_zip({'interno.dxf': b'dxf aninhado'})
+        conteudo = self._criar_zip({
+            'grupo/peca.pdf': b'pdf',
+            'grupo/peca.dxf': b'dxf' * 100,
+            'grupo/aninhado.zip': aninhado,
+        })
+        uploaded_file = SimpleUploadedFile('teste.zip', conteudo)
+        
+        with self.processor.open_archive(uploaded_file) as membros:
+            self.assertEqual(set(membros), {'grupo/peca.pdf', 'grupo/peca.dxf', 'grupo/interno.dxf'})
+            membro = membros['grupo/peca.dxf']
+            self.assertEqual(membro.size, 300)
+            self.assertEqual(membro.crc, zipfile.crc32(b'dxf' * 100))
+            self.assertEqual(membro.read(), b'dxf' * 100)
+            self.assertEqual(membros['grupo/interno.dxf'].read(), b'dxf aninhado')
+    
+    def test_iter_archive_members(self):
+        """Testa a iteração em streaming sobre os membros do arquivo"""
+        conteudo = self._criar_zip({'a.pdf': b'pdf a', 'b.dxf': b'dxf b', 'pasta/': b''})
+        uploaded_file = SimpleUploadedFile('teste.zip', conteudo)
+        
+        lidos = {membro.path: membro.read() for membro in self.processor.iter_archive_members(uploaded_file)}
+        
+        self.assertEqual(lidos, {'a.pdf': b'pdf a', 'b.dxf': b'dxf b'})
+    
+    def test_open_archive_upload_em_disco(self):
+        """Testa leitura via mmap de upload gravado em disco pelo Django"""
+        conteudo = self._criar_zip({'grupo/peca.dxf': b'dxf em disco'})
+        uploaded_file = TemporaryUploadedFile('teste.zip', 'application/zip', len(conteudo), None)
+        uploaded_file.write(conteudo)
+        uploaded_file.seek(0)
+        
+        with patch('uploadapi.archive_processor.mmap.mmap', wraps=mmap.mmap) as mock_mmap:
+            with self.processor.open_archive(uploaded_file) as membros:
+                self.assertEqual(membros['grupo/peca.dxf'].read(), b'dxf em disco')
+            
+            mock_mmap.assert_called_once()
+        
+        uploaded_file.close()
+    
+    @patch('rarfile.RarFile')
+    def test_open_archive_rar_em_disco_usa_caminho(self, mock_rarfile):
+        """Testa que o RAR gravado em disco é aberto pelo caminho, sem cópia"""
+        mock_rarfile.return_value.__enter__.return_value.infolist.return_value = []
+        uploaded_file = TemporaryUploadedFile('teste.rar', 'application/x-rar', 0, None)
+        
+        with self.processor.open_archive(uploaded_file) as membros:
+            self.assertEqual(membros, {})
+        
+        mock_rarfile.assert_called_once_with(uploaded_file.temporary_file_path())
+        uploaded_file.close()
+    
+    def test_open_archive_extensoes_permitidas(self):
+        """Testa que membros fora da lista de extensões não são descompactados"""
+        imagem = b'png' * 1000
+        aninhado = self._criar_zip({'interno.dxf': b'dxf', 'render.jpg': b'jpg' * 10})
+        conteudo = self._criar_zip({
+            'grupo/peca.pdf': b'pdf',
+            'grupo/render.png': imagem,
+            'grupo/modelo.step': b'step',
+            'grupo/aninhado.zip': aninhado,
+        })
+        uploaded_file = SimpleUploadedFile('teste.zip', conteudo)
+        processor = ArchiveProcessor(allowed_extensions=['.PDF', '.dxf'])
+        
+        with processor.open_archive(uploaded_file) as membros:
+            self.assertEqual(set(membros), {'grupo/peca.pdf', 'grupo/interno.dxf'})
+        
+        self.assertEqual(processor.estatisticas['membros_selecionados'], 2)
+        self.assertEqual(processor.estatisticas['membros_ignorados'], 3)
+        self.assertEqual(processor.estatisticas['bytes_ignorados'], len(imagem) + len(b'step') + 30)
+    
+    def test_open_archive_paralelo(self):
+        """Testa a extração paralela de ZIP (com ZIP aninhado) em disco"""
+        aninhado = self._criar_zip({f'interno_{i}.dxf': f'dxf {i}'.encode() for i in range(5)})
+        arquivos = {f'grupo/peca_{i}.pdf': f'pdf {i}'.encode() * 50 for i in range(20)}
+        arquivos['grupo/render.png'] = b'png'
+        arquivos['grupo/aninhado.zip'] = aninhado
+        conteudo = self._criar_zip(arquivos)
+        uploaded_file = TemporaryUploadedFile('teste.zip', 'application/zip', len(conteudo), None)
+        uploaded_file.write(conteudo)
+        uploaded_file.seek(0)
+        processor = ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS, parallel_workers=2)
+        
+        from concurrent.futures import ProcessPoolExecutor
+        with patch('uploadapi.archive_processor.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as mock_pool, \
+                processor.open_archive(uploaded_file) as membros:
+            # Fork de um servidor com threads pode herdar locks presos
+            self.assertEqual(mock_pool.call_args.kwargs['mp_context'].get_start_method(), 'spawn')
+            self.assertEqual(len(membros), 25)
+            self.assertEqual(membros['grupo/peca_7.pdf'].read(), b'pdf 7' * 50)
+            self.assertEqual(membros['grupo/interno_3.dxf'].read(), b'dxf 3')
+            self.assertEqual(membros['grupo/interno_3.dxf'].crc, zipfile.crc32(b'dxf 3'))
+        
+        self.assertEqual(processor.estatisticas['membros_ignorados'], 1)
+        uploaded_file.close()
+    
+    def test_partition_members(self):
+        """Testa a divisão dos membros em lotes disjuntos e equilibrados"""
+        membros = [(0, 100), (1, 10), (2, 90), (3, 20), (4, 5)]
+        
+        lotes = ArchiveProcessor._partition_members(membros, 2)
+        
+        self.assertEqual(sorted(i for lote in lotes for i in lote), [0, 1, 2, 3, 4])
+        self.assertEqual(len(lotes), 2)
+        self.assertEqual(ArchiveProcessor._partition_members([], 4), [])
+    
+    def test_budget_profundidade_maxima(self):
+        """Testa que aninhamento além de max_depth interrompe a extração"""
+        nivel2 = self._criar_zip({'fundo.dxf': b'dxf'})
+        nivel1 = self._criar_zip({'nivel2.zip': nivel2})
+        conteudo = self._criar_zip({'nivel1.zip': nivel1})
+        processor = ArchiveProcessor(budget=ExtractionBudget(max_depth=1))
+        
+        with self.assertRaises(ExtractionBudgetExceeded) as context:
+            with processor.open_archive(SimpleUploadedFile('teste.zip', conteudo)):
+                pass
+        
+        self.assertEqual(context.exception.limite, 'max_depth')
+        self.assertEqual(context.exception.to_dict()['valor'], 2)
+    
+    def test_budget_membros_e_bytes_declarados(self):
+        """Testa limites de membros e de bytes declarados antes da descompactação"""
+        conteudo = self._criar_zip({f'peca_{i}.dxf': b'x' * 100 for i in range(5)})
+        
+        processor = ArchiveProcessor(budget=ExtractionBudget(max_members=3))
+        with self.assertRaises(ExtractionBudgetExceeded) as context:
+            list(processor.iter_archive_members(SimpleUploadedFile('teste.zip', conteudo)))
+        self.assertEqual(context.exception.limite, 'max_members')
+        
+        processor = ArchiveProcessor(budget=ExtractionBudget(max_total_bytes=250))
+        with patch('zipfile.ZipFile.open') as mock_open_membro:
+            with self.assertRaises(ExtractionBudgetExceeded) as context:
+                list(processor.iter_archive_members(SimpleUploadedFile('teste.zip', conteudo)))
+            mock_open_membro.assert_not_called()
+        self.assertEqual(context.exception.limite, 'max_total_bytes')
+        self.assertEqual(context.exception.caminho, 'peca_2.dxf')
+    
+    def test_budget_taxa_de_compressao(self):
+        """Testa a rejeição de membros com taxa de compressão suspeita (zip-bomb)"""
+        conteudo = self._criar_zip({'bomba.dxf': b'\0' * (4 * 1024 * 1024)})
+        processor = ArchiveProcessor(budget=ExtractionBudget(max_compression_ratio=100))
+        
+        with self.assertRaises(ExtractionBudgetExceeded) as context:
+            list(processor.iter_archive_members(SimpleUploadedFile('teste.zip', conteudo)))
+        
+        self.assertEqual(context.exception.limite, 'max_compression_ratio')
+    
+    def test_budget_leitura_em_streaming(self):
+        """Testa que bytes lidos além do declarado interrompem a leitura"""
+        budget = ExtractionBudget(max_total_bytes=10 * 1024 * 1024)
+        leitor = _BudgetedReader(io.BytesIO(b'a' * 5000), budget, 'peca.dxf', 1000)
+        
+        with self.assertRaises(ExtractionBudgetExceeded) as context:
+            leitor.read()
+        
+        self.assertEqual(context.exception.limite, 'tamanho_declarado')
+        
+        budget = ExtractionBudget(max_total_bytes=100)
+        leitor = _BudgetedReader(io.BytesIO(b'a' * 500), budget, 'peca.dxf', 500)
+        with self.assertRaises(ExtractionBudgetExceeded):
+            leitor.read(200)
+    
+    @patch('uploadapi.archive_processor.shutil.which', return_value='/usr/bin/unrar')
+    @patch('uploadapi.archive_processor.subprocess.run')
+    @patch('rarfile.RarFile')
+    def test_open_archive_rar_em_lote(self, mock_rarfile, mock_run, mock_which):
+        """Testa que o RAR é extraído por uma única execução do unrar, com a lista e a cópia do RAR fora do destino"""
+        infos = []
+        for nome in ('grupo/a.pdf', 'grupo/a.dxf', 'grupo/b.dxf', 'grupo/render.png'):
+            info = Mock()
+            info.filename = nome
+            info.file_size = len(nome)
+            info.compress_size = len(nome)
+            info.CRC = 0
+            info.is_dir.return_value = False
+            infos.append(info)
+        mock_rarfile.return_value.__enter__.return_value.infolist.return_value = infos
+        
+        def extrair(comando, **kwargs):
+            destino = comando[-1]
+            self.assertEqual(os.listdir(destino), [])
+            with open(comando[-3][len('-n@'):], encoding='utf-8') as lista:
+                nomes = lista.read().split('\n')
+            for nome in nomes:
+                os.makedirs(os.path.dirname(os.path.join(destino, nome)), exist_ok=True)
+                with open(os.path.join(destino, nome), 'wb') as arquivo:
+                    arquivo.write(nome.encode())
+            return Mock(returncode=0)
+        mock_run.side_effect = extrair
+        
+        processor = ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS, rar_bulk_extraction=True)
+        with processor.open_archive(SimpleUploadedFile('teste.rar', b'fake rar content')) as membros:
+            self.assertEqual(set(membros), {'grupo/a.pdf', 'grupo/a.dxf', 'grupo/b.dxf'})
+            self.assertEqual(membros['grupo/b.dxf'].read(), b'grupo/b.dxf')
+        
+        mock_run.assert_called_once()
+        self.assertEqual(processor.estatisticas['execucoes_unrar'], 1)
+        self.assertEqual(processor.estatisticas['membros_ignorados'], 1)
+        mock_rarfile.return_value.__enter__.return_value.open.assert_not_called()
+    
+    @patch('uploadapi.archive_processor.shutil.which', return_value='/usr/bin/unrar')
+    @patch('uploadapi.archive_processor.subprocess.run')
+    @patch('rarfile.RarFile')
+    def test_open_archive_rar_em_lote_nome_com_curinga(self, mock_rarfile, mock_run, mock_which):
+        """Testa que membros com curingas do unrar no nome ficam fora da lista e são lidos um a um"""
+        infos = []
+        for nome in ('grupo/x*y.dxf', 'grupo/p[1].pdf', 'grupo/a?.dxf', 'grupo/xAy.dxf'):
+            info = Mock()
+            info.filename = nome
+            info.file_size = len(nome)
+            info.compress_size = len(nome)
+            info.CRC = 0
+            info.is_dir.return_value = False
+            infos.append(info)
+        rf = mock_rarfile.return_value.__enter__.return_value
+        rf.infolist.return_value = infos
+        rf.open.side_effect = lambda info: io.BytesIO(b'avulso')
+        listas = []
+        
+        def extrair(comando, **kwargs):
+            destino = comando[-1]
+            with open(comando[-3][len('-n@'):], encoding='utf-8') as lista:
+                listas.append(lista.read().split('\n'))
+            for nome in listas[-1]:
+                os.makedirs(os.path.dirname(os.path.join(destino, nome)), exist_ok=True)
+                with open(os.path.join(destino, nome), 'wb') as arquivo:
+                    arquivo.write(nome.encode())
+            return Mock(returncode=0)
+        mock_run.side_effect = extrair
+        
+        processor = ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS, rar_bulk_extraction=True)
+        with processor.open_archive(SimpleUploadedFile('teste.rar', b'fake rar content')) as membros:
+            self.assertEqual(set(membros), {'grupo/x*y.dxf', 'grupo/p[1].pdf', 'grupo/a?.dxf', 'grupo/xAy.dxf'})
+            self.assertEqual(membros['grupo/x*y.dxf'].read(), b'avulso')
+            self.assertEqual(membros['grupo/xAy.dxf'].read(), b'grupo/xAy.dxf')
+        
+        # "grupo/x*y.dxf" na lista também extrairia "grupo/xAy.dxf"
+        self.assertEqual(listas, [['grupo/xAy.dxf']])
+    
+    def test_open_archive_tar_gz_em_streaming(self):
+        """Testa leitura de TAR.GZ em uma única passada, com ZIP e TAR aninhados"""
+        zip_aninhado = self._criar_zip({'interno.dxf': b'dxf do zip'})
+        tar_aninhado = self._criar_tar({'sub/outro.pdf': b'pdf do tar'}, modo='w')
+        conteudo = self._criar_tar({
+            'grupo/peca.pdf': b'pdf',
+            'grupo/peca.dxf': b'dxf' * 100,
+            'grupo/leia.txt': b'ignorado',
+            'grupo/aninhado.zip': zip_aninhado,
+            'grupo/aninhado.tar': tar_aninhado,
+        })
+        upload = SimpleUploadedFile('teste.tar.gz', conteudo)
+        # O upload é lido sequencialmente, sem reposicionamento
+        upload.file.seek = Mock(side_effect=AssertionError('seek não permitido'))
+        processor = ArchiveProcessor(allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS, budget=ExtractionBudget())
+        processor._open_source = Mock(return_value=upload.file)
+        
+        with processor.open_archive(upload) as membros:
+            self.assertEqual(set(membros), {'grupo/peca.pdf', 'grupo/peca.dxf', 'grupo/interno.dxf', 'grupo/sub/outro.pdf'})
+            membro = membros['grupo/peca.dxf']
+            self.assertEqual(membro.size, 300)
+            self.assertEqual(membro.crc, zipfile.crc32(b'dxf' * 100))
+            self.assertEqual(membro.read(), b'dxf' * 100)
+            self.assertEqual(membro.read(), b'dxf' * 100)
+            self.assertEqual(membros['grupo/interno.dxf'].read(), b'dxf do zip')
+            self.assertEqual(membros['grupo/sub/outro.pdf'].read(), b'pdf do tar')
+        
+        self.assertEqual(processor.estatisticas['membros_ignorados'], 1)
+        self.assertEqual(processor.estatisticas['bytes_ignorados'], len(b'ignorado'))
+        # O TAR não informa tamanhos compactados por membro
+        self.assertEqual(processor.estatisticas['bytes_compactados_ignorados'], 0)
+    
+    def test_open_archive_tar_membros_em_disco(self):
+        """Testa que os membros selecionados de um TAR não ficam em memória enquanto o TAR é lido"""
+        upload = SimpleUploadedFile('teste.tar', self._criar_tar(
+            {f'grupo/peca{i}.dxf': os.urandom(1024 * 1024) for i in range(16)}, modo='w'))
+        
+        tracemalloc.start()
+        try:
+            with self.processor.open_archive(upload) as membros:
+                retido, _ = tracemalloc.get_traced_memory()
+                self.assertEqual(len(membros['grupo/peca15.dxf'].read()), 1024 * 1024)
+        finally:
+            tracemalloc.stop()
+        
+        self.assertEqual(len(membros), 16)
+        # Em SpooledTemporaryFile de 8 MB os 16 membros ficariam em memória até o fim do upload
+        self.assertLess(retido, 1024 * 1024)
+    
+    def test_open_archive_tar_aninhado_em_zip(self):
+        """Testa TAR.XZ aninhado em ZIP e limite de profundidade para TARs"""
+        tar_aninhado = self._criar_tar({'peca.dxf': b'dxf'}, modo='w:xz')
+        conteudo = self._criar_zip({'pasta/pecas.tar.xz': tar_aninhado})
+        
+        with self.processor.open_archive(SimpleUploadedFile('teste.zip', conteudo)) as membros:
+            self.assertEqual(membros['pasta/peca.dxf'].read(), b'dxf')
+        
+        processor = ArchiveProcessor(budget=ExtractionBudget(max_depth=0))
+        with self.assertRaises(ExtractionBudgetExceeded) as context:
+            with processor.open_archive(SimpleUploadedFile('teste.zip', conteudo)):
+                pass
+        self.assertEqual(context.exception.limite, 'max_depth')
+    
+    def test_open_archive_tar_invalido(self):
+        """Testa erro ao abrir TAR corrompido"""
+        with self.assertRaises(Exception) as context:
+            with self.processor.open_archive(SimpleUploadedFile('teste.tar.gz', b'nao e tar')):
+                pass
+        
+        self.assertIn('Arquivo TAR inválido ou corrompido', str(context.exception))
+    
+    def test_open_archive_tar_zst(self):
+        """Testa leitura de TAR.ZST quando o pacote zstandard está instalado"""
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest('zstandard não instalado')
+        conteudo = zstandard.ZstdCompressor().compress(self._criar_tar({'peca.pdf': b'pdf'}, modo='w'))
+        
+        with self.processor.open_archive(SimpleUploadedFile('teste.tar.zst', conteudo)) as membros:
+            self.assertEqual(membros['peca.pdf'].read(), b'pdf')
+    
+    def test_iter_archive_members_invalid_format(self):
+        """Testa iteração de formato inválido"""
+        uploaded_file = SimpleUploadedFile('teste.txt', b'conteudo')
+        
+        with self.assertRaises(Exception) as context:
+            list(self.processor.iter_archive_members(uploaded_file))
+        
+        self.assertIn('Formato de arquivo não suportado', str(context.exception))
+
+
+class PDFProcessorTestCase(TestCase):
+    """Testes para a extração dos campos do PDF"""
+    
+    def _pdf_a4(self, campos=None, chave=(100, 100)):
+        """PDF de uma página no layout A4_SECURITY com os campos nos retângulos do layout e a chave em `chave`."""
+        import fitz
+        campos = campos or {'nome': 'SUPORTE', 'codigo': 'SP01', 'material': 'Aço', 'espessura': '2'}
+        posicoes = {'nome': (472, 548), 'codigo': (761, 568), 'material': (621, 548), 'espessura': (726, 548)}
+        pdf = fitz.open()
+        pagina = pdf.new_page(width=830, height=600)
+        if chave:
+            pagina.insert_text(chave, 'S   E   C   U   R   I   T   Y', fontsize=7)
+        for campo, texto in campos.items():
+            pagina.insert_text(posicoes[campo], texto, fontsize=7)
+        return pdf.tobytes()
+    
+    def _registro_sem_regiao_chave(self):
+        """Registro com os layouts padrão sem a região da chave do A4_SECURITY."""
+        import json
+        from .layout_registry import LAYOUTS_FILE
+        with open(LAYOUTS_FILE, encoding='utf-8') as arquivo:
+            definicao = json.load(arquivo)
+        for layout in definicao['layouts']:
+            if layout['nome'] == 'A4_SECURITY':
+                del layout['regiao_chave']
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as arquivo:
+            json.dump(definicao, arquivo)
+        self.addCleanup(os.unlink, arquivo.name)
+        return LayoutRegistry(arquivo.name)
+    
+    def test_process_bytes_buffer_e_caminho(self):
+        """Testa que bytes, stream e caminho dão os mesmos campos"""
+        conteudo = self._pdf_a4()
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as arquivo:
+            arquivo.write(conteudo)
+        try:
+            resultados = [PDFProcessor(fonte, 'SP01.pdf').process()
+                          for fonte in (conteudo, memoryview(conteudo), io.BytesIO(conteudo), arquivo.name)]
+        finally:
+            os.unlink(arquivo.name)
+        
+        self.assertEqual(resultados[0], {'codigo': 'SP01', 'nome': 'SUPORTE', 'material': 'Aço', 'espessura': '2'})
+        self.assertTrue(all(resultado == resultados[0] for resultado in resultados))
+    
+    def test_process_layout_nao_reconhecido(self):
+        """Testa o erro de layout e o fechamento do documento"""
+        import fitz
+        pdf = fitz.open()
+        pdf.new_page()
+        processor = PDFProcessor(pdf.tobytes(), 'X.pdf')
+        
+        self.assertEqual(processor.process(), {'erro': 'Layout não reconhecido'})
+        self.assertTrue(processor.doc.is_closed)
+    
+    def test_uma_extracao_de_texto_por_pagina(self):
+        """Testa que layout e campos saem de uma única extração de palavras, com tempo por etapa"""
+        import fitz
+        processor = PDFProcessor(self._pdf_a4(), 'SP01.pdf', title_block_only=False)
+        
+        with patch.object(fitz.Page, 'get_text', autospec=True, side_effect=fitz.Page.get_text) as mock_get_text:
+            resultado = processor.process()
+        
+        self.assertEqual(resultado['nome'], 'SUPORTE')
+        self.assertEqual([chamada.args[1] for chamada in mock_get_text.call_args_list], ['words'])
+        self.assertEqual(set(processor.tempos), {'abrir', 'texto', 'layout', 'campos'})
+    
+    def test_campo_por_intersecao(self):
+        """Testa palavras em várias linhas, fora do retângulo e cruzando a borda"""
+        import fitz
+        pdf = fitz.open()
+        pagina = pdf.new_page()
+        pagina.insert_text((100, 100), 'CHAPA DE', fontsize=8)
+        pagina.insert_text((100, 110), 'FIXAÇÃO', fontsize=8)
+        pagina.insert_text((300, 100), 'FORA', fontsize=8)
+        pagina.insert_text((190, 110), 'BORDA', fontsize=8)
+        processor = PDFProcessor(pdf.tobytes(), 'X.pdf')
+        processor.doc = fitz.open(stream=processor._conteudo, filetype='pdf')
+        processor.page = processor.doc.load_page(0)
+        
+        self.assertEqual(processor.text_in_rect(fitz.Rect(95, 90, 200, 115)), 'CHAPA DE FIXAÇÃO BORDA')
+        self.assertEqual(processor.text_in_rect(fitz.Rect(95, 90, 150, 100)), 'CHAPA DE')
+        self.assertEqual(processor.text_in_rect(fitz.Rect(0, 0, 50, 50)), '')
+    
+    def test_layout_exige_letras_espacadas(self):
+        """Testa que SECURITY só identifica o layout como letras espaçadas em sequência na mesma linha"""
+        import fitz
+        for texto, esperado in (('S   E   C   U   R   I   T   Y', 'A4_SECURITY'), ('SECURITY', None), ('S E C U R I', None)):
+            pdf = fitz.open()
+            pdf.new_page(width=830, height=600).insert_text((100, 100), texto, fontsize=8)
+            processor = PDFProcessor(pdf.tobytes(), 'X.pdf')
+            self.assertEqual(processor.detect_layout(), esperado, texto)
+            processor.doc.close()
+    
+    def test_carimbo_pelo_tamanho_da_pagina(self):
+        """Testa que, com os layouts padrão, o layout vem do tamanho da página e só o texto do carimbo é extraído"""
+        import fitz
+        conteudo = self._pdf_a4(chave=(480, 568))
+        processor = PDFProcessor(conteudo, 'SP01.pdf')
+        self.assertEqual(processor.layout_from_page_size(), 'A4_SECURITY')
+        
+        with patch.object(fitz.Page, 'get_text', autospec=True, side_effect=fitz.Page.get_text) as mock_get_text:
+            resultado = processor.process()
+        
+        self.assertEqual(resultado, PDFProcessor(conteudo, 'SP01.pdf', title_block_only=False).process())
+        self.assertEqual(resultado['codigo'], 'SP01')
+        self.assertEqual(mock_get_text.call_count, 1)
+        self.assertEqual(mock_get_text.call_args.kwargs['clip'], processor.title_block_rect('A4_SECURITY'))
+        # Campos (471, 540, 795, 570) e chave (475, 558, 600, 572), expandidos pela margem
+        self.assertEqual(processor.title_block_rect('A4_SECURITY'), fitz.Rect(466, 535, 800, 577))
+    
+    def test_carimbo_sem_chave_usa_deteccao_completa(self):
+        """Testa que uma página do mesmo tamanho sem a chave no carimbo passa pela detecção completa"""
+        import fitz
+        for chave, esperado in ((None, {'erro': 'Layout não reconhecido'}), ((100, 100), 'SP01')):
+            with self.subTest(chave=chave):
+                processor = PDFProcessor(self._pdf_a4(chave=chave), 'SP01.pdf')
+                
+                with patch.object(fitz.Page, 'get_text', autospec=True, side_effect=fitz.Page.get_text) as mock_get_text:
+                    resultado = processor.process()
+                
+                self.assertEqual(resultado if chave is None else resultado['codigo'], esperado)
+                self.assertEqual([chamada.kwargs['clip'] for chamada in mock_get_text.call_args_list],
+                                 [processor.title_block_rect('A4_SECURITY'), None])
+    
+    def test_chave_sem_regiao_usa_pagina_inteira(self):
+        """Testa que um layout com chave e sem regiao_chave não é deduzido só pelo tamanho"""
+        registro = self._registro_sem_regiao_chave()
+        processor = PDFProcessor(self._pdf_a4(), 'SP01.pdf', layouts=registro)
+        
+        self.assertIsNone(processor.layout_from_page_size())
+        self.assertEqual(processor.process()['codigo'], 'SP01')
+    
+    def test_tamanho_ambiguo_usa_pagina_inteira(self):
+        """Testa que página girada, recortada ou de largura sem layout não identifica o layout pelo tamanho"""
+        import fitz
+        for ajuste in (lambda p: p.set_rotation(90), lambda p: p.set_cropbox(fitz.Rect(10, 10, 820, 590)), None):
+            pdf = fitz.open(stream=self._pdf_a4(), filetype='pdf')
+            if ajuste:
+                ajuste(pdf[0])
+            else:
+                pdf[0].set_mediabox(fitz.Rect(0, 0, 850, 600))
+            processor = PDFProcessor(pdf.tobytes(), 'SP01.pdf')
+            self.assertIsNone(processor.layout_from_page_size())
+            processor.doc.close()
+    
+    def test_carimbo_vazio_usa_deteccao_completa(self):
+        """Testa que um carimbo sem texto leva à detecção pela página inteira"""
+        import fitz
+        pdf = fitz.open()
+        pagina = pdf.new_page(width=830, height=600)
+        pagina.insert_text((100, 100), 'SP01 - Aço 2 mm', fontsize=8)
+        pagina.insert_text((480, 568), 'S   E   C   U   R   I   T   Y', fontsize=7)
+        processor = PDFProcessor(pdf.tobytes(), 'SP01.pdf')
+        
+        with patch.object(fitz.Page, 'get_text', autospec=True, side_effect=fitz.Page.get_text) as mock_get_text:
+            resultado = processor.process()
+        
+        self.assertEqual(resultado, {'codigo': '', 'nome': '', 'material': '', 'espessura': ''})
+        self.assertEqual([chamada.kwargs['clip'] for chamada in mock_get_text.call_args_list],
+                         [processor.title_block_rect('A4_SECURITY'), None])
+
+
+class LayoutRegistryTestCase(TestCase):
+    """Testes para o registro de layouts de carimbo"""
+    
+    def _arquivo(self, layouts, **opcoes):
+        """Grava um arquivo de layouts temporário e devolve o caminho."""
+        import json
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as arquivo:
+            json.dump({'layouts': layouts, **opcoes}, arquivo)
+        self.addCleanup(os.unlink, arquivo.name)
+        return arquivo.name
+    
+    def _layout(self, nome, largura, **extras):
+        return {'nome': nome, 'largura': largura, 'campos': {'codigo': [10, 10, 50, 20]}, **extras}
+    
+    def test_layouts_padrao_por_largura(self):
+        """Testa as faixas de largura dos layouts SECURITY do arquivo padrão"""
+        indice = get_registry().current()
+        for largura, esperado in ((2384, ['A1_SECURITY']), (1684, ['A2_SECURITY']), (1190, ['A3_SECURITY']),
+                                  (830, ['A4_SECURITY']), (595, ['A4_SECURITY']), (850, []), (2000, [])):
+            self.assertEqual([layout.nome for layout in indice.candidates(largura, 600)], esperado, largura)
+        self.assertEqual(indice.get('A4_SECURITY').chave, 'S E C U R I T Y')
+    
+    def test_tamanho_exato_altura_e_rotacao(self):
+        """Testa tamanho exato com tolerância, faixa de altura, rotações e a ordem do arquivo"""
+        indice = parse_layouts({'tolerancia_pt': 2, 'layouts': [
+            self._layout('CLIENTE_A', 1191, altura=842, rotacoes=[0]),
+            self._layout('CLIENTE_B', [1000, 1300], altura=[800, 900]),
+            self._layout('CLIENTE_C', [1000, 1300]),
+        ]})
+        
+        self.assertEqual([layout.nome for layout in indice.candidates(1190.5, 841.9)], ['CLIENTE_A', 'CLIENTE_B', 'CLIENTE_C'])
+        self.assertEqual([layout.nome for layout in indice.candidates(1190.5, 841.9, 90)], ['CLIENTE_B', 'CLIENTE_C'])
+        self.assertEqual([layout.nome for layout in indice.candidates(1195, 700)], ['CLIENTE_C'])
+        self.assertEqual(indice.candidates(900, 842), [])
+    
+    def test_muitos_layouts(self):
+        """Testa que, com dezenas de layouts, a consulta devolve só os da faixa da página"""
+        indice = parse_layouts({'layouts': [self._layout(f'L{i}', 500 + i * 20, altura=[300, 400])
+                                            for i in range(100)]})
+        
+        self.assertEqual([layout.nome for layout in indice.candidates(1500.5, 350)], ['L50'])
+        self.assertEqual(indice.candidates(1500.5, 500), [])
+    
+    def test_definicao_invalida(self):
+        """Testa nomes repetidos, campos e dimensões inválidos"""
+        for layouts in ([self._layout('X', 100), self._layout('X', 200)],
+                        [{'nome': 'X', 'largura': 100, 'campos': {'codigo': [1, 2]}}],
+                        [{'nome': 'X', 'campos': {'codigo': [1, 2, 3, 4]}}],
+                        [self._layout('X', 100, rotacoes=[45])],
+                        [self._layout('X', 100, regiao_chave=[1, 2, 3])]):
+            with self.assertRaises(ValueError):
+                parse_layouts({'layouts': layouts})
+        with self.assertRaises(ValueError):
+            LayoutRegistry(self._arquivo([self._layout('X', 'larga')]))
+    
+    def test_recarga_quando_o_arquivo_muda(self):
+        """Testa a recarga pelo mtime e que um arquivo inválido mantém a versão anterior"""
+        import json
+        caminho = self._arquivo([self._layout('ANTIGO', [0, 1000])])
+        registro = LayoutRegistry(caminho)
+        anterior = registro.current()
+        self.assertIs(registro.current(), anterior)
+        
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump({'layouts': [self._layout('NOVO', [0, 1000])]}, arquivo)
+        os.utime(caminho, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        self.assertEqual([layout.nome for layout in registro.current().candidates(500, 500)], ['NOVO'])
+        self.assertEqual([layout.nome for layout in anterior.candidates(500, 500)], ['ANTIGO'])
+        self.assertEqual(registro.recargas, 1)
+        
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('{"layouts": [')
+        self.assertEqual([layout.nome for layout in registro.current().candidates(500, 500)], ['NOVO'])
+        self.assertIsNotNone(registro.erro_recarga)
+    
+    def test_pdf_com_layout_do_registro(self):
+        """Testa a detecção de um layout de cliente com outra chave e o desempate pela chave"""
+        import fitz
+        caminho = self._arquivo([
+            self._layout('OUTRO_CLIENTE', [800, 900], chave='OUTRO'),
+            self._layout('CLIENTE', [800, 900], chave='ACME LTDA'),
+        ])
+        pdf = fitz.open()
+        pagina = pdf.new_page(width=830, height=600)
+        pagina.insert_text((100, 100), 'ACME LTDA', fontsize=8)
+        pagina.insert_text((12, 18), 'SP01', fontsize=7)
+        
+        resultado = PDFProcessor(pdf.tobytes(), 'SP01.pdf', layouts=LayoutRegistry(caminho)).process()
+        
+        self.assertEqual(resultado['codigo'], 'SP01')
+        self.assertEqual(resultado['nome'], '')
 
 
 class DXFProcessorTestCase(TestCase):
@@ -449,6 +1077,7 @@ class DXFProcessorTestCase(TestCase):
     def test_calculate_polyline_length(self):
         """Testa cálculo de comprimento de polylinha"""
         mock_polyline = Mock()
+        mock_polyline.closed = False
         mock_polyline.get_points.return_value = [(0, 0), (3, 0), (3, 4)]
         
         length = self.processor._calculate_polyline_length(mock_polyline)
@@ -456,6 +1085,19 @@ class DXFProcessorTestCase(TestCase):
         
         self.assertEqual(length, expected)
     
+    def test_calculate_polyline_length_fechada_e_bulge(self):
+        """Testa polylinha fechada e segmentos em arco (bulge)"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        fechada = msp.add_lwpolyline([(0, 0), (3, 0), (3, 4)], close=True)
+        # Bulge 1 = semicírculo sobre a corda de 10mm
+        semicirculo = msp.add_lwpolyline([(0, 0, 0, 0, 1), (10, 0)], format='xyseb')
+        polyline = msp.add_polyline2d([(0, 0, 0, 0, -1), (10, 0)], format='xyseb', close=True)
+        
+        self.assertAlmostEqual(self.processor._calculate_polyline_length(fechada), 12.0)
+        self.assertAlmostEqual(self.processor._calculate_polyline_length(semicirculo), 5 * math.pi)
+        self.assertAlmostEqual(self.processor._calculate_polyline_length(polyline), 5 * math.pi + 10)
+    
     def test_get_entity_length_line(self):
         """Testa identificação e cálculo de linha"""
         mock_entity = Mock()
@@ -504,6 +1146,21 @@ class DXFProcessorTestCase(TestCase):
             mock_calc.assert_called_once_with(mock_entity)
             self.assertEqual(length, 20.0)
     
+    def test_get_entity_length_ellipse_spline(self):
+        """Testa que ELLIPSE e SPLINE são medidos em vez de retornar 0"""
+        msp = ezdxf.new('R2018').modelspace()
+        
+        elipse = msp.add_ellipse((0, 0), (0, 10, 0), 1.0, 0, math.pi)
+        self.assertAlmostEqual(self.processor._get_entity_length(elipse), 10 * math.pi)
+        
+        spline = msp.add_spline([(0, 0), (50, 0)])
+        self.assertAlmostEqual(self.processor._get_entity_length(spline), 50.0)
+        
+        vazio = Mock()
+        vazio.dxftype.return_value = 'SPLINE'
+        vazio.flattening.side_effect = ValueError("sem pontos")
+        self.assertEqual(self.processor._get_entity_length(vazio), 0.0)
+    
     def test_get_entity_length_unknown(self):
         """Testa entidade desconhecida (fallback para linha)"""
         mock_entity = Mock()
@@ -526,14 +1183,14 @@ class DXFProcessorTestCase(TestCase):
     
     def test_calculate_perimeter(self):
         """Testa cálculo de perímetro total"""
-        # Mock do modelspace com várias entidades
+        # Mock do modelspace com entidades sem cálculo vetorizado
         mock_modelspace = [
             Mock(), Mock(), Mock()
         ]
         
         # Configurar cada entidade
         for i, entity in enumerate(mock_modelspace):
-            entity.dxftype.return_value = 'LINE'
+            entity.dxftype.return_value = 'HELIX'
         
         # Mock do cálculo de comprimento
         with patch.object(self.processor, '_get_entity_length') as mock_get_length:
@@ -544,6 +1201,76 @@ class DXFProcessorTestCase(TestCase):
             self.assertEqual(perimeter, 30.0)
             self.assertEqual(mock_get_length.call_count, 3)
     
+    def test_calculate_perimeter_vetorizado(self):
+        """Testa que o cálculo vetorizado coincide com o cálculo por entidade"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        msp.add_line((0, 0), (3, 4))
+        msp.add_arc((0, 0), 2, 270, 90)
+        msp.add_circle((0, 0), 1)
+        msp.add_lwpolyline([(0, 0, 0, 0, 0.5), (10, 0), (10, 10)], format='xyseb', close=True)
+        msp.add_lwpolyline([(0, 0), (1, 0)])
+        msp.add_polyline2d([(0, 0), (3, 4), (6, 0)])
+        msp.add_ellipse((0, 0), (10, 0, 0), 0.4, 0.5, 2.0)
+        msp.add_spline([(0, 0), (10, 20), (30, -5), (50, 10)])
+        msp.add_text('texto')
+        invalida = Mock()
+        invalida.dxftype.return_value = 'LINE'
+        
+        esperado = sum(self.processor._get_entity_length(entity) for entity in msp)
+        with patch.object(self.processor, '_get_entity_length', wraps=self.processor._get_entity_length) as mock_get_length:
+            perimeter = self.processor._calculate_perimeter(list(msp) + [invalida])
+        
+        self.assertAlmostEqual(perimeter, esperado, places=9)
+        # Só o TEXT passa pelo cálculo por entidade
+        self.assertEqual(mock_get_length.call_count, 1)
+    
+    def test_calculate_perimeter_insert(self):
+        """Testa INSERTs com escala, rotação, MINSERT e bloco aninhado, medindo cada bloco uma vez"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        furo = doc.blocks.new('FURO')
+        furo.add_circle((0, 0), 5)
+        furo.add_line((0, 0), (10, 0))
+        grupo = doc.blocks.new('GRUPO')
+        grupo.add_blockref('FURO', (0, 0))
+        grupo.add_blockref('FURO', (30, 0), dxfattribs={'xscale': 2, 'yscale': 2})
+        for i in range(2000):
+            msp.add_blockref('FURO', (i * 20, 0), dxfattribs={'rotation': i % 360})
+        msp.add_blockref('GRUPO', (0, 100), dxfattribs={'xscale': -1.5, 'yscale': 1.5})
+        msp.add_blockref('FURO', (0, 200)).grid(size=(3, 4), spacing=(20, 20))
+        msp.add_blockref('INEXISTENTE', (0, 300))
+        comprimento_furo = 10 + 2 * math.pi * 5
+        
+        with patch.object(self.processor, '_sum_layers', wraps=self.processor._sum_layers) as mock_soma:
+            perimeter = self.processor._calculate_perimeter(msp)
+        
+        esperado = (2000 + 1.5 * 3 + 12) * comprimento_furo
+        self.assertAlmostEqual(perimeter, esperado, places=6)
+        # Model space + FURO + GRUPO (INEXISTENTE não tem entidades)
+        self.assertEqual(mock_soma.call_count, 3)
+    
+    def test_calculate_insert_length_escala_nao_uniforme(self):
+        """Testa que escala não uniforme mede as entidades transformadas (círculo vira elipse)"""
+        doc = ezdxf.new('R2018')
+        doc.blocks.new('FURO').add_circle((0, 0), 5)
+        insert = doc.modelspace().add_blockref('FURO', (0, 0), dxfattribs={'xscale': 2, 'yscale': 1})
+        
+        a, b = 10.0, 5.0
+        h = ((a - b) / (a + b)) ** 2
+        ramanujan = math.pi * (a + b) * (1 + 3 * h / (10 + math.sqrt(4 - 3 * h)))
+        self.assertAlmostEqual(self.processor._get_entity_length(insert), ramanujan, places=6)
+    
+    def test_calculate_insert_length_referencia_circular(self):
+        """Testa que um bloco que insere a si mesmo não entra em recursão infinita"""
+        doc = ezdxf.new('R2018')
+        bloco = doc.blocks.new('LOOP')
+        bloco.add_line((0, 0), (3, 4))
+        bloco.add_blockref('LOOP', (10, 0))
+        insert = doc.modelspace().add_blockref('LOOP', (0, 0))
+        
+        self.assertAlmostEqual(self.processor._calculate_perimeter([insert]), 5.0)
+    
     def test_get_material_factor(self):
         """Testa fatores de correção por material"""
         self.assertEqual(self.processor._get_material_factor('aço'), 1.0)
@@ -574,40 +1301,36 @@ class DXFProcessorTestCase(TestCase):
         expected_with_factors = (100 / 50) * 0.8 * 1.0  # 1.6 segundos
         self.assertEqual(time_with_factors, expected_with_factors)
     
-    @patch('tempfile.mktemp')
-    @patch('ezdxf.readfile')
-    def test_process_single_dxf_success(self, mock_readfile, mock_mktemp):
+    def test_process_single_dxf_success(self):
         """Testa processamento bem-sucedido de arquivo DXF"""
-        # Mock do arquivo temporário
-        mock_mktemp.return_value = '/tmp/test.dxf'
-        
         # Mock do ezdxf
         mock_doc = Mock()
         mock_modelspace = [Mock(), Mock()]
         mock_doc.modelspace.return_value = mock_modelspace
-        mock_readfile.return_value = mock_doc
         
         # Mock das entidades
         for entity in mock_modelspace:
             entity.dxftype.return_value = 'LINE'
         
         # Mock do cálculo de perímetro
-        with patch.object(self.processor, '_calculate_perimeter') as mock_perimeter:
-            mock_perimeter.return_value = 100.0
+        with patch.object(self.processor, '_load_document', return_value=mock_doc) as mock_load:
+            with patch.object(self.processor, '_calculate_layer_perimeters') as mock_perimeter:
+                mock_perimeter.return_value = ({'Corte': 60.0, 'Corte_Furos': 40.0}, ContourStats(3, 1), True, 0.0)
             
-            with patch.object(self.processor, '_estimate_cutting_time') as mock_time:
-                mock_time.return_value = 2.0
+                with patch.object(self.processor, '_estimate_cutting_time') as mock_time:
+                    mock_time.return_value = 2.0
                 
-                # Mock do open e os.path.exists
-                with patch('builtins.open', mock_open()) as mock_file:
-                    with patch('os.path.exists', return_value=True):
-                        result = self.processor._process_single_dxf('test.dxf', b'fake content')
+                    result = self.processor._process_single_dxf('test.dxf', b'fake content')
                         
-                        self.assertEqual(result['arquivo'], 'test.dxf')
-                        self.assertEqual(result['perimetro_mm'], 100.0)
-                        self.assertEqual(result['tempo_corte_segundos'], 2.0)
-                        self.assertEqual(result['status'], 'processado')
-                        self.assertEqual(result['layer_utilizada'], 'todas as layers')
+                    mock_load.assert_called_once_with(b'fake content')
+                    self.assertEqual(result['arquivo'], 'test.dxf')
+                    self.assertEqual(result['perimetro_mm'], 100.0)
+                    self.assertEqual(result['tempo_corte_segundos'], 2.0)
+                    self.assertEqual(result['status'], 'processado')
+                    self.assertEqual(result['layer_utilizada'], 'Corte, Corte_Furos')
+                    self.assertEqual(result['perimetro_por_layer'], {'Corte': 60.0, 'Corte_Furos': 40.0})
+                    self.assertEqual(result['perfuracoes'], 4)
+                    mock_time.assert_called_once_with(100.0, perfuracoes=4, rapid_mm=0.0)
     
     def test_process_single_dxf_empty_file(self):
         """Testa processamento de arquivo vazio"""
@@ -616,16 +1339,27 @@ class DXFProcessorTestCase(TestCase):
         self.assertEqual(result['status'], 'erro: Arquivo vazio')
         self.assertEqual(result['perimetro_mm'], 0)
     
-    @patch('tempfile.mktemp')
-    def test_process_single_dxf_file_creation_error(self, mock_mktemp):
-        """Testa erro na criação do arquivo temporário"""
-        mock_mktemp.return_value = '/tmp/test.dxf'
-        
-        with patch('builtins.open', side_effect=Exception("Erro de criação")):
-            result = self.processor._process_single_dxf('test.dxf', b'content')
+    def _gerar_dxf(self, versao='R2018', fmt='asc', encoding='utf-8'):
+        doc = ezdxf.new(versao)
+        doc.modelspace().add_line((0, 0), (3, 4), dxfattribs={'layer': 'Corte'})
+        doc.modelspace().add_text('Peça de ação', dxfattribs={'layer': 'Textos'})
+        if fmt == 'bin':
+            stream = io.BytesIO()
+            doc.write(stream, fmt='bin')
+            return stream.getvalue()
+        stream = io.StringIO()
+        doc.write(stream)
+        return stream.getvalue().encode(encoding)
+        
+    def test_process_single_dxf_em_memoria(self):
+        """Testa que o DXF é lido direto dos bytes, sem arquivo temporário"""
+        conteudo = self._gerar_dxf()
             
-            self.assertIn('erro:', result['status'])
-            self.assertEqual(result['perimetro_mm'], 0)
+        with patch('builtins.open', side_effect=AssertionError('arquivo temporário não esperado')):
+            result = self.processor._process_single_dxf('test.dxf', conteudo)
+        
+        self.assertEqual(result['status'], 'processado')
+        self.assertEqual(result['perimetro_mm'], 5.0)
     
     def test_process_dxf_files(self):
         """Testa processamento de múltiplos arquivos DXF"""
@@ -721,41 +1455,48 @@ class DXFProcessorTestCase(TestCase):
         length = self.processor._calculate_polyline_length(mock_polyline)
         self.assertEqual(length, 0.0)
     
-    @patch('tempfile.mktemp')
-    def test_process_single_dxf_file_not_created(self, mock_mktemp):
-        """Testa erro quando arquivo temporário não é criado"""
-        mock_mktemp.return_value = '/tmp/test.dxf'
+    def test_load_document_codificacao_do_cabecalho(self):
+        """Testa detecção da codificação pelo $DWGCODEPAGE em DXF R12"""
+        conteudo = self._gerar_dxf('R12', encoding='cp1252')
         
-        with patch('os.path.exists', return_value=False):
-            result = self.processor._process_single_dxf('test.dxf', b'content')
+        doc = self.processor._load_document(conteudo)
             
-            self.assertIn('Falha ao criar arquivo temporário', result['status'])
+        self.assertEqual(doc.encoding, 'cp1252')
+        self.assertEqual(doc.modelspace().query('TEXT')[0].dxf.text, 'Peça de ação')
+    
+    def test_detect_encoding(self):
+        """Testa detecção da codificação pelas variáveis do cabeçalho"""
+        cabecalho = "0\r\nSECTION\r\n2\r\nHEADER\r\n9\r\n$ACADVER\r\n1\r\n{}\r\n9\r\n$DWGCODEPAGE\r\n3\r\n{}\r\n0\r\nENDSEC\r\n"
+        
+        self.assertEqual(self.processor._detect_encoding(cabecalho.format('AC1015', 'ANSI_1251').encode()), 'cp1251')
+        self.assertEqual(self.processor._detect_encoding(cabecalho.format('AC1032', 'ANSI_1251').encode()), 'utf-8')
+        self.assertEqual(self.processor._detect_encoding(b'0\nSECTION\n2\nENTITIES\n0\nENDSEC\n0\nEOF\n'), 'cp1252')
+    
+    def test_load_document_dxf_binario(self):
+        """Testa leitura de DXF binário"""
+        conteudo = self._gerar_dxf(fmt='bin')
+        self.assertTrue(conteudo.startswith(DXFProcessor.BINARY_DXF_SENTINEL))
+        
+        result = self.processor.process_single_dxf_completo('peca', conteudo, 'aço', '2mm')
+        
+        self.assertEqual(result['perimetro_mm'], 5.0)
+        self.assertNotIn('erro', result)
     
-    @patch('tempfile.mktemp')
-    @patch('ezdxf.readfile')
-    def test_process_single_dxf_ezdxf_error(self, mock_readfile, mock_mktemp):
+    @patch('ezdxf.read')
+    def test_process_single_dxf_ezdxf_error(self, mock_read):
         """Testa erro no ezdxf"""
-        mock_mktemp.return_value = '/tmp/test.dxf'
-        mock_readfile.side_effect = Exception("Erro no ezdxf")
+        mock_read.side_effect = Exception("Erro no ezdxf")
         
-        with patch('builtins.open', mock_open()):
-            with patch('os.path.exists', return_value=True):
-                result = self.processor._process_single_dxf('test.dxf', b'content')
+        result = self.processor._process_single_dxf('test.dxf', b'0\nEOF\n')
                 
-                self.assertIn('erro:', result['status'])
+        self.assertIn('erro: Erro no ezdxf', result['status'])
     
-    @patch('tempfile.mktemp')
-    def test_process_single_dxf_temp_file_cleanup_error(self, mock_mktemp):
-        """Testa erro na limpeza do arquivo temporário"""
-        mock_mktemp.return_value = '/tmp/test.dxf'
+    def test_process_single_dxf_conteudo_invalido(self):
+        """Testa conteúdo que não é DXF"""
+        result = self.processor._process_single_dxf('test.dxf', b'content')
         
-        with patch('builtins.open', mock_open()):
-            with patch('os.path.exists', return_value=True):
-                with patch('os.unlink', side_effect=Exception("Erro na remoção")):
-                    result = self.processor._process_single_dxf('test.dxf', b'content')
-                    
-                    # Deve retornar erro mas não quebrar
-                    self.assertIn('erro:', result['status'])
+        self.assertIn('erro:', result['status'])
+        self.assertEqual(result['perimetro_mm'], 0)
     
     def test_calculate_arc_length_error(self):
         """Testa cálculo de arco com erro"""
@@ -828,6 +1569,578 @@ class DXFProcessorTestCase(TestCase):
         self.assertEqual(length, 0.0)
 
 
+class DXFScannerTestCase(TestCase):
+    """Testes para o scanner leve de DXF"""
+    
+    def _gerar_corpus(self):
+        """Gera DXFs de várias versões com as entidades suportadas e outras ignoradas"""
+        corpus = []
+        for versao in ('R12', 'R2000', 'R2007', 'R2018'):
+            doc = ezdxf.new(versao)
+            msp = doc.modelspace()
+            msp.add_line((0, 0), (3, 4), dxfattribs={'layer': 'Corte'})
+            msp.add_arc((1, 1), 2.5, 30, 300)
+            msp.add_arc((1, 1), 1, 300, 30)
+            msp.add_circle((5, 5), 1.5)
+            msp.add_polyline2d([(0, 0), (3, 4), (6, 0)])
+            msp.add_text('Peça')
+            if versao != 'R12':
+                msp.add_lwpolyline([(0, 0, 0, 0, 0.5), (10, 0), (10, 10)], format='xyseb', close=True)
+                msp.add_ellipse((0, 0), (30, 40, 0), 0.3, 5.0, 1.0)
+                msp.add_spline([(0, 0), (10, 20), (30, -5), (50, 10)])
+                msp.add_rational_spline([(0, 0), (10, 20), (30, -5), (50, 10)], [1, 2, 0.5, 1])
+            doc.blocks.new('BLOCO').add_line((0, 0), (100, 100))
+            msp.add_blockref('BLOCO', (0, 0))
+            doc.layouts.get('Layout1').add_line((0, 0), (1000, 0))
+            stream = io.StringIO()
+            doc.write(stream)
+            corpus.append((versao, stream.getvalue().encode('utf-8' if versao >= 'R2007' else 'cp1252')))
+        return corpus
+    
+    def test_scanner_confere_com_ezdxf(self):
+        """Testa que o perímetro do scanner é igual ao do documento ezdxf no corpus"""
+        completo = DXFProcessor()
+        rapido = DXFProcessor(fast_scan=True)
+        
+        for versao, conteudo in self._gerar_corpus():
+            with self.subTest(versao=versao):
+                with patch.object(rapido, '_load_document', side_effect=AssertionError('ezdxf não esperado')):
+                    perimetro_rapido = rapido._perimeter_from_bytes(conteudo)
+                self.assertAlmostEqual(perimetro_rapido, completo._perimeter_from_bytes(conteudo), places=9)
+    
+    def test_scan_entities_model_space(self):
+        """Testa tipos, layers e exclusão do paper space e dos blocos"""
+        versao, conteudo = self._gerar_corpus()[-1]
+        
+        entidades = list(scan_entities(io.BytesIO(conteudo), 'utf-8'))
+        
+        self.assertEqual([e.dxftype() for e in entidades],
+                         ['LINE', 'ARC', 'ARC', 'CIRCLE', 'POLYLINE', 'TEXT', 'LWPOLYLINE', 'ELLIPSE', 'SPLINE', 'SPLINE',
+                          'INSERT'])
+        self.assertEqual(entidades[0].dxf.layer, 'Corte')
+        self.assertEqual(entidades[0].dxf.end, (3.0, 4.0, 0.0))
+        self.assertEqual(len(list(entidades[4].points())), 3)
+        self.assertTrue(entidades[6].closed)
+        self.assertEqual(entidades[6].get_points()[0], (0.0, 0.0, 0.0, 0.0, 0.5))
+        self.assertEqual(entidades[7].dxf.major_axis, (30.0, 40.0, 0.0))
+        self.assertEqual(entidades[7].dxf.end_param, 1.0)
+    
+    def test_scanner_blocos(self):
+        """Testa INSERT, MINSERT e blocos aninhados pelo scanner, sem recorrer ao ezdxf"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        furo = doc.blocks.new('FURO')
+        furo.add_circle((0, 0), 5)
+        furo.add_lwpolyline([(0, 0), (10, 0), (10, 10)], close=True)
+        doc.blocks.new('GRUPO').add_blockref('FURO', (30, 0), dxfattribs={'xscale': 2, 'yscale': 2})
+        msp.add_blockref('FURO', (0, 0), dxfattribs={'rotation': 45})
+        msp.add_blockref('GRUPO', (0, 100), dxfattribs={'xscale': 0.5, 'yscale': 0.5})
+        msp.add_blockref('FURO', (0, 200)).grid(size=(2, 5), spacing=(20, 20))
+        stream = io.StringIO()
+        doc.write(stream)
+        conteudo = stream.getvalue().encode('utf-8')
+        
+        rapido = DXFProcessor(fast_scan=True)
+        with patch.object(rapido, '_load_document', side_effect=AssertionError('ezdxf não esperado')):
+            perimetro_rapido = rapido._perimeter_from_bytes(conteudo)
+        self.assertAlmostEqual(perimetro_rapido, DXFProcessor()._perimeter_from_bytes(conteudo), places=9)
+        self.assertAlmostEqual(perimetro_rapido, 12 * (2 * math.pi * 5 + 20 + math.hypot(10, 10)), places=9)
+        
+        # Escala não uniforme: o scanner delega ao ezdxf
+        msp.add_blockref('FURO', (0, 300), dxfattribs={'xscale': 2, 'yscale': 1})
+        stream = io.StringIO()
+        doc.write(stream)
+        with patch.object(rapido, '_load_document', wraps=rapido._load_document) as mock_load:
+            rapido._perimeter_from_bytes(stream.getvalue().encode('utf-8'))
+        mock_load.assert_called_once()
+    
+    def test_scan_entities_erro_estrutura(self):
+        """Testa erro em DXF truncado ou com código de grupo inválido"""
+        with self.assertRaises(DXFScanError):
+            list(scan_entities(io.BytesIO(b'0\nSECTION\n2\nENTITIES\n0\nLINE\n10\n1.0\n')))
+        with self.assertRaises(DXFScanError):
+            list(scan_entities(io.BytesIO(b'0\nSECTION\n2\nENTITIES\nxx\nLINE\n')))
+    
+    def test_fast_scan_fallback_ezdxf(self):
+        """Testa que DXFs não suportados pelo scanner são lidos pelo ezdxf"""
+        processor = DXFProcessor(fast_scan=True)
+        mock_doc = Mock()
+        mock_doc.modelspace.return_value = []
+        
+        with patch('uploadapi.dxf_processor.scan_entities', side_effect=DXFScanError('estrutura')):
+            with patch.object(processor, '_load_document', return_value=mock_doc) as mock_load:
+                self.assertEqual(processor._perimeter_from_bytes(b'0\nEOF\n'), 0.0)
+        mock_load.assert_called_once()
+        
+        with patch('uploadapi.dxf_processor.scan_entities') as mock_scan:
+            with patch.object(processor, '_load_document', return_value=mock_doc):
+                processor._perimeter_from_bytes(DXFProcessor.BINARY_DXF_SENTINEL + b'...')
+        mock_scan.assert_not_called()
+
+
+class LayerIndexTestCase(TestCase):
+    """Testes para o índice de entidades por layer e a seleção de layers de corte"""
+    
+    def _gerar_msp(self):
+        msp = ezdxf.new('R2018').modelspace()
+        msp.add_line((0, 0), (3, 4), dxfattribs={'layer': 'Corte'})
+        msp.add_circle((0, 0), 1, dxfattribs={'layer': 'CORTE_FUROS'})
+        msp.add_line((0, 0), (10, 0), dxfattribs={'layer': 'Cotas'})
+        msp.add_line((0, 0), (0, 7), dxfattribs={'layer': 'Gravacao'})
+        msp.add_line((0, 0), (6, -8), dxfattribs={'layer': 'Corte'})
+        return msp
+    
+    def test_select(self):
+        """Testa seleção por nome, coleção e glob, sem diferenciar maiúsculas"""
+        indice = LayerIndex(self._gerar_msp())
+        
+        self.assertEqual(indice.layers(), ['Corte', 'CORTE_FUROS', 'Cotas', 'Gravacao'])
+        self.assertEqual(indice.counts()['Corte'], 2)
+        self.assertEqual(indice.select('corte'), ['Corte'])
+        self.assertEqual(indice.select('Corte*'), ['Corte', 'CORTE_FUROS'])
+        self.assertEqual(indice.select({'Cotas', 'gravacao'}), ['Cotas', 'Gravacao'])
+        self.assertEqual(indice.select('Inexistente'), [])
+        self.assertEqual(indice.select(None), indice.layers())
+    
+    def test_perimetro_por_layer(self):
+        """Testa que só as layers de corte são somadas e que o model space é percorrido uma vez"""
+        processor = DXFProcessor(target_layer='Corte*')
+        
+        # Iterador de uso único: uma segunda passada não veria nenhuma entidade
+        por_layer, _, filtrado, _ = processor._calculate_layer_perimeters(iter(list(self._gerar_msp())))
+        
+        self.assertTrue(filtrado)
+        self.assertEqual(list(por_layer), ['Corte', 'CORTE_FUROS'])
+        self.assertAlmostEqual(por_layer['Corte'], 15.0)
+        self.assertAlmostEqual(por_layer['CORTE_FUROS'], 2 * math.pi)
+        
+        por_layer = processor._calculate_layer_perimeters(self._gerar_msp(), layers=['Cotas', 'Gravacao'])[0]
+        self.assertEqual(por_layer, {'Cotas': 10.0, 'Gravacao': 7.0})
+    
+    def test_sem_layer_de_corte(self):
+        """Testa que, sem layer correspondente, todas as layers são somadas"""
+        processor = DXFProcessor(target_layer='Laser')
+        doc = ezdxf.new('R2018')
+        for entity in self._gerar_msp():
+            doc.modelspace().add_foreign_entity(entity.copy())
+        stream = io.StringIO()
+        doc.write(stream)
+        
+        result = processor._process_single_dxf('peca.dxf', stream.getvalue().encode('utf-8'))
+        
+        self.assertEqual(result['layer_utilizada'], 'todas as layers')
+        self.assertEqual(result['perimetro_mm'], round(15 + 2 * math.pi + 10 + 7, 2))
+        self.assertEqual(len(result['perimetro_por_layer']), 4)
+    
+    def test_blocos_inseridos_em_outra_layer(self):
+        """Testa que as entidades do bloco contam na própria layer, e as da layer "0" na do INSERT"""
+        doc = ezdxf.new('R2018')
+        doc.blocks.new('FURO').add_circle((0, 0), 5, dxfattribs={'layer': 'Corte'})
+        doc.blocks.new('MARCA').add_line((0, 0), (4, 0))
+        msp = doc.modelspace()
+        msp.add_lwpolyline([(0, 0), (100, 0), (100, 100), (0, 100)], close=True, dxfattribs={'layer': 'Corte'})
+        for x in (20, 50, 80):
+            msp.add_blockref('FURO', (x, 50), dxfattribs={'layer': '0'})
+        msp.add_blockref('MARCA', (10, 10), dxfattribs={'layer': 'Corte'})
+        msp.add_blockref('MARCA', (10, 20), dxfattribs={'layer': 'Cotas'})
+        stream = io.StringIO()
+        doc.write(stream)
+        
+        for fast_scan in (False, True):
+            with self.subTest(fast_scan=fast_scan):
+                result = DXFProcessor(fast_scan=fast_scan)._process_single_dxf('peca.dxf', stream.getvalue().encode('utf-8'))
+                self.assertEqual(result['perimetro_mm'], round(400 + 3 * 2 * math.pi * 5 + 4, 2))
+                self.assertEqual(list(result['perimetro_por_layer']), ['Corte'])
+    
+    def test_memoria_nao_guarda_layers_descartadas(self):
+        """Testa que as entidades das layers fora da seleção não ficam em memória"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        msp.add_lwpolyline([(0, 0), (100, 0), (100, 100), (0, 100)], close=True, dxfattribs={'layer': 'Corte'})
+        for i in range(10000):
+            msp.add_line((i, 0), (i, 5), dxfattribs={'layer': 'Cotas'})
+        stream = io.StringIO()
+        doc.write(stream)
+        conteudo = stream.getvalue().encode('utf-8')
+        processor = DXFProcessor(target_layer='Corte', fast_scan=True)
+        
+        tracemalloc.start()
+        try:
+            por_layer = processor._layer_perimeters_from_bytes(conteudo)[0]
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        self.assertEqual(por_layer, {'Corte': 400.0})
+        # Guardar as 10000 LINEs custaria alguns MB
+        self.assertLess(pico, 256 * 1024)
+
+
+class ContornosTestCase(TestCase):
+    """Testes para a reconstrução de contornos e a contagem de perfurações"""
+    
+    def test_build_contours(self):
+        """Testa laço fechado com folga abaixo da tolerância, cadeia aberta e bifurcação"""
+        quadrado = np.array([[0, 0, 10, 0], [10, 0, 10, 10], [0, 10, 10, 10.004], [0, 10, 0, 0]], dtype=float)
+        cadeia = np.array([[50, 0, 60, 0], [60, 0, 70, 5]], dtype=float)
+        t = np.array([[100, 0, 110, 0], [110, 0, 120, 0], [110, 0, 110, 10]], dtype=float)
+        
+        estatisticas, rotulos = build_contours(np.concatenate([quadrado, cadeia, t]), 0.01)
+        
+        # O "T" tem 4 vértices de grau ímpar: duas cadeias
+        self.assertEqual(estatisticas, ContourStats(fechados=1, abertos=3))
+        self.assertEqual(estatisticas.perfuracoes, 4)
+        self.assertEqual(len(set(rotulos[:4])), 1)
+        self.assertNotEqual(rotulos[0], rotulos[4])
+        
+        # Um ponto de perfuração por contorno: um vértice do quadrado e as pontas das cadeias
+        pontos = {tuple(p) for p in np.round(estatisticas.pontos, 3)}
+        self.assertEqual(len(estatisticas.pontos), 4)
+        self.assertEqual(len(pontos & {(0, 0), (10, 0), (10, 10), (0, 10)}), 1)
+        self.assertEqual(len(pontos & {(50, 0), (70, 5)}), 1)
+        self.assertEqual(len(pontos & {(100, 0), (120, 0), (110, 10), (110, 0)}), 2)
+        
+        # Folga maior que a tolerância abre o quadrado
+        estatisticas, _ = build_contours(quadrado, 0.001)
+        self.assertEqual(estatisticas, ContourStats(fechados=0, abertos=1))
+    
+    def test_contornos_do_dxf(self):
+        """Testa contornos de entidades mistas, arcos espelhados (extrusão negativa) e blocos"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        # Contorno com duas linhas e dois semicírculos; o da direita com extrusão (0, 0, -1)
+        msp.add_line((0, 0), (20, 0))
+        msp.add_line((0, 10), (20, 10))
+        msp.add_arc((0, 5), 5, 90, 270)
+        msp.add_arc((-20, 5), 5, 90, 270, dxfattribs={'extrusion': (0, 0, -1)})
+        msp.add_circle((10, 5), 2)
+        msp.add_lwpolyline([(30, 0), (40, 0), (40, 10)])
+        msp.add_ellipse((60, 0), (10, 0, 0), 0.5, 0, math.pi)
+        furo = doc.blocks.new('FURO')
+        furo.add_circle((0, 0), 1)
+        furo.add_line((5, 0), (6, 0))
+        msp.add_blockref('FURO', (0, 50)).grid(size=(2, 3), spacing=(10, 10))
+        stream = io.StringIO()
+        doc.write(stream)
+        conteudo = stream.getvalue().encode('utf-8')
+        
+        for processor in (DXFProcessor(), DXFProcessor(fast_scan=True)):
+            with self.subTest(fast_scan=processor.fast_scan):
+                result = processor._process_single_dxf('peca.dxf', conteudo)
+                
+                self.assertEqual(result['contornos_fechados'], 2 + 6)
+                self.assertEqual(result['cadeias_abertas'], 2 + 6)
+                self.assertEqual(result['perfuracoes'], 16)
+                self.assertGreater(result['rapid_mm'], 0)
+                self.assertAlmostEqual(result['tempo_deslocamento_segundos'], result['rapid_mm'] / 500, places=2)
+                tempo_esperado = (result['perimetro_mm'] / 50 + 16 * processor.pierce_time_seconds
+                                  + result['rapid_mm'] / processor.rapid_speed_mm_per_second)
+                self.assertAlmostEqual(result['tempo_corte_segundos'], tempo_esperado, places=1)
+    
+    def test_muitos_segmentos(self):
+        """Testa 100 mil segmentos embaralhados e com ruído em menos de um segundo"""
+        rng = np.random.default_rng(0)
+        angulos = np.linspace(0, 2 * np.pi, 21)
+        aneis = []
+        for i in range(5000):
+            x, y = (i % 100) * 30 + 10 * np.cos(angulos), (i // 100) * 30 + 10 * np.sin(angulos)
+            aneis.append(np.column_stack([x[:-1], y[:-1], x[1:], y[1:]]))
+        extremos = np.concatenate(aneis) + rng.normal(0, 1e-4, (100000, 4))
+        extremos = extremos[rng.permutation(len(extremos))]
+        
+        inicio = time.perf_counter()
+        estatisticas, _ = build_contours(extremos, 0.01)
+        
+        self.assertLess(time.perf_counter() - inicio, 1.0)
+        self.assertEqual(estatisticas, ContourStats(fechados=5000, abertos=0))
+    
+    def test_perfuracoes_de_blocos(self):
+        """Testa os pontos de perfuração de INSERTs (ponto base, rotação, escala, espelho, MINSERT e aninhados)"""
+        doc = ezdxf.new('R2018')
+        peca = doc.blocks.new('PECA', base_point=(5, 3))
+        peca.add_line((0, 0), (4, 0))
+        peca.add_line((4, 0), (4, 4))
+        peca.add_lwpolyline([(0, 0), (1, 0), (1, 1)], close=True)
+        conjunto = doc.blocks.new('CONJUNTO')
+        conjunto.add_blockref('PECA', (20, 20), dxfattribs={'rotation': 30, 'xscale': 2, 'yscale': 2})
+        msp = doc.modelspace()
+        msp.add_blockref('PECA', (100, 50), dxfattribs={'rotation': 45, 'xscale': 1.5, 'yscale': 1.5})
+        msp.add_blockref('CONJUNTO', (-30, 10), dxfattribs={'rotation': -20, 'xscale': -1, 'yscale': 1})
+        msp.add_blockref('PECA', (0, 200), dxfattribs={'rotation': 10}).grid(size=(2, 3), spacing=(15, 25))
+        stream = io.StringIO()
+        doc.write(stream)
+        conteudo = stream.getvalue().encode('utf-8')
+        
+        def explodir(entidades):
+            resultado = []
+            for entity in entidades:
+                if entity.dxftype() == 'INSERT':
+                    for celula in entity.multi_insert():
+                        resultado.extend(explodir(celula.virtual_entities()))
+                else:
+                    resultado.append(entity)
+            return resultado
+        
+        referencia = DXFProcessor()._sum_entities(explodir(doc.modelspace()), {})[1]
+        esperado = sorted(map(tuple, np.round(referencia.pontos, 6)))
+        for fast_scan in (False, True):
+            with self.subTest(fast_scan=fast_scan):
+                contornos = DXFProcessor(target_layer=None, fast_scan=fast_scan)._layer_perimeters_from_bytes(conteudo)[1]
+                self.assertEqual(contornos, ContourStats(fechados=8, abertos=8))
+                np.testing.assert_allclose(sorted(map(tuple, np.round(contornos.pontos, 6))), esperado, atol=1e-6)
+
+    def test_perfuracoes_de_blocos_concatenadas_uma_vez(self):
+        """Testa que os pontos dos INSERTs de uma layer são concatenados uma vez, sem somar ContourStats a cada INSERT"""
+        doc = ezdxf.new('R2018')
+        furo = doc.blocks.new('FURO')
+        furo.add_circle((0, 0), 2, dxfattribs={'layer': 'Corte'})
+        furo.add_circle((10, 0), 2, dxfattribs={'layer': 'Corte'})
+        msp = doc.modelspace()
+        for i in range(300):
+            msp.add_blockref('FURO', (i * 20, 0))
+        stream = io.StringIO()
+        doc.write(stream)
+        
+        with patch.object(ContourStats, '__add__', autospec=True, side_effect=ContourStats.__add__) as mock_add:
+            contornos = DXFProcessor()._layer_perimeters_from_bytes(stream.getvalue().encode('utf-8'))[1]
+        
+        self.assertEqual(contornos, ContourStats(fechados=600, abertos=0))
+        self.assertEqual(len(contornos.pontos), 600)
+        # Uma soma por GeometryBatch (bloco e model space), nenhuma por INSERT
+        self.assertEqual(mock_add.call_count, 2)
+    
+    def test_contour_stats_combine(self):
+        """Testa que combine soma as contagens e mantém os pontos na ordem das parcelas"""
+        partes = [ContourStats(1, 0, np.array([[0.0, 0.0]])), ContourStats(), ContourStats(1, 1, np.array([[1.0, 1.0], [2.0, 2.0]]))]
+        
+        combinado = ContourStats.combine(partes)
+        
+        self.assertEqual(combinado, ContourStats(2, 1))
+        np.testing.assert_array_equal(combinado.pontos, [[0, 0], [1, 1], [2, 2]])
+        self.assertEqual(ContourStats.combine([]), ContourStats())
+
+
+class DedupTestCase(TestCase):
+    """Testes para a remoção de LINEs, ARCs e círculos repetidos ou sobrepostos"""
+    
+    def test_merge_segments(self):
+        """Testa linha repetida, invertida e sobreposta; linhas que só se tocam ficam separadas"""
+        segmentos = np.array([
+            [0, 0, 10, 0], [10, 0, 0, 0], [5, 0, 15, 0],  # repetida, invertida e sobreposta
+            [15, 0, 20, 0],                                # só toca a anterior
+            [0, 1, 10, 1], [0, 0.004, 3, 0.004],           # paralela; quase colinear (abaixo da tolerância)
+        ], dtype=float)
+        
+        unidos, removido = merge_segments(segmentos, 0.01)
+        
+        self.assertAlmostEqual(removido, 10 + 5 + 3, places=6)
+        comprimentos = sorted(np.round(np.hypot(unidos[:, 2] - unidos[:, 0], unidos[:, 3] - unidos[:, 1]), 6))
+        self.assertEqual(comprimentos, [5, 10, 15])
+        self.assertEqual(merge_segments(segmentos[4:5], 0.01)[1], 0.0)
+    
+    def test_merge_arcs(self):
+        """Testa círculo repetido, arco coberto por círculo e arcos que passam por 0°"""
+        arcos = np.array([
+            [0, 0, 5, 0, math.tau], [0, 0, 5, 0, math.tau], [0, 0, 5, 1, 1],
+            [10, 0, 2, 5.5, 1.5], [10, 0, 2, 0.5, 0.5],
+            [30, 0, 1, 0, 1],
+        ])
+        
+        unidos, removido = merge_arcs(arcos, 0.01)
+        
+        # Sobreposição dos arcos de raio 2: de 0,5 rad a 5,5 + 1,5 - 2π rad
+        self.assertAlmostEqual(removido, 5 * math.tau + 5 + 2 * (7 - math.tau - 0.5), places=6)
+        self.assertAlmostEqual((unidos[:, 2] * unidos[:, 4]).sum(), (arcos[:, 2] * arcos[:, 4]).sum() - removido)
+        self.assertEqual(np.count_nonzero(unidos[:, 4] >= math.tau), 1)
+    
+    def test_dxf_duplicado(self):
+        """Testa que entidades repetidas são descontadas do perímetro, das perfurações e do tempo"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        for _ in range(2):
+            msp.add_lwpolyline([(0, 0), (40, 0), (40, 20), (0, 20)], close=True)
+            msp.add_circle((10, 10), 3)
+        msp.add_line((50, 0), (80, 0))
+        msp.add_line((60, 0), (90, 0))
+        msp.add_line((80, 0), (50, 0))
+        stream = io.StringIO()
+        doc.write(stream)
+        conteudo = stream.getvalue().encode('utf-8')
+        
+        for processor in (DXFProcessor(), DXFProcessor(fast_scan=True)):
+            with self.subTest(fast_scan=processor.fast_scan):
+                result = processor._process_single_dxf('peca.dxf', conteudo)
+                
+                self.assertEqual(result['comprimento_duplicado_mm'], round(2 * math.pi * 3 + 20 + 30, 2))
+                self.assertEqual(result['perimetro_mm'], round(2 * 120 + 2 * math.pi * 3 + 40, 2))
+                self.assertEqual(result['perfuracoes'], 2 + 1 + 1)
+        
+        # Polilinhas não passam pela remoção; sem tolerância tudo é somado
+        result = DXFProcessor(dedup_tolerance=None)._process_single_dxf('peca.dxf', conteudo)
+        self.assertEqual(result['comprimento_duplicado_mm'], 0.0)
+        self.assertEqual(result['perimetro_mm'], round(2 * 120 + 4 * math.pi * 3 + 90, 2))
+    
+    def test_muitos_segmentos(self):
+        """Testa 100 mil segmentos, metade repetidos, em menos de um segundo"""
+        rng = np.random.default_rng(3)
+        inicio = rng.random((50000, 2)) * 1000
+        segmentos = np.column_stack([inicio, inicio + rng.normal(0, 10, (50000, 2))])
+        segmentos = np.concatenate([segmentos, segmentos[:, [2, 3, 0, 1]]])[rng.permutation(100000)]
+        comprimento = np.hypot(segmentos[:, 2] - segmentos[:, 0], segmentos[:, 3] - segmentos[:, 1]).sum()
+        
+        t0 = time.perf_counter()
+        unidos, removido = merge_segments(segmentos, 0.01)
+        
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertEqual(len(unidos), 50000)
+        self.assertAlmostEqual(removido, comprimento / 2, places=3)
+
+
+class TravelTestCase(TestCase):
+    """Testes para a ordenação dos contornos e o deslocamento rápido"""
+    
+    def test_kdtree_igual_forca_bruta(self):
+        """Testa o vizinho mais próximo da KD-tree com remoções contra a busca exaustiva"""
+        rng = np.random.default_rng(1)
+        pontos = rng.random((500, 2)) * 1000
+        arvore = KDTree(pontos)
+        vivos = np.ones(len(pontos), dtype=bool)
+        for _ in range(len(pontos)):
+            consulta = rng.random(2) * 1000
+            indice = arvore.nearest(*consulta)
+            distancias = np.where(vivos, np.hypot(*(pontos - consulta).T), np.inf)
+            self.assertAlmostEqual(distancias[indice], distancias.min())
+            arvore.remove(indice)
+            vivos[indice] = False
+        self.assertEqual(arvore.nearest(0.0, 0.0), -1)
+    
+    def test_percurso_vizinho_mais_proximo(self):
+        """Testa o percurso guloso a partir do canto inferior esquerdo"""
+        pontos = np.array([[30, 0], [10, 0], [0, 0], [20, 0]], dtype=float)
+        
+        rapid_mm, ordem = estimate_rapid(pontos)
+        
+        self.assertEqual(ordem, [2, 1, 3, 0])
+        self.assertAlmostEqual(rapid_mm, 30.0)
+        self.assertEqual(estimate_rapid(np.empty((0, 2))), (0.0, []))
+    
+    def test_two_opt_nao_piora(self):
+        """Testa que o 2-opt mantém uma permutação e não aumenta o deslocamento"""
+        rng = np.random.default_rng(2)
+        pontos = rng.random((300, 2)) * 500
+        origem = pontos.min(axis=0)
+        guloso = path_length(pontos, nearest_neighbour_tour(pontos, origem), origem)
+        
+        rapid_mm, ordem = estimate_rapid(pontos, orcamento_2opt_s=0.5)
+        
+        self.assertEqual(sorted(ordem), list(range(300)))
+        self.assertLessEqual(rapid_mm, guloso + 1e-9)
+        self.assertAlmostEqual(rapid_mm, path_length(pontos, ordem, origem))
+
+    def test_hilbert_perto_do_guloso(self):
+        """Testa que a ordem da curva de Hilbert fica próxima do vizinho mais próximo"""
+        rng = np.random.default_rng(3)
+        pontos = rng.random((5000, 2)) * 3000
+        guloso, _ = estimate_rapid(pontos, max_pontos_guloso=None)
+        
+        rapid_mm, ordem = estimate_rapid(pontos, max_pontos_guloso=0)
+        
+        self.assertEqual(sorted(ordem), list(range(5000)))
+        self.assertAlmostEqual(rapid_mm, path_length(pontos, ordem, pontos.min(axis=0)))
+        self.assertLess(rapid_mm, guloso * 1.1)
+        self.assertEqual(hilbert_order(np.array([[0.0, 1.0], [1.0, 1.0], [1.0, 0.0], [0.0, 0.0]])).tolist(), [3, 0, 1, 2])
+    
+    def test_cem_mil_perfuracoes_sem_percurso_guloso(self):
+        """Testa 100 mil perfurações (2.000 inserções de um bloco com 50 furos) sem o laço por ponto"""
+        rng = np.random.default_rng(4)
+        angulos = 2 * np.pi * np.arange(50) / 50
+        furos = np.column_stack([30 * np.cos(angulos), 30 * np.sin(angulos)])
+        insercoes = np.column_stack([np.arange(2000) % 50, np.arange(2000) // 50]) * 100.0
+        pontos = (insercoes[:, None, :] + furos[None, :, :]).reshape(-1, 2) + rng.normal(0, 0.5, (100000, 2))
+        
+        with patch('uploadapi.travel.nearest_neighbour_tour') as guloso:
+            inicio = time.perf_counter()
+            rapid_mm, ordem = estimate_rapid(pontos)
+            duracao = time.perf_counter() - inicio
+        
+        guloso.assert_not_called()
+        self.assertEqual(sorted(ordem), list(range(100000)))
+        self.assertAlmostEqual(rapid_mm, path_length(pontos, ordem, pontos.min(axis=0)), places=3)
+        self.assertLess(duracao, 3.0)
+
+
+class GeometryKernelTestCase(TestCase):
+    """Testes para o kernel vetorizado de comprimentos"""
+    
+    def test_bulge_segment_lengths(self):
+        """Testa segmentos retos e em arco, com bulge positivo e negativo"""
+        comprimentos = bulge_segment_lengths(np.array([0.0, 4.0, 4.0, 0.0]), np.array([0.0, 0.0, 4.0, 4.0]),
+                                             np.array([0.0, 1.0, -math.tan(math.pi / 8), 0.0]))
+        
+        self.assertAlmostEqual(comprimentos[0], 4.0)
+        self.assertAlmostEqual(comprimentos[1], 2 * math.pi)  # semicírculo de raio 2
+        self.assertAlmostEqual(comprimentos[2], 4 * (math.pi / 2) / (2 * math.sin(math.pi / 4)))  # arco de 90°
+    
+    def test_batch_varias_polilinhas(self):
+        """Testa que segmentos entre polilinhas diferentes não são somados"""
+        doc = ezdxf.new('R2018')
+        msp = doc.modelspace()
+        lote = GeometryBatch()
+        lote.add_polyline(msp.add_lwpolyline([(0, 0), (1, 0)]))
+        lote.add_polyline(msp.add_lwpolyline([(100, 100), (100, 102)]))
+        lote.add_polyline(msp.add_lwpolyline([(50, 50)]))
+        lote.add_polyline(msp.add_lwpolyline([(0, 0), (2, 0), (2, 2)], close=True))
+        
+        self.assertAlmostEqual(lote.total_length(), 1 + 2 + 4 + math.hypot(2, 2))
+        self.assertEqual(GeometryBatch().total_length(), 0.0)
+    
+    def test_batch_acumula_depois_do_total(self):
+        """Testa que LINEs, ARCs e círculos podem ser acumulados depois de um total já calculado"""
+        msp = ezdxf.new('R2018').modelspace()
+        for dedup in (None, 0.01):
+            with self.subTest(dedup=dedup):
+                lote = GeometryBatch(dedup_tolerance=dedup)
+                lote.add_line(msp.add_line((0, 0), (10, 0)))
+                self.assertAlmostEqual(lote.total_length(), 10.0)
+                
+                lote.add_line(msp.add_line((0, 5), (10, 5)))
+                lote.add_arc(msp.add_arc((0, 0), 1, 0, 90))
+                lote.add_circle(msp.add_circle((50, 50), 1))
+                
+                self.assertAlmostEqual(lote.total_length(), 20.0 + math.pi / 2 + 2 * math.pi)
+                self.assertEqual(lote.contour_stats(), ContourStats(fechados=1, abertos=3))
+    
+    def test_ellipse_lengths(self):
+        """Testa elipse completa, arco de elipse cruzando 0 e elipse degenerada em círculo"""
+        msp = ezdxf.new('R2018').modelspace()
+        # Elipse 100 x 50: série de Ramanujan II como referência (erro ~1e-10)
+        a, b = 100.0, 50.0
+        h = ((a - b) / (a + b)) ** 2
+        ramanujan = math.pi * (a + b) * (1 + 3 * h / (10 + math.sqrt(4 - 3 * h)))
+        lote = GeometryBatch()
+        lote.add_ellipse(msp.add_ellipse((0, 0), (a, 0, 0), b / a))
+        self.assertAlmostEqual(lote.ellipses_length(), ramanujan, places=6)
+        
+        lote = GeometryBatch()
+        lote.add_ellipse(msp.add_ellipse((5, 5), (0, 20, 0), 1.0, 1.5 * math.pi, 0.5 * math.pi))
+        self.assertAlmostEqual(lote.total_length(), 20 * math.pi)
+    
+    def test_spline_tolerancia(self):
+        """Testa que o comprimento do SPLINE converge conforme a tolerância diminui"""
+        spline = ezdxf.new('R2018').modelspace().add_spline([(0, 0), (10, 20), (30, -5), (50, 10), (70, 0)])
+        referencia = DXFProcessor(spline_tolerance=1e-6)._get_entity_length(spline)
+        
+        erros = []
+        for tolerancia in (1.0, 0.1, 0.01):
+            lote = GeometryBatch(spline_tolerance=tolerancia)
+            lote.add_spline(spline)
+            erros.append(referencia - lote.total_length())
+        
+        self.assertTrue(all(erro >= 0 for erro in erros))  # cordas nunca excedem a curva
+        self.assertEqual(erros, sorted(erros, reverse=True))
+        self.assertLess(erros[-1] / referencia, 1e-3)
+
+
 class UploadZipViewTestCase(APITestCase):
     """Testes para a view UploadZipView"""
     
@@ -867,9 +2180,9 @@ class UploadZipViewTestCase(APITestCase):
     def test_post_valid_zip(self, mock_archive_processor):
         """Testa upload de arquivo ZIP válido"""
         # Mock do processador de arquivo
-        mock_processor = Mock()
+        mock_processor = MagicMock()
         mock_processor.validate_file_format.return_value = True
-        mock_processor.extract_archive_recursive.return_value = {
+        mock_processor.open_archive.return_value.__enter__.return_value = {
             'arquivo1.dxf': b'dxf content',
             'arquivo2.pdf': b'pdf content'
         }
@@ -896,6 +2209,9 @@ class UploadZipViewTestCase(APITestCase):
             with patch('uploadapi.views.validar_e_salvar_pecas_e_subpecas_do_json') as mock_validar:
                 mock_validar.return_value = (True, ['grupo1'], [])
                 
+                mock_processor.formato = 'ZIP'
+                mock_processor.estatisticas = {'membros_ignorados': 1}
+                
                 # Criar arquivo ZIP de teste
                 file_content = b'fake zip content'
                 uploaded_file = SimpleUploadedFile('test.zip', file_content)
@@ -905,7 +2221,8 @@ class UploadZipViewTestCase(APITestCase):
                 self.assertEqual(response.status_code, status.HTTP_200_OK)
                 self.assertEqual(response.data['status'], 'upload concluído com sucesso')
                 self.assertEqual(response.data['formato_arquivo'], 'ZIP')
-                self.assertEqual(response.data['total_arquivos'], 2)
+                self.assertEqual(response.data['total_arquivos'], 3)
+                self.assertEqual(response.data['arquivos_selecionados'], 2)
                 self.assertIn('grupos', response.data)
                 self.assertIn('validacao', response.data)
                 self.assertTrue(response.data['validacao']['sucesso'])
@@ -914,11 +2231,13 @@ class UploadZipViewTestCase(APITestCase):
     def test_post_valid_rar(self, mock_archive_processor):
         """Testa upload de arquivo RAR válido"""
         # Mock do processador de arquivo
-        mock_processor = Mock()
+        mock_processor = MagicMock()
         mock_processor.validate_file_format.return_value = True
-        mock_processor.extract_archive_recursive.return_value = {
+        mock_processor.open_archive.return_value.__enter__.return_value = {
             'arquivo1.dxf': b'dxf content'
         }
+        mock_processor.formato = 'RAR'
+        mock_processor.estatisticas = {'membros_ignorados': 0}
         mock_archive_processor.return_value = mock_processor
         
         # Mock do processador DXF
@@ -936,13 +2255,28 @@ class UploadZipViewTestCase(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(response.data['formato_arquivo'], 'RAR')
     
+    def test_formato_detectado_pelo_conteudo(self):
+        """Testa que o formato informado é o detectado na abertura, com a compressão do TAR"""
+        for nome, modo, esperado in (('desenhos.tgz', 'w:gz', 'TAR.GZ'), ('desenhos.tar.gz', 'w:bz2', 'TAR.BZ2'),
+                                     ('desenhos.tar', 'w', 'TAR')):
+            conteudo = io.BytesIO()
+            with tarfile.open(fileobj=conteudo, mode=modo) as tf:
+                info = tarfile.TarInfo('G/1234.pdf')
+                info.size = 3
+                tf.addfile(info, io.BytesIO(b'pdf'))
+            with self.subTest(nome=nome):
+                response = self.client.post(f'{self.url}?dry_run=1', {'file': SimpleUploadedFile(nome, conteudo.getvalue())})
+                
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['formato_arquivo'], esperado)
+    
     @patch('uploadapi.views.ArchiveProcessor')
     def test_post_extraction_error(self, mock_archive_processor):
         """Testa erro na extração do arquivo"""
         # Mock do processador de arquivo com erro
         mock_processor = Mock()
         mock_processor.validate_file_format.return_value = True
-        mock_processor.extract_archive_recursive.side_effect = Exception("Erro de extração")
+        mock_processor.open_archive.side_effect = Exception("Erro de extração")
         mock_archive_processor.return_value = mock_processor
         
         # Criar arquivo de teste
@@ -954,6 +2288,422 @@ class UploadZipViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Erro ao processar o arquivo', response.data['error'])
 
+    def test_post_budget_excedido(self):
+        """Testa resposta estruturada quando o arquivo excede os limites de extração"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            for i in range(5):
+                zf.writestr(f'grupo/peca_{i}.dxf', b'dxf')
+        uploaded_file = SimpleUploadedFile('test.zip', buffer.getvalue())
+        
+        with self.settings(ARCHIVE_EXTRACTION_BUDGET={'max_members': 2}):
+            response = self.client.post(self.url, {'file': uploaded_file})
+        
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(response.data['limite_extracao']['limite'], 'max_members')
+        self.assertEqual(response.data['limite_extracao']['maximo'], 2)
+
+    def _zip_para_plano(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('PECA01/SP01.pdf', b'pdf' * 10)
+            zf.writestr('PECA01/SP01_corte.dxf', b'dxf' * 20)
+            zf.writestr('PECA01/SP02.pdf', b'pdf')
+            zf.writestr('PECA01/avulso.dxf', b'dxf')
+            zf.writestr('PECA01/leia.txt', b'txt')
+        return SimpleUploadedFile('test.zip', buffer.getvalue())
+    
+    def test_post_plan(self):
+        """Testa o planejamento do upload sem processar PDFs e DXFs"""
+        with patch('uploadapi.views.processar_lote_pdfs_dxfs') as mock_processar:
+            response = self.client.post(reverse('upload-plan'), {'file': self._zip_para_plano()})
+        
+        mock_processar.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'plano de processamento')
+        self.assertEqual(response.data['total_arquivos'], 5)
+        self.assertEqual(response.data['arquivos_selecionados'], 4)
+        grupo = response.data['grupos']['PECA01']
+        self.assertEqual(grupo['pares'], [{
+            'codigo': 'SP01',
+            'pdf': {'caminho': 'PECA01/SP01.pdf', 'tamanho': 30},
+            'dxf': {'caminho': 'PECA01/SP01_corte.dxf', 'tamanho': 60},
+        }])
+        self.assertEqual(grupo['pdfs_sem_dxf'], [{'caminho': 'PECA01/SP02.pdf', 'tamanho': 3}])
+        self.assertEqual(grupo['dxfs_sem_pdf'], [{'caminho': 'PECA01/avulso.dxf', 'tamanho': 3}])
+        self.assertEqual(response.data['resumo']['bytes_declarados'], 96)
+        self.assertEqual(response.data['extracao']['membros_ignorados'], 1)
+        self.assertEqual(PecaPrincipal.objects.count(), 0)
+    
+    def test_post_dry_run(self):
+        """Testa ?dry_run=1 no endpoint de upload"""
+        with patch('uploadapi.views.processar_lote_pdfs_dxfs') as mock_processar:
+            response = self.client.post(f'{self.url}?dry_run=1', {'file': self._zip_para_plano()})
+        
+        mock_processar.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['resumo']['pares'], 1)
+    
+    def test_post_plan_budget_excedido(self):
+        """Testa que o planejamento aplica os limites de extração"""
+        with self.settings(ARCHIVE_EXTRACTION_BUDGET={'max_members': 2}):
+            response = self.client.post(reverse('upload-plan'), {'file': self._zip_para_plano()})
+        
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(response.data['limite_extracao']['limite'], 'max_members')
+
+
+class PlanejamentoTestCase(TestCase):
+    """Testes para o pareamento PDF/DXF a partir dos caminhos"""
+    
+    def test_planejar_pareamento(self):
+        """Testa grupos, pares e órfãos do pareamento"""
+        plano = planejar_pareamento([
+            'B/SP1.pdf', 'B/SP1-a.dxf', 'A/SP2.pdf', 'A/SP2.dxf', 'A/outro.dxf', 'raiz.pdf',
+        ])
+        
+        self.assertEqual(list(plano), ['A', 'B', 'raiz'])
+        self.assertEqual(plano['A']['pares'], [{'codigo': 'SP2', 'pdf': 'A/SP2.pdf', 'dxf': 'A/SP2.dxf', 'dxf_nome': 'SP2'}])
+        self.assertEqual(plano['A']['dxfs_sem_pdf'], ['A/outro.dxf'])
+        self.assertEqual(plano['B']['pares'][0]['dxf_nome'], 'SP1-a')
+        self.assertEqual(plano['raiz']['pdfs_sem_dxf'], ['raiz.pdf'])
+    
+    def test_pareamento_pelo_nome_base_mais_longo(self):
+        """Testa que o PDF de nome base mais longo vence, em qualquer ordem dos arquivos"""
+        caminhos = ['G/1234.pdf', 'G/12345.pdf', 'G/12345_a.dxf', 'G/1234_b.dxf', 'G/9.dxf']
+        for ordem in (caminhos, caminhos[::-1]):
+            plano = planejar_pareamento(ordem)
+            pares = {par['dxf']: par['codigo'] for par in plano['G']['pares']}
+            self.assertEqual(pares, {'G/12345_a.dxf': '12345', 'G/1234_b.dxf': '1234'})
+            self.assertEqual(plano['G']['dxfs_sem_pdf'], ['G/9.dxf'])
+    
+    def test_name_matcher(self):
+        """Testa o nome mais longo, o desempate pela posição e nomes que são sufixos de outros"""
+        indice = NameMatcher(['AB', 'CD', 'ABCDE', 'BCD', 'E', ''])
+        
+        self.assertEqual(indice.longest_match('xxABCDEyy'), 'ABCDE')
+        self.assertEqual(indice.longest_match('CD-AB'), 'CD')
+        self.assertEqual(indice.longest_match('ABCD'), 'BCD')
+        self.assertEqual(indice.longest_match('zzE'), 'E')
+        self.assertIsNone(indice.longest_match('xyz'))
+        self.assertIsNone(NameMatcher([]).longest_match('AB'))
+    
+    def test_montar_manifesto(self):
+        """Testa o resumo do manifesto a partir dos metadados"""
+        membros = [Mock(path='G/P.pdf', size=10), Mock(path='G/P.dxf', size=20), Mock(path='G/X.dxf', size=5)]
+        
+        manifesto = montar_manifesto(membros)
+        
+        self.assertEqual(manifesto['resumo'], {
+            'grupos': 1, 'pares': 1, 'pdfs_sem_dxf': 0, 'dxfs_sem_pdf': 1, 'bytes_declarados': 35,
+        })
+    
+    def test_list_archive_members_tar_sem_conteudo(self):
+        """Testa que a listagem de TAR não copia o conteúdo dos membros"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tf:
+            info = tarfile.TarInfo('G/P.pdf')
+            info.size = 3
+            tf.addfile(info, io.BytesIO(b'pdf'))
+        processor = ArchiveProcessor()
+        
+        with patch.object(processor, '_spool_tar_member') as mock_spool:
+            membros = processor.list_archive_members(SimpleUploadedFile('t.tar.gz', buffer.getvalue()))
+        
+        mock_spool.assert_not_called()
+        self.assertEqual([(m.path, m.size) for m in membros], [('G/P.pdf', 3)])
+        with self.assertRaises(Exception):
+            membros[0].read()
+
+
+class WorkerPoolTestCase(TestCase):
+    """Testes para o pool de workers aquecidos"""
+    
+    def _arquivos(self):
+        import fitz
+        pdf = fitz.open()
+        pdf.new_page().insert_text((72, 72), 'SP01')
+        doc = ezdxf.new('R2018')
+        doc.modelspace().add_circle((0, 0), 5, dxfattribs={'layer': 'Corte'})
+        stream = io.StringIO()
+        doc.write(stream)
+        return {'G/SP01.pdf': pdf.tobytes(), 'G/SP01.dxf': stream.getvalue().encode('utf-8')}
+    
+    def test_lote_no_pool_igual_ao_local(self):
+        """Testa que os pares processados nos workers dão o mesmo resultado do processamento local"""
+        arquivos = self._arquivos()
+        local = processar_lote_pdfs_dxfs(arquivos)
+        pool = WorkerPool(1).start()
+        try:
+            with patch('uploadapi.integrated_processor.get_pool', return_value=pool):
+                no_pool = processar_lote_pdfs_dxfs(arquivos)
+            saude = pool.health(verificar=True)
+        finally:
+            pool.shutdown()
+        
+        self.assertEqual(no_pool, local)
+        self.assertAlmostEqual(no_pool['G'][0]['SubPecas']['SP01']['PerimetroMm'], 10 * math.pi, places=2)
+        self.assertEqual(saude['processos_vivos'], 1)
+        self.assertEqual((saude['tarefas_enviadas'], saude['tarefas_concluidas'], saude['tarefas_pendentes']), (1, 1, 0))
+        self.assertIn('ping_ms', saude)
+        self.assertFalse(pool.running)
+    
+    def test_reciclagem_de_workers(self):
+        """Testa que cada worker é substituído depois de max_tasks_per_child tarefas"""
+        pool = WorkerPool(1, max_tasks_per_child=1).start()
+        try:
+            pids = [pool.submit(_ping).result(timeout=120) for _ in range(2)]
+        finally:
+            pool.shutdown()
+        
+        self.assertNotEqual(pids[0], pids[1])
+    
+    def test_pool_iniciado_na_primeira_chamada(self):
+        """Testa que o pool só existe com enabled, é criado no primeiro get_pool e não é herdado por fork"""
+        from django.test import override_settings
+        config = {'workers': 1, 'wait_warmup': False, 'deadline_seconds': None}
+        estado = patch.multiple(worker_pool, _pool=None, _pool_pid=None)
+        estado.start()
+        self.addCleanup(estado.stop)
+        
+        with override_settings(PROCESSING_POOL=config):
+            self.assertIsNone(get_pool())
+        
+        worker_pool._pool_pid = None
+        with patch.object(WorkerPool, 'start', autospec=True, side_effect=lambda pool, aguardar: pool) as mock_start, \
+                patch.object(WorkerPool, 'running', True), \
+                override_settings(PROCESSING_POOL=dict(config, enabled=True)):
+            pool = get_pool()
+            self.assertIsInstance(pool, WorkerPool)
+            self.assertIs(get_pool(), pool)
+            self.assertEqual(mock_start.call_count, 1)
+            
+            # Processo filho de um fork: cria o próprio pool
+            with patch('os.getpid', return_value=os.getpid() + 1):
+                filho = get_pool()
+            self.assertIsNot(filho, pool)
+            self.assertEqual(mock_start.call_count, 2)
+    
+    def test_health_sem_pool(self):
+        """Testa o endpoint de saúde com o pool desativado"""
+        response = Client().get(reverse('worker-pool-health'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'ativo': False, 'workers': 0})
+
+    def test_prazo_excedido_reinicia_pool(self):
+        """Testa que um DXF além do prazo recebe status de erro e o worker travado é substituído"""
+        linhas = ''.join(f"0\nLINE\n8\nCorte\n10\n{i}\n20\n0\n11\n{i}\n21\n5\n" for i in range(200000))
+        arquivos = self._arquivos()
+        arquivos['G/SP01.dxf'] = f"0\nSECTION\n2\nENTITIES\n{linhas}0\nENDSEC\n0\nEOF\n".encode('ascii')
+        pool = WorkerPool(1, deadline_seconds=0.05).start()
+        pids = pool.health()['pids']
+        estatisticas = {}
+        try:
+            with patch('uploadapi.integrated_processor.get_pool', return_value=pool):
+                grupos = processar_lote_pdfs_dxfs(arquivos, estatisticas=estatisticas)
+            saude = pool.health()
+        finally:
+            pool.shutdown()
+        
+        self.assertEqual(grupos['G'][0]['SubPecas']['SP01']['Status'], 'erro: prazo de 0.05 s excedido')
+        self.assertEqual(saude['reinicios'], 1)
+        self.assertNotEqual(saude['pids'], pids)
+        self.assertEqual(estatisticas['pares_com_erro'], 1)
+        self.assertGreaterEqual(estatisticas['arquivos_lentos'][0]['segundos'], 0.05)
+    
+    def test_prazo_nao_conta_a_espera_na_fila(self):
+        """Testa que um par atrás da tarefa de outra requisição não vence o prazo nem reinicia o pool"""
+        arquivos = self._arquivos()
+        local = processar_lote_pdfs_dxfs(arquivos)
+        pool = WorkerPool(1, deadline_seconds=0.3).start()
+        try:
+            # Tarefa de outra requisição ocupando o único worker por mais que o prazo
+            ocupado = pool.submit(time.sleep, 1.0)
+            with patch('uploadapi.integrated_processor.get_pool', return_value=pool):
+                grupos = processar_lote_pdfs_dxfs(arquivos)
+            ocupado.result(timeout=60)
+            ping = pool.submit(time.sleep, 0.5)
+            while pool.started_at(ping) is None:
+                time.sleep(0.01)
+            inicio = pool.started_at(ping)
+            ping.result(timeout=60)
+            saude = pool.health()
+        finally:
+            pool.shutdown()
+        
+        self.assertEqual(grupos, local)
+        self.assertEqual(saude['reinicios'], 0)
+        self.assertLessEqual(inicio, time.monotonic())
+    
+    def test_worker_encerrado(self):
+        """Testa que o pool é reiniciado depois que um worker morre"""
+        pool = WorkerPool(1).start()
+        try:
+            from concurrent.futures.process import BrokenProcessPool
+            with self.assertRaises(BrokenProcessPool):
+                pool.submit(os._exit, 1).result(timeout=60)
+            self.assertTrue(pool.restart(pool.geracao))
+            self.assertFalse(pool.restart(pool.geracao - 1))
+            pid = pool.submit(_ping).result(timeout=60)
+        finally:
+            pool.shutdown()
+        
+        self.assertGreater(pid, 0)
+
+
+class _PoolFalso:
+    """
+    Pool em threads para testar o escalonamento dos pares: DXFs terminados em
+    'trava' nunca terminam e os terminados em 'quebra' derrubam o "worker", quebrando todos os pares em
+    andamento, como no ProcessPoolExecutor. Os terminados em 'fila' só começam
+    0,4 s depois do envio, como atrás das tarefas de outra requisição.
+    """
+    
+    def __init__(self, workers, deadline_seconds):
+        self.workers = workers
+        self.deadline_seconds = deadline_seconds
+        self.geracao = 1
+        self.reinicios = 0
+        self.enviados = []
+        self.com_memo = []
+        self._em_andamento = []
+        self._inicios = {}
+    
+    def submit(self, funcao, pdf_nome, pdf_bytes, dxf_nome, dxf_bytes, margem, dados_pdf=None):
+        import threading
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        futuro = Future()
+        self.enviados.append(dxf_nome)
+        self.com_memo.append(dados_pdf is not None and pdf_bytes is None)
+        self._em_andamento.append(futuro)
+        atraso = 0.4 if dxf_nome.endswith('fila') else 0.0
+        threading.Timer(atraso, lambda: self._inicios.setdefault(futuro, time.monotonic())).start()
+        if dxf_nome.endswith('quebra'):
+            self._quebrar()
+        elif not dxf_nome.endswith('trava'):
+            resultado = ({'nome': dxf_nome, 'material': 'Aço', 'espessura': '2'},
+                         {'perimetro_mm': 10.0, 'tempo_corte_segundos': 1.0}, {'pdf_s': 0.0, 'dxf_s': 0.0})
+            threading.Timer(atraso + 0.05, lambda: futuro.done() or futuro.set_result(resultado)).start()
+        return futuro
+    
+    def started_at(self, futuro):
+        return self._inicios.get(futuro)
+    
+    def _quebrar(self):
+        from concurrent.futures.process import BrokenProcessPool
+        for futuro in self._em_andamento:
+            if not futuro.done():
+                futuro.set_exception(BrokenProcessPool('worker encerrado'))
+        self._em_andamento = []
+    
+    def restart(self, geracao=None):
+        if geracao is not None and geracao != self.geracao:
+            return False
+        self._quebrar()
+        self.geracao += 1
+        self.reinicios += 1
+        return True
+
+
+class MemoDePDFTestCase(TestCase):
+    """Testes para o processamento único de cada PDF do lote"""
+    
+    def test_pdf_com_varios_dxfs_processado_uma_vez(self):
+        """Testa que um PDF com três DXFs é processado uma vez e os demais pares reaproveitam os campos"""
+        import fitz
+        pdf = fitz.open()
+        pdf.new_page(width=830, height=600).insert_text((472, 548), 'SUPORTE', fontsize=7)
+        arquivos = {'G/1234.pdf': pdf.tobytes(), 'G/9999.pdf': pdf.tobytes()}
+        for variante in 'abc':
+            arquivos[f'G/1234_{variante}.dxf'] = b'dxf'
+        estatisticas = {}
+        
+        with patch.object(PDFProcessor, 'process', autospec=True, side_effect=PDFProcessor.process) as mock_process:
+            processar_lote_pdfs_dxfs(arquivos, estatisticas=estatisticas)
+        
+        self.assertEqual(mock_process.call_count, 1)
+        self.assertEqual((estatisticas['pdfs_processados'], estatisticas['pdfs_reaproveitados']), (1, 2))
+        self.assertEqual(sorted(tempo['pdf_s'] > 0 for tempo in estatisticas['arquivos_lentos']), [False, False, True])
+
+
+class IsolamentoDeParesTestCase(TestCase):
+    """Testes para o prazo e o isolamento de falhas no processamento dos pares"""
+    
+    def _processar(self, codigos, pool):
+        arquivos = {}
+        for codigo in codigos:
+            arquivos[f'G/{codigo}.pdf'] = b'pdf'
+            arquivos[f'G/{codigo}.dxf'] = b'dxf'
+        estatisticas = {}
+        with patch('uploadapi.integrated_processor.get_pool', return_value=pool):
+            grupos = processar_lote_pdfs_dxfs(arquivos, estatisticas=estatisticas)
+        return {codigo: dados['Status'] for codigo, dados in grupos['G'][0]['SubPecas'].items()}, estatisticas
+    
+    def test_worker_encerrado_isola_o_par(self):
+        """Testa que o par que derruba o worker é identificado reenviando os pares afetados um a um"""
+        pool = _PoolFalso(workers=2, deadline_seconds=None)
+        
+        status_pares, estatisticas = self._processar(['p1', 'p2_quebra', 'p3', 'p4'], pool)
+        
+        self.assertEqual(status_pares, {
+            'p1': 'processado', 'p2_quebra': 'erro: o processo do worker foi encerrado inesperadamente',
+            'p3': 'processado', 'p4': 'processado',
+        })
+        self.assertEqual(pool.enviados, ['p1', 'p2_quebra', 'p1', 'p2_quebra', 'p3', 'p4'])
+        self.assertEqual(pool.reinicios, 2)
+        self.assertEqual((estatisticas['pares'], estatisticas['pares_com_erro']), (4, 1))
+    
+    def test_prazo_excedido_nao_afeta_os_demais(self):
+        """Testa que só o par travado recebe erro e os pares interrompidos pelo reinício são reenviados"""
+        pool = _PoolFalso(workers=2, deadline_seconds=0.3)
+        
+        status_pares, estatisticas = self._processar(['p1', 'p2', 'p3_trava'], pool)
+        
+        self.assertEqual(status_pares, {'p1': 'processado', 'p2': 'processado', 'p3_trava': 'erro: prazo de 0.3 s excedido'})
+        self.assertEqual(pool.reinicios, 1)
+        self.assertEqual(estatisticas['arquivos_lentos'][0]['dxf'], 'G/p3_trava.dxf')
+        self.assertEqual(estatisticas['arquivos_lentos'][0]['status'], 'erro: prazo de 0.3 s excedido')
+    
+    def test_prazo_conta_do_inicio_no_worker(self):
+        """Testa que um par que espera na fila além do prazo não recebe erro nem reinicia o pool"""
+        pool = _PoolFalso(workers=2, deadline_seconds=0.2)
+        
+        status_pares, _ = self._processar(['p1_fila', 'p2'], pool)
+        
+        self.assertEqual(status_pares, {'p1_fila': 'processado', 'p2': 'processado'})
+        self.assertEqual(pool.reinicios, 0)
+    
+    def test_falha_sem_pool_nao_afeta_os_demais(self):
+        """Testa que, sem o pool, a exceção de um par vira status de erro e os demais seguem"""
+        def processar(pdf_nome, pdf_bytes, dxf_nome, *args):
+            if dxf_nome.endswith('falha'):
+                raise ValueError('PDF corrompido')
+            return ({'nome': dxf_nome, 'material': 'Aço', 'espessura': '2'},
+                    {'perimetro_mm': 10.0, 'tempo_corte_segundos': 1.0}, {'pdf_s': 0.0, 'dxf_s': 0.0})
+        
+        with patch('uploadapi.integrated_processor.processar_par', side_effect=processar):
+            status_pares, estatisticas = self._processar(['p1', 'p2_falha', 'p3'], None)
+        
+        self.assertEqual(status_pares, {'p1': 'processado', 'p2_falha': 'erro: PDF corrompido', 'p3': 'processado'})
+        self.assertEqual((estatisticas['pares'], estatisticas['pares_com_erro']), (3, 1))
+    
+    def test_pdf_processado_uma_vez_no_pool(self):
+        """Testa que os pares de um PDF em processamento esperam e depois recebem os campos guardados"""
+        pool = _PoolFalso(workers=2, deadline_seconds=None)
+        arquivos = {'G/p1.pdf': b'pdf', 'G/p2.pdf': b'pdf'}
+        for dxf in ('p1_a', 'p1_b', 'p1_c', 'p2'):
+            arquivos[f'G/{dxf}.dxf'] = b'dxf'
+        estatisticas = {}
+        
+        with patch('uploadapi.integrated_processor.get_pool', return_value=pool):
+            processar_lote_pdfs_dxfs(arquivos, estatisticas=estatisticas)
+        
+        self.assertEqual(pool.enviados, ['p1_a', 'p2', 'p1_b', 'p1_c'])
+        self.assertEqual(pool.com_memo, [False, False, True, True])
+        self.assertEqual((estatisticas['pdfs_processados'], estatisticas['pdfs_reaproveitados']), (2, 2))
+
 
 class ModelosTestCase(TestCase):
     """Testes para os modelos PecaPrincipal e SubPeca"""
@@ -0,0 +1,288 @@
+"""
+Estimativa do deslocamento rápido (rapid) da cabeça de corte entre contornos.
+
+Os pontos de perfuração são ordenados por um percurso guloso do vizinho mais
+próximo, consultando uma KD-tree implícita com remoção dos pontos já visitados
+(O(n log n) em vez de O(n²)); opcionalmente o percurso é melhorado por 2-opt
+até esgotar um orçamento de tempo.
+
+O percurso guloso anda um ponto por vez em Python; acima de MAX_GREEDY_POINTS
+perfurações a ordem vem da curva de Hilbert, melhorada por 2-opt em janelas
+curtas, tudo vetorizado (fica poucos por cento acima do guloso).
+"""
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Perfurações acima das quais o percurso guloso dá lugar à curva de Hilbert
+MAX_GREEDY_POINTS = 10000
+
+# Bits por eixo da grade em que os pontos são posicionados na curva de Hilbert
+_HILBERT_BITS = 16
+
+
+class KDTree:
+    """
+    KD-tree 2D implícita sobre um array de pontos, com remoção.
+
+    Os pontos são permutados de modo que o elemento do meio de cada intervalo
+    [lo, hi) é o nó que divide o intervalo (eixo x nos níveis pares, y nos
+    ímpares). Cada nó guarda quantos pontos ainda não removidos há na sua
+    subárvore, para que subárvores vazias sejam podadas nas consultas.
+    """
+
+    def __init__(self, pontos: np.ndarray):
+        """
+        Args:
+            pontos: Array (n, 2) de coordenadas
+        """
+        n = len(pontos)
+        self._ordem = np.arange(n)
+        self._construir(np.asarray(pontos, dtype=np.float64), 0, n, 0)
+        permutados = np.asarray(pontos, dtype=np.float64)[self._ordem]
+        self._x = permutados[:, 0].tolist()
+        self._y = permutados[:, 1].tolist()
+        self._ordem = self._ordem.tolist()
+        self._posicao = [0] * n
+        for posicao, indice in enumerate(self._ordem):
+            self._posicao[indice] = posicao
+        self._vivo = [True] * n
+        self._restantes = [0] * n
+        self._contar(0, n)
+
+    def _construir(self, pontos: np.ndarray, lo: int, hi: int, eixo: int):
+        pilha = [(lo, hi, eixo)]
+        while pilha:
+            lo, hi, eixo = pilha.pop()
+            if hi - lo <= 1:
+                continue
+            meio = (lo + hi) // 2
+            trecho = self._ordem[lo:hi]
+            self._ordem[lo:hi] = trecho[np.argpartition(pontos[trecho, eixo], meio - lo)]
+            pilha.append((lo, meio, 1 - eixo))
+            pilha.append((meio + 1, hi, 1 - eixo))
+
+    def _contar(self, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return 0
+        meio = (lo + hi) // 2
+        total = 1 + self._contar(lo, meio) + self._contar(meio + 1, hi)
+        self._restantes[meio] = total
+        return total
+
+    def __len__(self) -> int:
+        return self._restantes[(len(self._x)) // 2] if self._x else 0
+
+    def remove(self, indice: int):
+        """Remove o ponto de índice `indice` (índice no array original)."""
+        posicao = self._posicao[indice]
+        if not self._vivo[posicao]:
+            return
+        self._vivo[posicao] = False
+        lo, hi = 0, len(self._x)
+        while lo < hi:
+            meio = (lo + hi) // 2
+            self._restantes[meio] -= 1
+            if posicao == meio:
+                break
+            if posicao < meio:
+                hi = meio
+            else:
+                lo = meio + 1
+
+    def nearest(self, qx: float, qy: float) -> int:
+        """
+        Índice (no array original) do ponto não removido mais próximo de (qx, qy),
+        ou -1 se todos foram removidos.
+        """
+        xs, ys, vivo, restantes = self._x, self._y, self._vivo, self._restantes
+        melhor, melhor_d2 = -1, float('inf')
+        pilha = [(0, len(xs), 0, 0.0)]
+        while pilha:
+            lo, hi, eixo, limite = pilha.pop()
+            if lo >= hi or limite >= melhor_d2:
+                continue
+            meio = (lo + hi) // 2
+            if not restantes[meio]:
+                continue
+            dx, dy = xs[meio] - qx, ys[meio] - qy
+            if vivo[meio]:
+                d2 = dx * dx + dy * dy
+                if d2 < melhor_d2:
+                    melhor, melhor_d2 = meio, d2
+            diferenca = -dx if eixo == 0 else -dy
+            perto, longe = ((lo, meio), (meio + 1, hi)) if diferenca < 0 else ((meio + 1, hi), (lo, meio))
+            # O lado distante só interessa se o plano de corte estiver mais perto que o melhor atual
+            pilha.append((longe[0], longe[1], 1 - eixo, diferenca * diferenca))
+            pilha.append((perto[0], perto[1], 1 - eixo, 0.0))
+        return self._ordem[melhor] if melhor >= 0 else -1
+
+
+def nearest_neighbour_tour(pontos: np.ndarray, origem: Sequence[float]) -> List[int]:
+    """
+    Percurso guloso: a partir de `origem`, visita sempre o ponto não visitado
+    mais próximo.
+
+    Returns:
+        Índices dos pontos na ordem de visita
+    """
+    arvore = KDTree(pontos)
+    x, y = float(origem[0]), float(origem[1])
+    percurso = []
+    for _ in range(len(pontos)):
+        proximo = arvore.nearest(x, y)
+        arvore.remove(proximo)
+        percurso.append(proximo)
+        x, y = pontos[proximo]
+    return percurso
+
+
+def hilbert_order(pontos: np.ndarray) -> np.ndarray:
+    """
+    Índices dos pontos na ordem em que a curva de Hilbert (a partir do canto
+    inferior esquerdo da caixa envolvente) passa por eles.
+    """
+    minimo = pontos.min(axis=0)
+    escala = float((pontos.max(axis=0) - minimo).max()) or 1.0
+    lado = 1 << _HILBERT_BITS
+    x, y = ((pontos - minimo) / escala * (lado - 1)).astype(np.int64).T
+    distancia = np.zeros(len(pontos), dtype=np.int64)
+    s = lado >> 1
+    while s:
+        rx, ry = (x & s) > 0, (y & s) > 0
+        distancia += s * s * ((3 * rx) ^ ry)
+        # Gira o quadrante para que a curva de cada subquadrado comece e termine nos cantos certos
+        girar = ~ry
+        espelhar = girar & rx
+        x = np.where(espelhar, lado - 1 - x, x)
+        y = np.where(espelhar, lado - 1 - y, y)
+        x, y = np.where(girar, y, x), np.where(girar, x, y)
+        s >>= 1
+    return np.argsort(distancia, kind='stable')
+
+
+def window_two_opt(pontos: np.ndarray, percurso: Sequence[int], origem: Sequence[float],
+                   janela: int = 8, rodadas: int = 3) -> List[int]:
+    """
+    2-opt restrito a trechos de até `janela` pontos, aplicado a todo o caminho
+    de uma vez: em cada passada, as arestas i (espaçadas de janela + 1, para
+    que as inversões não se sobreponham) testam de forma vetorizada todas as
+    inversões i+1..i+k (k = 2..janela) e aplicam a melhor que encurta o caminho.
+    As passadas percorrem todos os deslocamentos do espaçamento, `rodadas` vezes.
+    """
+    caminho = np.vstack([np.asarray(origem, dtype=np.float64)[None, :2], pontos[np.asarray(percurso)]])
+    n = len(caminho)
+    ordem = np.arange(n)
+    for _ in range(rodadas):
+        for deslocamento in range(janela + 1):
+            p = caminho[ordem]
+            i = np.arange(deslocamento, n - 3, janela + 1)
+            if len(i) == 0:
+                continue
+            aresta_i = np.hypot(*(p[i] - p[i + 1]).T)
+            melhor_ganho = np.zeros(len(i))
+            melhor_k = np.zeros(len(i), dtype=np.int64)
+            for k in range(2, janela + 1):
+                # Inverter i+1..j troca as arestas (i, i+1) e (j, j+1) por (i, j) e (i+1, j+1)
+                j = np.minimum(i + k, n - 2)
+                ganho = (aresta_i + np.hypot(*(p[j] - p[j + 1]).T)
+                         - np.hypot(*(p[i] - p[j]).T) - np.hypot(*(p[i + 1] - p[j + 1]).T))
+                ganho[i + k > n - 2] = 0.0
+                melhorou = ganho > melhor_ganho
+                melhor_ganho[melhorou] = ganho[melhorou]
+                melhor_k[melhorou] = k
+            aplicar = melhor_ganho > 1e-9
+            inicio, k = i[aplicar] + 1, melhor_k[aplicar]
+            if len(inicio) == 0:
+                continue
+            # Posição de destino e de origem de cada ponto dos trechos invertidos
+            deslocamentos = np.arange(k.sum()) - np.repeat(np.cumsum(k) - k, k)
+            destino = np.repeat(inicio, k) + deslocamentos
+            ordem[destino] = ordem[np.repeat(inicio + k - 1, k) - deslocamentos]
+    return [percurso[k - 1] for k in ordem[1:].tolist()]
+
+
+def space_filling_tour(pontos: np.ndarray, origem: Sequence[float]) -> List[int]:
+    """
+    Percurso aproximado para muitos pontos: a ordem da curva de Hilbert
+    melhorada por window_two_opt, em tempo ~n log n sem laço por ponto.
+    
+    Returns:
+        Índices dos pontos na ordem de visita
+    """
+    return window_two_opt(pontos, hilbert_order(pontos).tolist(), origem)
+
+
+def path_length(pontos: np.ndarray, percurso: Sequence[int], origem: Sequence[float]) -> float:
+    """Comprimento do caminho aberto origem -> pontos[percurso[0]] -> ... -> último ponto."""
+    if len(percurso) == 0:
+        return 0.0
+    caminho = np.vstack([np.asarray(origem, dtype=np.float64)[None, :2], pontos[np.asarray(percurso)]])
+    return float(np.hypot(*np.diff(caminho, axis=0).T).sum())
+
+
+def two_opt(pontos: np.ndarray, percurso: List[int], origem: Sequence[float], orcamento_s: float) -> List[int]:
+    """
+    Melhora um caminho aberto (que começa em `origem` e não retorna) com
+    movimentos 2-opt até não haver melhora ou até esgotar `orcamento_s`.
+
+    Para cada aresta (a, b) o ganho de todas as trocas com as arestas
+    seguintes (c, d) é calculado de forma vetorizada e a melhor é aplicada
+    invertendo o trecho b..c. Inverter o final do caminho (sem aresta c, d)
+    também é considerado.
+    """
+    limite = time.perf_counter() + orcamento_s
+    caminho = np.vstack([np.asarray(origem, dtype=np.float64)[None, :2], pontos[np.asarray(percurso)]])
+    n = len(caminho)
+    ordem = np.arange(n)
+    melhorou = True
+    while melhorou and time.perf_counter() < limite:
+        melhorou = False
+        for i in range(n - 2):
+            if time.perf_counter() >= limite:
+                break
+            p = caminho[ordem]
+            a, b = p[i], p[i + 1]
+            c, d = p[i + 2:], p[i + 3:]
+            d_ab = np.hypot(*(a - b))
+            # c = p[j], d = p[j + 1] para j em i+2 .. n-2; o último j (n-1) não tem d
+            ganho = d_ab - np.hypot(*(a - c).T)
+            ganho[:-1] += np.hypot(*(c[:-1] - d).T) - np.hypot(*(b - d).T)
+            melhor = int(np.argmax(ganho))
+            if ganho[melhor] > 1e-9:
+                j = i + 2 + melhor
+                ordem[i + 1:j + 1] = ordem[i + 1:j + 1][::-1].copy()
+                melhorou = True
+    return [percurso[k - 1] for k in ordem[1:]]
+
+
+def estimate_rapid(pontos: np.ndarray, origem: Sequence[float] = None, orcamento_2opt_s: float = 0.0,
+                   max_pontos_guloso: Optional[int] = MAX_GREEDY_POINTS) -> Tuple[float, List[int]]:
+    """
+    Estima o deslocamento rápido para visitar todos os pontos de perfuração.
+
+    Args:
+        pontos: Array (n, 2) com o ponto de perfuração de cada contorno
+        origem: Posição inicial da cabeça; por padrão o canto inferior esquerdo
+            dos pontos
+        orcamento_2opt_s: Tempo máximo (s) de melhoria 2-opt; 0 desativa
+        max_pontos_guloso: Acima desta quantidade de pontos a ordem vem de
+            space_filling_tour em vez do vizinho mais próximo; None sempre usa
+            o vizinho mais próximo
+
+    Returns:
+        Tupla (deslocamento em mm, ordem de visita)
+    """
+    pontos = np.asarray(pontos, dtype=np.float64).reshape(-1, 2)
+    if len(pontos) == 0:
+        return 0.0, []
+    if origem is None:
+        origem = pontos.min(axis=0)
+    if max_pontos_guloso is not None and len(pontos) > max_pontos_guloso:
+        percurso = space_filling_tour(pontos, origem)
+    else:
+        percurso = nearest_neighbour_tour(pontos, origem)
+    if orcamento_2opt_s > 0 and len(percurso) > 2:
+        percurso = two_opt(pontos, percurso, origem, orcamento_2opt_s)
+    return path_length(pontos, percurso, origem), percurso
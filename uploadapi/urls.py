@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import UploadZipView, DashboardStatsView, DashboardPecasView, DashboardDetalhesPecaView
+from .views import (
+    UploadZipView, UploadPlanView, DashboardStatsView, DashboardPecasView, DashboardDetalhesPecaView,
+    WorkerPoolHealthView,
+)
 
 urlpatterns = [
     path('upload/', UploadZipView.as_view(), name='upload-archive'),
+    path('upload/plan/', UploadPlanView.as_view(), name='upload-plan'),
+    path('workers/health/', WorkerPoolHealthView.as_view(), name='worker-pool-health'),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('dashboard/pecas/', DashboardPecasView.as_view(), name='dashboard-pecas'),
     path('dashboard/pecas/<str:codigo_peca>/', DashboardDetalhesPecaView.as_view(), name='dashboard-detalhes-peca'),
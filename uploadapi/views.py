@@ -1,4 +1,5 @@
 from django.shortcuts import render
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -8,9 +9,10 @@ from django.utils import timezone
 from datetime import timedelta
 import io
 from .dxf_processor import DXFProcessor
-from .archive_processor import ArchiveProcessor
-from .integrated_processor import processar_lote_pdfs_dxfs
+from .archive_processor import ArchiveProcessor, ExtractionBudget, ExtractionBudgetExceeded
+from .integrated_processor import processar_lote_pdfs_dxfs, montar_manifesto
 from .models import validar_e_salvar_pecas_e_subpecas_do_json, PecaPrincipal, SubPeca
+from .worker_pool import get_pool
 from django.core.exceptions import ObjectDoesNotExist
 
 # Create your views here.
@@ -18,14 +20,21 @@ from django.core.exceptions import ObjectDoesNotExist
 class UploadZipView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     MAX_UPLOAD_SIZE = 200 * 1024 * 1024  # 200MB
+    # Com ?dry_run=1 (ou na UploadPlanView) apenas o índice do arquivo é lido
+    DRY_RUN = False
 
     def post(self, request, format=None):
         uploaded_file = request.FILES.get('file')
         if not uploaded_file:
             return Response({'error': 'Nenhum arquivo enviado.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Validar formato do arquivo
-        archive_processor = ArchiveProcessor()
+        # Validar formato do arquivo; só PDFs e DXFs serão descompactados
+        archive_processor = ArchiveProcessor(
+            allowed_extensions=ArchiveProcessor.PIPELINE_EXTENSIONS,
+            parallel_workers=getattr(settings, 'ARCHIVE_EXTRACTION_WORKERS', 0),
+            budget=ExtractionBudget(**getattr(settings, 'ARCHIVE_EXTRACTION_BUDGET', {})),
+            rar_bulk_extraction=getattr(settings, 'ARCHIVE_RAR_BULK_EXTRACTION', False)
+        )
         if not archive_processor.validate_file_format(uploaded_file.name):
             return Response({
                 'error': f'Formato de arquivo não suportado. Formatos aceitos: {", ".join(archive_processor.get_supported_formats())}'
@@ -34,20 +43,26 @@ class UploadZipView(APIView):
         if uploaded_file.size > self.MAX_UPLOAD_SIZE:
             return Response({'error': 'Arquivo excede o limite de 200MB.'}, status=status.HTTP_400_BAD_REQUEST)
         
+        if self.DRY_RUN or request.query_params.get('dry_run', '').lower() in ('1', 'true'):
+            return self._responder_plano(archive_processor, uploaded_file)
+        
         try:
-            # Descompactar arquivo em memória (ZIP ou RAR)
-            arquivos_extraidos = archive_processor.extract_archive_recursive(uploaded_file)
-            
-            # Processamento consolidado PDF + DXF
-            pecas = processar_lote_pdfs_dxfs(arquivos_extraidos)
+            # Abrir arquivo (ZIP, RAR ou TAR); os membros são descompactados sob demanda
+            with archive_processor.open_archive(uploaded_file) as arquivos_extraidos:
+                # Processamento consolidado PDF + DXF
+                processamento = {}
+                pecas = processar_lote_pdfs_dxfs(arquivos_extraidos, estatisticas=processamento)
             
             # Validar e salvar no banco de dados
             sucesso_validacao, sucessos, erros = validar_e_salvar_pecas_e_subpecas_do_json(pecas)
             
             response_data = {
                 'status': 'upload concluído com sucesso',
-                'formato_arquivo': uploaded_file.name.split('.')[-1].upper(),
-                'total_arquivos': len(arquivos_extraidos),
+                'formato_arquivo': archive_processor.formato,
+                'total_arquivos': len(arquivos_extraidos) + archive_processor.estatisticas['membros_ignorados'],
+                'arquivos_selecionados': len(arquivos_extraidos),
+                'extracao': dict(archive_processor.estatisticas),
+                'processamento': processamento,
                 'grupos': pecas,
                 'validacao': {
                     'sucesso': sucesso_validacao,
@@ -62,8 +77,54 @@ class UploadZipView(APIView):
             
             return Response(response_data, status=status.HTTP_200_OK)
             
+        except ExtractionBudgetExceeded as e:
+            return Response({
+                'error': f'Erro ao processar o arquivo: {str(e)}',
+                'limite_extracao': e.to_dict()
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except Exception as e:
+            return Response({'error': f'Erro ao processar o arquivo: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    def _responder_plano(self, archive_processor, uploaded_file):
+        """Responde com o manifesto do upload (grupos, pares e órfãos) sem processar PDFs e DXFs."""
+        try:
+            membros = archive_processor.list_archive_members(uploaded_file)
+        except ExtractionBudgetExceeded as e:
+            return Response({
+                'error': f'Erro ao processar o arquivo: {str(e)}',
+                'limite_extracao': e.to_dict()
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         except Exception as e:
             return Response({'error': f'Erro ao processar o arquivo: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        manifesto = montar_manifesto(membros)
+        return Response({
+            'status': 'plano de processamento',
+            'formato_arquivo': archive_processor.formato,
+            'total_arquivos': len(membros) + archive_processor.estatisticas['membros_ignorados'],
+            'arquivos_selecionados': len(membros),
+            'extracao': dict(archive_processor.estatisticas),
+            'grupos': manifesto['grupos'],
+            'resumo': manifesto['resumo']
+        }, status=status.HTTP_200_OK)
+
+
+class UploadPlanView(UploadZipView):
+    """View que planeja o processamento de um upload lendo apenas o índice do arquivo"""
+    DRY_RUN = True
+
+
+class WorkerPoolHealthView(APIView):
+    """View que informa o estado do pool de workers de processamento (?verificar=1 mede um ping)"""
+    
+    def get(self, request, format=None):
+        pool = get_pool()
+        if pool is None:
+            return Response({'ativo': False, 'workers': 0}, status=status.HTTP_200_OK)
+        verificar = request.query_params.get('verificar', '').lower() in ('1', 'true')
+        saude = pool.health(verificar=verificar)
+        codigo = status.HTTP_200_OK if saude['processos_vivos'] > 0 and 'ping_erro' not in saude else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(saude, status=codigo)
 
 
 class DashboardStatsView(APIView):
@@ -0,0 +1,372 @@
+"""
+Pool persistente de processos aquecidos para o processamento de pares PDF/DXF.
+
+O pool é opcional (PROCESSING_POOL['enabled'] no settings) e cada processo do
+servidor cria o seu na primeira chamada de get_pool(), nunca ao importar a
+aplicação: comandos do manage.py, testes e workers do Celery não iniciam
+processos, e um processo criado por fork (gunicorn --preload) não herda o
+pool do pai. Os workers usam o contexto spawn: cada um importa ezdxf e fitz,
+monta o seu DXFProcessor com a configuração do settings e processa um DXF e
+um PDF mínimos antes de receber tarefas, de modo que só a primeira requisição
+de cada processo espera o aquecimento (um hook post_fork do gunicorn pode
+chamar get_pool() para adiantá-lo). Cada worker é substituído depois de
+max_tasks_per_child tarefas, para limitar o crescimento de memória.
+
+Um worker travado (tarefa além do prazo) ou encerrado por uma falha nativa
+(BrokenProcessPool) é isolado do processo do servidor: o pool é reiniciado com
+restart() e só as tarefas daquele momento são afetadas. Como as requisições
+compartilham o pool, uma tarefa pode esperar na fila atrás das de outras
+requisições; cada worker informa quando começa uma tarefa (started_at), e o
+prazo conta a partir daí.
+"""
+import atexit
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+# DXFProcessor do worker atual, criado pelo initializer do pool
+_dxf_processor = None
+
+# Fila pela qual o worker atual informa (tarefa, instante) ao começar cada tarefa
+_fila_inicios = None
+
+
+def worker_dxf_processor():
+    """DXFProcessor do processo worker (montado com a configuração recebida pelo pool)."""
+    return _dxf_processor
+
+
+def _inicializar_worker(config_dxf: Dict, fila_inicios=None):
+    """Initializer de cada processo do pool: importa, configura e aquece os processadores."""
+    global _dxf_processor, _fila_inicios
+    from .dxf_processor import DXFProcessor
+    from . import integrated_processor  # noqa: F401  (módulo das tarefas)
+    _fila_inicios = fila_inicios
+    _dxf_processor = DXFProcessor(**config_dxf)
+    _aquecer(_dxf_processor)
+
+
+def _executar(tarefa: int, funcao: Callable, args: tuple, kwargs: Dict):
+    """Executa uma tarefa enviada por WorkerPool.submit, informando antes o seu início."""
+    if _fila_inicios is not None:
+        # time.monotonic() usa o mesmo relógio em todos os processos da máquina
+        _fila_inicios.put((tarefa, time.monotonic()))
+    return funcao(*args, **kwargs)
+
+
+def _aquecer(dxf_processor):
+    """
+    Processa um DXF e um PDF mínimos, para que imports tardios do ezdxf e do
+    fitz, caches de fontes e o código NumPy dos kernels já estejam carregados.
+    """
+    import ezdxf
+    import fitz
+
+    doc = ezdxf.new('R2018')
+    msp = doc.modelspace()
+    msp.add_lwpolyline([(0, 0, 0, 0, 0.5), (10, 0), (10, 10), (0, 10)], format='xyseb', close=True,
+                       dxfattribs={'layer': 'Corte'})
+    msp.add_circle((5, 5), 1, dxfattribs={'layer': 'Corte'})
+    msp.add_line((20, 0), (30, 0), dxfattribs={'layer': 'Corte'})
+    msp.add_arc((30, 5), 5, 270, 90, dxfattribs={'layer': 'Corte'})
+    stream = io.StringIO()
+    doc.write(stream)
+    dxf_processor.process_single_dxf_completo('aquecimento', stream.getvalue().encode('utf-8'), 'aço', '2')
+
+    pdf = fitz.open()
+    pagina = pdf.new_page()
+    pagina.insert_text((72, 72), 'aquecimento')
+    with fitz.open(stream=pdf.tobytes(), filetype='pdf') as copia:
+        copia.load_page(0).get_text('text', clip=fitz.Rect(0, 0, 200, 100))
+    pdf.close()
+
+
+def _ping() -> int:
+    """Tarefa vazia: confirma que um worker está pronto e informa o seu pid."""
+    time.sleep(0.05)
+    return os.getpid()
+
+
+class WorkerPool:
+    """ProcessPoolExecutor de workers aquecidos, com contadores para o relatório de saúde."""
+
+    def __init__(self, workers: int, max_tasks_per_child: Optional[int] = None, config_dxf: Optional[Dict] = None,
+                 deadline_seconds: Optional[float] = None):
+        """
+        Args:
+            workers: Quantidade de processos
+            max_tasks_per_child: Tarefas por processo antes de substituí-lo (None: nunca)
+            config_dxf: Argumentos do DXFProcessor de cada worker
+            deadline_seconds: Prazo de cada tarefa, contado a partir de started_at e
+                aplicado por quem a envia (None: sem prazo)
+        """
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.config_dxf = config_dxf or {}
+        self.deadline_seconds = deadline_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._lock_reinicio = threading.Lock()
+        self._fila_inicios = None
+        self._contador_tarefas = itertools.count()
+        self._tarefas: Dict[Future, int] = {}
+        self._inicios: Dict[int, float] = {}
+        self._pendentes = set()
+        # Incrementada a cada start(); restart() só reinicia o executor da geração informada
+        self.geracao = 0
+        self._reinicios = 0
+        self._enviadas = 0
+        self._concluidas = 0
+        self._com_erro = 0
+        self._iniciado_em: Optional[datetime] = None
+        self._aquecimento_s = 0.0
+
+    def start(self, aguardar: bool = True, timeout: float = 120.0) -> 'WorkerPool':
+        """
+        Cria os processos do pool.
+
+        Args:
+            aguardar: Se True, só retorna quando todos os workers terminaram o
+                aquecimento (ou após `timeout` segundos)
+            timeout: Tempo máximo de espera do aquecimento
+        """
+        inicio = time.perf_counter()
+        contexto = multiprocessing.get_context('spawn')
+        # Uma fila nova a cada início: um worker morto durante um put() deixaria a anterior travada
+        fila_inicios = contexto.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=contexto,
+            initializer=_inicializar_worker,
+            initargs=(self.config_dxf, fila_inicios),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+        with self._lock:
+            self._fila_inicios = fila_inicios
+            self._tarefas.clear()
+            self._inicios.clear()
+            self._pendentes.clear()
+        self._iniciado_em = datetime.now(timezone.utc)
+        self.geracao += 1
+        if aguardar:
+            # Cada envio sem worker ocioso cria um processo; os pings só
+            # respondem depois do initializer, isto é, com o worker aquecido
+            prontos = set()
+            limite = time.monotonic() + timeout
+            while len(prontos) < self.workers and time.monotonic() < limite:
+                pings = [self._executor.submit(_ping) for _ in range(self.workers)]
+                prontos.update(ping.result(timeout=max(limite - time.monotonic(), 0.1)) for ping in pings)
+        self._aquecimento_s = time.perf_counter() - inicio
+        return self
+
+    def restart(self, geracao: Optional[int] = None) -> bool:
+        """
+        Encerra à força os processos do pool (inclusive um worker travado) e
+        inicia outros. O aquecimento não é aguardado: as tarefas enviadas
+        esperam na fila até os novos workers ficarem prontos, sem que a espera
+        conte no prazo (ver started_at).
+
+        Tarefas ainda em andamento terminam com BrokenProcessPool. Com várias
+        threads do servidor compartilhando o pool, cada uma informa a geração
+        em que enviou as tarefas afetadas, e o pool é reiniciado uma única vez.
+
+        Args:
+            geracao: Geração (atributo `geracao`) do executor a reiniciar; None
+                reinicia o atual
+
+        Returns:
+            True se o pool foi reiniciado por esta chamada
+        """
+        with self._lock_reinicio:
+            if geracao is not None and geracao != self.geracao:
+                return False
+            self._encerrar_processos()
+            self.start(aguardar=False)
+            with self._lock:
+                self._reinicios += 1
+            return True
+
+    def _encerrar_processos(self):
+        if self._executor is None:
+            return
+        processos = list((getattr(self._executor, '_processes', None) or {}).values())
+        for processo in processos:
+            processo.kill()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for processo in processos:
+            processo.join(timeout=5)
+        self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def submit(self, funcao: Callable, *args, **kwargs) -> Future:
+        """
+        Envia uma tarefa ao pool; `funcao` precisa ser importável pelo worker (nível de módulo).
+
+        Se o executor já estiver quebrado (um worker morreu ocioso), o pool é
+        reiniciado e a tarefa é enviada ao novo executor.
+        """
+        if self._executor is None:
+            raise RuntimeError("Pool de workers não iniciado")
+        geracao = self.geracao
+        with self._lock:
+            tarefa = next(self._contador_tarefas)
+            # Registrada antes do envio, para que o aviso de início não seja descartado
+            self._pendentes.add(tarefa)
+        try:
+            futuro = self._executor.submit(_executar, tarefa, funcao, args, kwargs)
+        except BrokenProcessPool:
+            self.restart(geracao)
+            with self._lock:
+                self._pendentes.add(tarefa)
+            futuro = self._executor.submit(_executar, tarefa, funcao, args, kwargs)
+        with self._lock:
+            self._enviadas += 1
+            self._tarefas[futuro] = tarefa
+        futuro.add_done_callback(self._registrar)
+        return futuro
+
+    def started_at(self, futuro: Future) -> Optional[float]:
+        """
+        Instante (time.monotonic) em que um worker começou a tarefa, ou None se
+        ela ainda espera na fila (atrás das tarefas de outras requisições ou do
+        aquecimento de um worker novo).
+        """
+        with self._lock:
+            self._ler_inicios()
+            return self._inicios.get(self._tarefas.get(futuro))
+    
+    def _ler_inicios(self):
+        if self._fila_inicios is None:
+            return
+        try:
+            while True:
+                tarefa, instante = self._fila_inicios.get_nowait()
+                # O aviso pode chegar depois do resultado de uma tarefa curta
+                if tarefa in self._pendentes:
+                    self._inicios[tarefa] = instante
+        except queue.Empty:
+            pass
+    
+    def _registrar(self, futuro: Future):
+        with self._lock:
+            self._ler_inicios()
+            tarefa = self._tarefas.pop(futuro, None)
+            self._inicios.pop(tarefa, None)
+            self._pendentes.discard(tarefa)
+            if futuro.cancelled() or futuro.exception() is not None:
+                self._com_erro += 1
+            else:
+                self._concluidas += 1
+
+    def health(self, verificar: bool = False) -> Dict:
+        """
+        Estado do pool para monitoramento.
+
+        Args:
+            verificar: Se True, envia um ping e mede o tempo de resposta
+
+        Returns:
+            Dicionário com configuração, processos vivos e contadores de tarefas
+        """
+        # _processes é interno ao ProcessPoolExecutor; é a única forma de ver os pids atuais
+        processos = getattr(self._executor, '_processes', None) or {}
+        pids = sorted(pid for pid, processo in list(processos.items()) if processo.is_alive())
+        with self._lock:
+            saude = {
+                "ativo": self.running,
+                "workers": self.workers,
+                "max_tarefas_por_worker": self.max_tasks_per_child,
+                "prazo_segundos": self.deadline_seconds,
+                "processos_vivos": len(pids),
+                "pids": pids,
+                "tarefas_enviadas": self._enviadas,
+                "tarefas_concluidas": self._concluidas,
+                "tarefas_com_erro": self._com_erro,
+                "tarefas_pendentes": self._enviadas - self._concluidas - self._com_erro,
+                "iniciado_em": self._iniciado_em.isoformat() if self._iniciado_em else None,
+                "aquecimento_segundos": round(self._aquecimento_s, 3),
+                "reinicios": self._reinicios,
+            }
+        if verificar and self.running:
+            inicio = time.perf_counter()
+            try:
+                self._executor.submit(_ping).result(timeout=30)
+                saude["ping_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+            except Exception as e:
+                saude["ping_erro"] = str(e)
+        return saude
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# Pool do processo servidor (um por processo Django) e pid do processo em que
+# o settings foi consultado; depois de um fork o pid muda e o pool herdado é ignorado
+_pool: Optional[WorkerPool] = None
+_pool_pid: Optional[int] = None
+_lock_pool = threading.Lock()
+
+
+def start_pool(workers: int, max_tasks_per_child: Optional[int] = None, config_dxf: Optional[Dict] = None,
+               aguardar: bool = True, deadline_seconds: Optional[float] = None) -> WorkerPool:
+    """Cria (uma única vez por processo) e inicia o pool do processo."""
+    global _pool, _pool_pid
+    with _lock_pool:
+        if _pool is None or _pool_pid != os.getpid() or not _pool.running:
+            _pool = WorkerPool(workers, max_tasks_per_child, config_dxf, deadline_seconds).start(aguardar=aguardar)
+            _pool_pid = os.getpid()
+            atexit.register(stop_pool)
+        return _pool
+
+
+def get_pool() -> Optional[WorkerPool]:
+    """
+    Pool iniciado do processo, ou None (processamento na própria thread da requisição).
+
+    Na primeira chamada em cada processo, inicia o pool se PROCESSING_POOL
+    tiver 'enabled' e 'workers' > 0.
+    """
+    if _pool_pid != os.getpid():
+        _start_pool_from_settings()
+    return _pool if _pool is not None and _pool.running else None
+
+
+def _start_pool_from_settings():
+    global _pool, _pool_pid
+    from django.conf import settings
+    config = getattr(settings, 'PROCESSING_POOL', {})
+    with _lock_pool:
+        if _pool_pid == os.getpid():
+            return
+        # Um pool herdado pertence ao processo pai
+        _pool = None
+        try:
+            if config.get('enabled', False) and config.get('workers', 0) > 0:
+                from .integrated_processor import configuracao_dxf
+                _pool = WorkerPool(config['workers'], config.get('max_tasks_per_child'), configuracao_dxf(),
+                                   config.get('deadline_seconds')).start(aguardar=config.get('wait_warmup', True))
+                atexit.register(stop_pool)
+        finally:
+            # Uma falha ao iniciar não é repetida a cada requisição
+            _pool_pid = os.getpid()
+
+
+def stop_pool():
+    global _pool
+    with _lock_pool:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+            _pool = None